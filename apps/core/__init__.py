@@ -0,0 +1,2 @@
+# apps/core/__init__.py
+default_app_config = 'apps.core.apps.CoreConfig'
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.core'
+    verbose_name = 'Utilidades compartidas'
+    
+    def ready(self):
+        import apps.core.signals
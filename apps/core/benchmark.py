@@ -0,0 +1,273 @@
+"""
+Benchmark de los caminos críticos del punto de venta y de los reportes.
+
+`sembrar` llena la base con volúmenes realistas usando las factories de
+apps.core.factories (bulk_create, fechas repartidas en los últimos días y una
+parte de ventas a crédito). `ejecutar` mide cada escenario con el cliente de
+pruebas de DRF autenticado con JWT: percentiles p50/p95/p99 de la latencia en
+milisegundos y número de consultas SQL por petición. `comparar` marca las
+regresiones contra un resultado anterior guardado como JSON. `medir_json`
+compara el JSONRenderer de DRF con JSONRapidoRenderer sobre las respuestas
+reales de los escenarios.
+
+Lo usa el comando `benchmark`, que corre sobre una base de pruebas desechable.
+"""
+import random
+from datetime import timedelta
+from decimal import Decimal
+from time import perf_counter
+
+import factory
+import numpy as np
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from apps.facturacion.models import Factura
+from apps.inventario.models import MovimientoInventario, Producto
+from apps.reportes.resumenes import refrescar_resumenes
+from apps.reportes.views import ReporteViewSet
+from apps.usuarios.serializers import TokenObtainPairConClaimsSerializer
+from apps.ventas.models import DetalleVenta, Venta
+from .factories import (
+    CategoriaFactory, DetalleVentaFactory, FacturaFactory, MovimientoInventarioFactory,
+    ProductoFactory, UsuarioFactory, VentaFactory,
+)
+from .fechas import hoy
+from .json_rapido import JSONRapidoRenderer
+
+VOLUMENES = {
+    'productos': 500,
+    'ventas': 5000,
+    'facturas': 500,
+    'movimientos': 2000,
+    'dias': 180,
+}
+
+PERCENTILES = (50, 95, 99)
+
+_LOTE = 1000
+
+
+def _fecha_aleatoria(azar, dias):
+    """Instante de los últimos `dias` días, en horario de tienda (8 a 21 h)"""
+    fecha = timezone.localtime() - timedelta(days=azar.randrange(dias))
+    return fecha.replace(hour=azar.randrange(8, 22), minute=azar.randrange(60), second=azar.randrange(60))
+
+
+def _credito(venta, azar):
+    venta.metodo_pago = 'credito'
+    venta.dias_credito = azar.choice((15, 30))
+    venta.fecha_vencimiento = (venta.fecha + timedelta(days=venta.dias_credito)).date()
+    if azar.random() < 0.6:
+        venta.estado_credito = 'pagado'
+        venta.fecha_pago = venta.fecha + timedelta(days=azar.randrange(1, venta.dias_credito))
+    elif venta.fecha_vencimiento < hoy():
+        venta.estado_credito = 'vencido'
+    else:
+        venta.estado_credito = 'pendiente'
+
+
+def sembrar(productos=None, ventas=None, facturas=None, movimientos=None, dias=None, semilla=0):
+    """
+    Crea usuario, catálogo, ventas con detalles, facturas y movimientos, y
+    reconstruye las tablas de resumen. Regresa el usuario del benchmark.
+    """
+    volumen = {**VOLUMENES, **{clave: valor for clave, valor in (
+        ('productos', productos), ('ventas', ventas), ('facturas', facturas),
+        ('movimientos', movimientos), ('dias', dias),
+    ) if valor is not None}}
+    azar = random.Random(semilla)
+    factory.random.reseed_random(semilla)
+
+    usuario = UsuarioFactory(username='benchmark', rol='admin', is_staff=True)
+    categorias = CategoriaFactory.create_batch(20)
+    catalogo = Producto.objects.bulk_create(
+        ProductoFactory.build_batch(volumen['productos'], categoria=factory.Iterator(categorias)),
+        batch_size=_LOTE
+    )
+    # Unos cuantos productos concentran la mayoría de las ventas
+    pesos = [1 / (i + 1) for i in range(len(catalogo))]
+
+    lista_ventas = Venta.objects.bulk_create(
+        VentaFactory.build_batch(volumen['ventas'], usuario=usuario), batch_size=_LOTE
+    )
+    detalles = []
+    for venta in lista_ventas:
+        venta.fecha = _fecha_aleatoria(azar, volumen['dias'])
+        if azar.random() < 0.1:
+            _credito(venta, azar)
+        renglones = [
+            DetalleVentaFactory.build(venta=venta, producto=producto)
+            for producto in set(azar.choices(catalogo, weights=pesos, k=azar.randint(1, 5)))
+        ]
+        venta.subtotal = sum(detalle.subtotal for detalle in renglones)
+        venta.iva = (venta.subtotal * Decimal('0.16')).quantize(Decimal('0.01'))
+        venta.total = venta.subtotal + venta.iva
+        venta.utilidad_total = sum(detalle.utilidad for detalle in renglones)
+        venta.costo_total = venta.subtotal - venta.utilidad_total
+        venta.num_items = len(renglones)
+        venta.cancelada = azar.random() < 0.02
+        detalles.extend(renglones)
+
+    # `fecha` es auto_now_add: bulk_create la ignora, bulk_update no
+    Venta.objects.bulk_update(lista_ventas, [
+        'fecha', 'metodo_pago', 'dias_credito', 'fecha_vencimiento', 'estado_credito', 'fecha_pago',
+        'subtotal', 'iva', 'total', 'utilidad_total', 'costo_total', 'num_items', 'cancelada',
+    ], batch_size=_LOTE)
+    DetalleVenta.objects.bulk_create(detalles, batch_size=_LOTE)
+
+    Factura.objects.bulk_create([
+        FacturaFactory.build(
+            venta=venta, usuario=usuario, subtotal=venta.subtotal, iva=venta.iva, total=venta.total
+        )
+        for venta in azar.sample(lista_ventas, min(volumen['facturas'], len(lista_ventas)))
+    ], batch_size=_LOTE)
+
+    lista_movimientos = MovimientoInventario.objects.bulk_create(
+        MovimientoInventarioFactory.build_batch(
+            volumen['movimientos'], producto=factory.Iterator(catalogo), usuario=usuario
+        ),
+        batch_size=_LOTE
+    )
+    for movimiento in lista_movimientos:
+        movimiento.fecha = _fecha_aleatoria(azar, volumen['dias'])
+    MovimientoInventario.objects.bulk_update(lista_movimientos, ['fecha'], batch_size=_LOTE)
+
+    refrescar_resumenes(hoy() - timedelta(days=volumen['dias']), hoy())
+    return usuario
+
+
+def cliente_autenticado(usuario):
+    """APIClient con un access token JWT, para medir también la autenticación"""
+    token = TokenObtainPairConClaimsSerializer.get_token(usuario).access_token
+    cliente = APIClient()
+    cliente.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return cliente
+
+
+def escenarios(semilla=0):
+    """
+    Escenarios a medir: (nombre, método, url, datos). `datos` puede ser una
+    función que arma el cuerpo de cada petición.
+    """
+    azar = random.Random(semilla)
+    surtidos = list(Producto.objects.filter(stock__gte=50).values_list('pk', 'precio_venta'))
+
+    def venta():
+        return {
+            'metodo_pago': 'efectivo',
+            'detalles': [
+                {'producto': pk, 'cantidad': azar.randint(1, 3), 'precio_unitario': str(precio)}
+                for pk, precio in azar.sample(surtidos, min(3, len(surtidos)))
+            ],
+        }
+
+    desde = (hoy() - timedelta(days=30)).isoformat()
+    lista = [
+        ('checkout', 'post', '/api/ventas/', venta),
+        ('ventas.list', 'get', '/api/ventas/', None),
+        ('ventas.notificaciones', 'get', '/api/ventas/notificaciones/', None),
+        ('productos.list', 'get', '/api/inventario/productos/', None),
+        ('categorias.list', 'get', '/api/inventario/categorias/', None),
+        ('movimientos.list', 'get', '/api/inventario/movimientos/', None),
+        ('facturas.list', 'get', '/api/facturacion/', None),
+    ]
+    for accion in ReporteViewSet.get_extra_actions():
+        datos = {'fecha_inicio': desde, 'fecha_fin': hoy().isoformat()} if accion.url_path == 'exportar_xlsx' else None
+        lista.append((f'reportes.{accion.url_path}', 'get', f'/api/reportes/analisis/{accion.url_path}/', datos))
+    return lista
+
+
+def resumir(tiempos, consultas):
+    tiempos = np.asarray(tiempos)
+    resumen = {f'p{p}': round(float(v), 3) for p, v in zip(PERCENTILES, np.percentile(tiempos, PERCENTILES))}
+    resumen.update({
+        'media': round(float(tiempos.mean()), 3),
+        'max': round(float(tiempos.max()), 3),
+        'consultas': int(max(consultas)),
+        'consultas_media': round(float(np.mean(consultas)), 2),
+        'repeticiones': len(tiempos),
+    })
+    return resumen
+
+
+def medir(cliente, metodo, url, datos=None, repeticiones=20, calentamiento=2, con_cache=False):
+    """
+    Latencia (ms) y consultas de `repeticiones` peticiones. Sin `con_cache`
+    se vacía la caché antes de cada una para medir el trabajo completo.
+    """
+    tiempos, consultas = [], []
+    for i in range(calentamiento + repeticiones):
+        cuerpo = datos() if callable(datos) else datos
+        if not con_cache:
+            cache.clear()
+        with CaptureQueriesContext(connection) as capturadas:
+            inicio = perf_counter()
+            respuesta = getattr(cliente, metodo)(url, cuerpo, format='json' if metodo != 'get' else None)
+            duracion = (perf_counter() - inicio) * 1000
+        if respuesta.status_code >= 400:
+            raise RuntimeError(f'{metodo.upper()} {url} respondió {respuesta.status_code}')
+        if i >= calentamiento:
+            tiempos.append(duracion)
+            consultas.append(len(capturadas))
+    return resumir(tiempos, consultas)
+
+
+def ejecutar(usuario, repeticiones=20, con_cache=False, solo=None, semilla=0):
+    """Mide todos los escenarios (o los que contienen `solo` en el nombre)"""
+    cliente = cliente_autenticado(usuario)
+    resultados = {}
+    for nombre, metodo, url, datos in escenarios(semilla):
+        if solo and solo not in nombre:
+            continue
+        resultados[nombre] = medir(cliente, metodo, url, datos, repeticiones=repeticiones, con_cache=con_cache)
+    return resultados
+
+
+def medir_json(usuario, repeticiones=50, solo=None, semilla=0):
+    """
+    Tiempo de codificación (ms) de la respuesta de cada escenario GET con el
+    JSONRenderer de DRF y con JSONRapidoRenderer, y el tamaño resultante.
+    """
+    cliente = cliente_autenticado(usuario)
+    renderers = {'drf': JSONRenderer(), 'orjson': JSONRapidoRenderer()}
+    resultados = {}
+    for nombre, metodo, url, datos in escenarios(semilla):
+        if metodo != 'get' or (solo and solo not in nombre):
+            continue
+        datos_respuesta = getattr(cliente.get(url, datos), 'data', None)
+        if datos_respuesta is None:
+            # Archivos (exportar_xlsx): no pasan por el renderer
+            continue
+        resultado = {}
+        for clave, renderer in renderers.items():
+            tiempos = []
+            for _ in range(repeticiones):
+                inicio = perf_counter()
+                contenido = renderer.render(datos_respuesta)
+                tiempos.append((perf_counter() - inicio) * 1000)
+            resultado[clave] = {'p50': round(float(np.median(tiempos)), 4), 'bytes': len(contenido)}
+        resultado['aceleracion'] = round(resultado['drf']['p50'] / max(resultado['orjson']['p50'], 1e-6), 1)
+        resultados[nombre] = resultado
+    return resultados
+
+
+def comparar(resultados, base, tolerancia=0.2):
+    """
+    Regresiones contra `base` (mismo formato que `resultados`): p95 más de
+    `tolerancia` por encima, o más consultas por petición.
+    """
+    regresiones = []
+    for nombre, actual in resultados.items():
+        anterior = base.get(nombre)
+        if anterior is None:
+            continue
+        if actual['p95'] > anterior['p95'] * (1 + tolerancia):
+            regresiones.append(f"{nombre}: p95 {anterior['p95']:.1f} → {actual['p95']:.1f} ms")
+        if actual['consultas'] > anterior['consultas']:
+            regresiones.append(f"{nombre}: consultas {anterior['consultas']} → {actual['consultas']}")
+    return regresiones
@@ -0,0 +1,117 @@
+"""
+Caché compartida con invalidación por modelo.
+
+Cada modelo de MODELOS tiene un contador de versión en la caché; las señales
+de apps.core.signals lo incrementan en post_save y post_delete (y otra vez al
+confirmarse la transacción, para que una lectura concurrente no guarde datos
+anteriores con la versión nueva). Las claves incluyen las versiones de los
+modelos de los que depende el valor, así que un cambio deja sin uso todas las
+entradas anteriores sin borrarlas una por una; expiran con su timeout.
+
+Los update() y bulk_update() no disparan señales: quien los hace llama a
+`invalidar_modelos`.
+
+    obtener('ventas.notificaciones', (fecha,), calcular, modelos=(Producto, Venta))
+    cachear_queryset('inventario.categorias', Categoria.objects.filter(activo=True))
+
+    @cachear('inventario.valor', modelos=(Producto,))
+    def valor_inventario(categoria_id): ...
+
+Los reportes (apps.reportes.cache) usan los mismos contadores, agrupados por
+dominio.
+
+Los aciertos y fallos se cuentan por espacio en la métrica
+localito_cache_consultas_total de /api/monitoreo/metricas/.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.monitoreo.metricas import CACHE_CONSULTAS
+
+MODELOS = (
+    'inventario.producto', 'inventario.categoria', 'ventas.venta', 'ventas.detalleventa',
+    'facturacion.factura',
+)
+
+_FALTANTE = object()
+
+
+def _etiqueta(modelo):
+    etiqueta = modelo._meta.label_lower
+    if etiqueta not in MODELOS:
+        raise ValueError(f"Modelo sin invalidación automática: {etiqueta}")
+    return etiqueta
+
+
+def _clave_version(etiqueta):
+    return f'modelos:version:{etiqueta}'
+
+
+def versiones(*modelos):
+    claves = [_clave_version(_etiqueta(modelo)) for modelo in modelos]
+    actuales = cache.get_many(claves)
+    for clave in claves:
+        if clave not in actuales:
+            cache.add(clave, 1, timeout=None)
+            actuales[clave] = cache.get(clave, 1)
+    return [actuales[clave] for clave in claves]
+
+
+def invalidar_modelos(*modelos):
+    """Incrementa la versión de los modelos indicados"""
+    for modelo in modelos:
+        clave = _clave_version(_etiqueta(modelo))
+        try:
+            cache.incr(clave)
+        except ValueError:
+            cache.set(clave, 1, timeout=None)
+
+
+def clave(espacio, partes, modelos):
+    huella = hashlib.sha1(repr(tuple(partes)).encode('utf-8')).hexdigest()
+    version = '.'.join(str(v) for v in versiones(*modelos))
+    return f'compartida:{espacio}:{version}:{huella}'
+
+
+def obtener(espacio, partes, calcular, modelos, timeout=None):
+    """
+    Valor cacheado bajo `espacio` y `partes` (cualquier tupla con repr estable);
+    si no está o cambió alguno de `modelos`, lo calcula con `calcular()`.
+    """
+    llave = clave(espacio, partes, modelos)
+    valor = cache.get(llave, _FALTANTE)
+    if valor is not _FALTANTE:
+        CACHE_CONSULTAS.labels(espacio, 'hit').inc()
+        return valor
+
+    CACHE_CONSULTAS.labels(espacio, 'miss').inc()
+    valor = calcular()
+    cache.set(llave, valor, timeout if timeout is not None else settings.CACHE_COMPARTIDA_TIMEOUT)
+    return valor
+
+
+def cachear_queryset(espacio, queryset, partes=(), modelos=None, timeout=None):
+    """
+    Lista con los resultados del queryset. La clave incluye su SQL; por defecto
+    depende solo de queryset.model, así que con select_related o values() de
+    otros modelos hay que pasarlos en `modelos`.
+    """
+    # Un clon, para no llenar el caché de resultados del queryset que se recibió
+    return obtener(
+        espacio, (str(queryset.query), *partes), lambda: list(queryset.all()),
+        modelos or (queryset.model,), timeout
+    )
+
+
+def cachear(espacio, modelos, timeout=None):
+    """Decorador para funciones cuyo resultado depende solo de sus argumentos y de `modelos`"""
+    def decorador(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            partes = (*args, *sorted(kwargs.items()))
+            return obtener(espacio, partes, lambda: func(*args, **kwargs), modelos, timeout)
+        return wrapper
+    return decorador
@@ -0,0 +1,69 @@
+"""
+GET condicional (ETag y Last-Modified) para listados que se consultan
+constantemente.
+
+`get_condicional` calcula un validador barato de los querysets de los que
+depende la respuesta: Max(ultima_actualizacion) y Count de cada uno (una
+consulta por queryset). El ETag combina esos valores con la URL completa y el
+formato de respuesta; si el cliente manda If-None-Match o If-Modified-Since y
+nada cambió se responde 304 sin ejecutar la acción ni serializar.
+
+Las ediciones cambian el máximo (auto_now) y las altas y bajas el conteo. Los
+update() y bulk_update() que modifican lo que muestra un listado deben
+asignar ultima_actualizacion a mano.
+"""
+import hashlib
+from functools import wraps
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
+def validador(request, querysets, campo='ultima_actualizacion'):
+    """(etag, last_modified) de los querysets; last_modified es un timestamp o None"""
+    partes = [request.build_absolute_uri(), getattr(request, 'accepted_media_type', '')]
+    ultima = None
+    for queryset in querysets:
+        valores = queryset.order_by().aggregate(ultima=Max(campo), total=Count('pk'))
+        partes.append(f"{valores['ultima'] and valores['ultima'].isoformat()}:{valores['total']}")
+        if valores['ultima'] is not None and (ultima is None or valores['ultima'] > ultima):
+            ultima = valores['ultima']
+    etag = quote_etag(hashlib.sha1('|'.join(partes).encode('utf-8')).hexdigest())
+    return etag, int(ultima.timestamp()) if ultima is not None else None
+
+
+def _encabezados(response, etag, ultima):
+    response['ETag'] = etag
+    if ultima is not None:
+        response['Last-Modified'] = http_date(ultima)
+    # Sin esto el navegador podría reutilizar la respuesta sin preguntar
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def get_condicional(querysets):
+    """
+    Decorador para acciones GET de un ViewSet. `querysets(vista)` regresa los
+    querysets de los que depende la respuesta, ya filtrados como en la acción.
+    """
+    def decorador(func):
+        @wraps(func)
+        def wrapper(self, request, *args, **kwargs):
+            # La API navegable muestra el usuario y formularios: siempre completa
+            if getattr(request, 'accepted_renderer', None) is not None and request.accepted_renderer.format == 'api':
+                return func(self, request, *args, **kwargs)
+
+            etag, ultima = validador(request, querysets(self))
+            no_modificado = get_conditional_response(request, etag=etag, last_modified=ultima)
+            if no_modificado is not None:
+                return _encabezados(no_modificado, etag, ultima)
+
+            response = func(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                _encabezados(response, etag, ultima)
+            return response
+
+        return wrapper
+
+    return decorador
@@ -0,0 +1,105 @@
+"""
+Factories de factory-boy para pruebas y para sembrar datos del benchmark.
+
+Los campos derivados (subtotal y utilidad del detalle, precio de venta,
+stock_nuevo del movimiento) se calculan en la factory para que `build()`
+entregue objetos consistentes que se pueden guardar con bulk_create.
+"""
+import uuid
+from decimal import Decimal
+
+import factory
+from factory import fuzzy
+from factory.django import DjangoModelFactory
+
+from apps.facturacion.models import Factura
+from apps.inventario.models import Categoria, MovimientoInventario, Producto
+from apps.usuarios.models import Usuario
+from apps.ventas.models import DetalleVenta, Venta
+
+CENTAVOS = Decimal('0.01')
+
+
+class UsuarioFactory(DjangoModelFactory):
+    class Meta:
+        model = Usuario
+        django_get_or_create = ('username',)
+
+    username = factory.Sequence(lambda n: f'usuario{n}')
+    rol = 'vendedor'
+    password = factory.django.Password('benchmark123')
+
+
+class CategoriaFactory(DjangoModelFactory):
+    class Meta:
+        model = Categoria
+        django_get_or_create = ('nombre',)
+
+    nombre = factory.Sequence(lambda n: f'Categoría {n}')
+
+
+class ProductoFactory(DjangoModelFactory):
+    class Meta:
+        model = Producto
+
+    codigo = factory.Sequence(lambda n: f'P-{n:06d}')
+    nombre = factory.Sequence(lambda n: f'Producto {n}')
+    categoria = factory.SubFactory(CategoriaFactory)
+    stock = fuzzy.FuzzyInteger(0, 500)
+    stock_minimo = 10
+    precio_costo = fuzzy.FuzzyDecimal(5, 200)
+    precio_venta = factory.LazyAttribute(
+        lambda o: (o.precio_costo * Decimal('1.35')).quantize(CENTAVOS)
+    )
+
+
+class VentaFactory(DjangoModelFactory):
+    class Meta:
+        model = Venta
+
+    folio = factory.Sequence(lambda n: f'V-{n + 1:05d}')
+    metodo_pago = fuzzy.FuzzyChoice(['efectivo', 'tarjeta', 'transferencia'])
+    usuario = factory.SubFactory(UsuarioFactory)
+
+
+class DetalleVentaFactory(DjangoModelFactory):
+    class Meta:
+        model = DetalleVenta
+
+    venta = factory.SubFactory(VentaFactory)
+    producto = factory.SubFactory(ProductoFactory)
+    cantidad = fuzzy.FuzzyInteger(1, 5)
+    precio_unitario = factory.LazyAttribute(lambda o: o.producto.precio_venta)
+    costo_unitario = factory.LazyAttribute(lambda o: o.producto.precio_costo)
+    subtotal = factory.LazyAttribute(lambda o: o.precio_unitario * o.cantidad)
+    utilidad = factory.LazyAttribute(lambda o: (o.precio_unitario - o.costo_unitario) * o.cantidad)
+
+
+class MovimientoInventarioFactory(DjangoModelFactory):
+    class Meta:
+        model = MovimientoInventario
+
+    producto = factory.SubFactory(ProductoFactory)
+    tipo = 'entrada'
+    cantidad = fuzzy.FuzzyInteger(1, 50)
+    stock_anterior = factory.LazyAttribute(lambda o: o.producto.stock)
+    stock_nuevo = factory.LazyAttribute(lambda o: o.stock_anterior + o.cantidad)
+    motivo = 'Compra a proveedor'
+    usuario = factory.SubFactory(UsuarioFactory)
+
+
+class FacturaFactory(DjangoModelFactory):
+    class Meta:
+        model = Factura
+
+    folio_fiscal = factory.LazyFunction(lambda: str(uuid.uuid4()))
+    folio = factory.Sequence(lambda n: n + 1)
+    cliente_rfc = 'XAXX010101000'
+    cliente_nombre = 'Público General'
+    cliente_email = 'cliente@example.com'
+    cliente_codigo_postal = '01000'
+    subtotal = fuzzy.FuzzyDecimal(50, 5000)
+    iva = factory.LazyAttribute(lambda o: (o.subtotal * Decimal('0.16')).quantize(CENTAVOS))
+    total = factory.LazyAttribute(lambda o: o.subtotal + o.iva)
+    status = 'timbrada'
+    usuario = factory.SubFactory(UsuarioFactory)
@@ -0,0 +1,97 @@
+"""
+Rangos de fechas en la zona horaria del negocio.
+
+Los días y meses locales se convierten en rangos aware semiabiertos
+[inicio, fin) para filtrar con `fecha__gte=inicio, fecha__lt=fin`. A
+diferencia de `fecha__date=...`, que convierte la zona horaria de cada fila,
+la comparación es directa contra la columna y aprovecha su índice.
+"""
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+FORMATO_FECHA = '%Y-%m-%d'
+
+
+def hoy():
+    """Fecha local actual del negocio"""
+    return timezone.localdate()
+
+
+def inicio_dia(fecha):
+    """Medianoche local de `fecha` como datetime aware"""
+    return timezone.make_aware(datetime.combine(fecha, time.min))
+
+
+def inicio_mes(fecha):
+    return fecha.replace(day=1)
+
+
+def sumar_meses(fecha, meses):
+    """Primer día del mes que está `meses` meses antes o después del de `fecha`"""
+    indice = fecha.year * 12 + fecha.month - 1 + meses
+    return fecha.replace(year=indice // 12, month=indice % 12 + 1, day=1)
+
+
+def rango_dias(desde, hasta=None):
+    """Rango [inicio, fin) de los días locales desde `desde` hasta `hasta` inclusive"""
+    hasta = hasta or desde
+    return inicio_dia(desde), inicio_dia(hasta + timedelta(days=1))
+
+
+def rango_dia(fecha=None):
+    """Rango [inicio, fin) del día local `fecha` (hoy por omisión)"""
+    return rango_dias(fecha or hoy())
+
+
+def rango_mes(fecha=None):
+    """Rango [inicio, fin) del mes local que contiene `fecha` (hoy por omisión)"""
+    inicio = inicio_mes(fecha or hoy())
+    return inicio_dia(inicio), inicio_dia(sumar_meses(inicio, 1))
+
+
+def ultimos_dias(dias, hasta=None):
+    """Rango desde hace `dias` días locales hasta el fin de `hasta` (hoy por omisión)"""
+    hasta = hasta or hoy()
+    return rango_dias(hasta - timedelta(days=dias), hasta)
+
+
+def ultimos_meses(meses, hasta=None):
+    """Rango de los últimos `meses` meses locales completos, incluyendo el actual"""
+    hasta = hasta or hoy()
+    return inicio_dia(sumar_meses(hasta, 1 - meses)), inicio_dia(sumar_meses(hasta, 1))
+
+
+def parsear_fecha(valor):
+    """Convierte 'YYYY-MM-DD' en date; lanza ValueError si no tiene ese formato"""
+    return datetime.strptime(valor, FORMATO_FECHA).date()
+
+
+def filtrar_por_fechas(queryset, query_params, campo='fecha'):
+    """
+    Filtra `campo` con los días locales fecha_inicio y fecha_fin (inclusivos)
+    de los parámetros, cuando vienen. Un formato inválido es un error 400.
+    """
+    filtros = {}
+    try:
+        if query_params.get('fecha_inicio'):
+            filtros[f'{campo}__gte'] = inicio_dia(parsear_fecha(query_params['fecha_inicio']))
+        if query_params.get('fecha_fin'):
+            filtros[f'{campo}__lt'] = rango_dia(parsear_fecha(query_params['fecha_fin']))[1]
+    except ValueError:
+        raise ValidationError({'error': 'Las fechas deben tener el formato YYYY-MM-DD'})
+    return queryset.filter(**filtros)
+
+
+def fechas_parametros(query_params, dias=30):
+    """
+    Lee fecha_inicio y fecha_fin (YYYY-MM-DD, inclusivas) de los parámetros.
+    Sin fecha_fin se usa hoy y sin fecha_inicio los `dias` días que terminan
+    en fecha_fin. Lanza ValueError si alguna no tiene el formato correcto.
+    """
+    fecha_inicio = query_params.get('fecha_inicio')
+    fecha_fin = query_params.get('fecha_fin')
+    hasta = parsear_fecha(fecha_fin) if fecha_fin else hoy()
+    desde = parsear_fecha(fecha_inicio) if fecha_inicio else hasta - timedelta(days=dias - 1)
+    return desde, hasta
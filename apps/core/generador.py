@@ -0,0 +1,428 @@
+"""
+Generador de datos sintéticos a escala de producción.
+
+Crea catálogo, ventas con sus detalles, facturas y movimientos de inventario
+con distribuciones realistas:
+
+- Estacionalidad: más ventas en diciembre y mayo, los fines de semana y en
+  las horas de comida y de salida del trabajo, con una tendencia de
+  crecimiento a lo largo del periodo.
+- Productos estrella: la popularidad sigue una ley de Zipf, unos cuantos
+  SKU concentran la mayoría de las unidades.
+- Mezcla de métodos de pago de Venta.METODOS_PAGO, con créditos a 15 o 30
+  días pagados, pendientes o vencidos según su fecha de vencimiento.
+
+Las filas se insertan por lotes con bulk_create, o con COPY en PostgreSQL,
+sin pasar por `save()` de Venta y DetalleVenta; los campos derivados
+(subtotal, utilidad, totales de la venta, vencimiento del crédito, stock de
+los movimientos) se calculan aquí igual que lo harían los modelos. Con la
+misma semilla y las mismas opciones el resultado es el mismo; por eso el
+periodo termina ayer y nada queda después de la hora en que se generó.
+"""
+import csv
+import io
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+
+from apps.facturacion.models import Factura
+from apps.inventario.models import Categoria, MovimientoInventario, Producto
+from apps.reportes.cache import invalidar
+from apps.reportes.resumenes import refrescar_resumenes
+from apps.usuarios.models import Usuario
+from apps.ventas.models import DetalleVenta, Venta
+from .fechas import hoy, inicio_dia
+
+CATEGORIAS = (
+    'Abarrotes', 'Bebidas', 'Lácteos', 'Botanas', 'Dulcería', 'Panadería', 'Enlatados',
+    'Limpieza', 'Higiene personal', 'Carnes frías', 'Frutas y verduras', 'Farmacia',
+)
+
+METODOS_PAGO = ('efectivo', 'tarjeta', 'transferencia', 'credito')
+PROBABILIDAD_METODOS = (0.55, 0.28, 0.09, 0.08)
+
+# Factor de ventas por mes (enero = 1) y por día de la semana (lunes = 0)
+FACTOR_MES = (0.85, 0.88, 0.95, 0.97, 1.10, 0.98, 1.00, 1.02, 0.97, 1.00, 1.08, 1.35)
+FACTOR_SEMANA = (0.90, 0.92, 0.95, 1.00, 1.12, 1.25, 1.05)
+# Peso de cada hora del día (la tienda abre de 7 a 22)
+PESO_HORA = (0, 0, 0, 0, 0, 0, 0, 2, 4, 5, 6, 7, 9, 10, 9, 7, 6, 7, 9, 10, 8, 5, 2, 0)
+
+CRECIMIENTO_ANUAL = 0.12
+EXPONENTE_ZIPF = 1.1
+PROBABILIDAD_CANCELADA = 0.015
+TASA_IVA = Decimal('0.16')
+
+TIPOS_MOVIMIENTO = ('entrada', 'salida', 'ajuste')
+PROBABILIDAD_TIPOS = (0.6, 0.3, 0.1)
+MOTIVOS = {
+    'entrada': 'Compra a proveedor',
+    'salida': 'Salida por merma',
+    'ajuste': 'Ajuste por conteo físico',
+}
+
+
+def _pesos(centavos):
+    return Decimal(int(centavos)).scaleb(-2)
+
+
+def pesos_zipf(n, exponente=EXPONENTE_ZIPF):
+    """Probabilidad de cada producto según su rango de popularidad"""
+    pesos = 1 / np.arange(1, n + 1) ** exponente
+    return pesos / pesos.sum()
+
+
+def pesos_dias(desde, dias):
+    """Probabilidad de venta de cada día a partir de `desde` (estacionalidad y tendencia)"""
+    fechas = [desde + timedelta(days=i) for i in range(dias)]
+    pesos = np.array([FACTOR_MES[f.month - 1] * FACTOR_SEMANA[f.weekday()] for f in fechas])
+    pesos *= 1 + CRECIMIENTO_ANUAL * np.arange(dias) / 365
+    return fechas, pesos / pesos.sum()
+
+
+@contextmanager
+def _fechas_explicitas(*modelos):
+    """Desactiva auto_now/auto_now_add para que bulk_create respete las fechas generadas"""
+    campos = [
+        campo for modelo in modelos for campo in modelo._meta.concrete_fields
+        if getattr(campo, 'auto_now', False) or getattr(campo, 'auto_now_add', False)
+    ]
+    originales = [(campo.auto_now, campo.auto_now_add) for campo in campos]
+    for campo in campos:
+        campo.auto_now = campo.auto_now_add = False
+    try:
+        yield
+    finally:
+        for campo, (auto_now, auto_now_add) in zip(campos, originales):
+            campo.auto_now, campo.auto_now_add = auto_now, auto_now_add
+
+
+class Escritor:
+    """Inserta lotes de objetos con bulk_create o, en PostgreSQL, con COPY"""
+
+    def __init__(self, usar_copy=None, lote=5000):
+        if usar_copy is None:
+            usar_copy = connection.vendor == 'postgresql'
+        if usar_copy and connection.vendor != 'postgresql':
+            raise ValueError('COPY solo está disponible en PostgreSQL')
+        self.usar_copy = usar_copy
+        self.lote = lote
+
+    def insertar(self, modelo, objetos):
+        if not objetos:
+            return
+        if self.usar_copy:
+            self._copy(modelo, objetos)
+        else:
+            modelo.objects.bulk_create(objetos, batch_size=self.lote)
+
+    def _copy(self, modelo, objetos):
+        # Sin pk explícita la columna se omite y la llena la secuencia
+        campos = [
+            campo for campo in modelo._meta.concrete_fields
+            if not (campo.primary_key and getattr(objetos[0], campo.attname) is None)
+        ]
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer)
+        for objeto in objetos:
+            fila = []
+            for campo in campos:
+                valor = campo.get_db_prep_save(getattr(objeto, campo.attname), connection)
+                fila.append('\\N' if valor is None else valor)
+            escritor.writerow(fila)
+        buffer.seek(0)
+
+        columnas = ', '.join(connection.ops.quote_name(campo.column) for campo in campos)
+        sql = f"COPY {connection.ops.quote_name(modelo._meta.db_table)} ({columnas}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+        with connection.cursor() as cursor:
+            if hasattr(cursor.cursor, 'copy_expert'):
+                cursor.cursor.copy_expert(sql, buffer)
+            else:
+                # psycopg 3
+                with cursor.cursor.copy(sql) as copia:
+                    copia.write(buffer.getvalue())
+
+    def reiniciar_secuencias(self, *modelos):
+        """Ajusta las secuencias de PostgreSQL después de insertar pks explícitas"""
+        if connection.vendor != 'postgresql':
+            return
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), modelos):
+                cursor.execute(sql)
+
+
+class GeneradorDatos:
+    """
+    Genera `ventas` ventas en los últimos `dias` días, una factura para la
+    fracción `facturas` de ellas y `movimientos` movimientos de inventario.
+    Con `productos` en 0 usa el catálogo activo existente.
+    """
+
+    def __init__(self, ventas=100000, productos=2000, movimientos=None, facturas=0.05,
+                 dias=730, usuarios=5, semilla=42, lote=5000, usar_copy=None, progreso=None):
+        self.ventas = ventas
+        self.productos = productos
+        self.movimientos = ventas // 10 if movimientos is None else movimientos
+        self.facturas = facturas
+        self.dias = dias
+        self.usuarios = usuarios
+        self.semilla = semilla
+        self.lote = lote
+        self.rng = np.random.default_rng(semilla)
+        self.escritor = Escritor(usar_copy, lote)
+        self.progreso = progreso or (lambda mensaje: None)
+        self.hasta = hoy() - timedelta(days=1)
+        self.desde = self.hasta - timedelta(days=dias - 1)
+        # Último instante del periodo: ninguna fecha generada lo pasa
+        self.limite = inicio_dia(hoy()) - timedelta(seconds=1)
+
+    def generar(self, resumenes=True):
+        with _fechas_explicitas(Producto, Venta, MovimientoInventario, Factura):
+            self.preparar_catalogo()
+            self.generar_ventas()
+            self.generar_movimientos()
+
+        if resumenes:
+            self.progreso('Reconstruyendo resúmenes de reportes...')
+            refrescar_resumenes(self.desde, self.hasta)
+        invalidar('ventas', 'inventario', 'facturacion')
+
+    # Catálogo
+
+    def preparar_catalogo(self):
+        self.cajeros = []
+        for i in range(1, self.usuarios + 1):
+            usuario, creado = Usuario.objects.get_or_create(username=f'cajero_gen_{i}', defaults={'rol': 'vendedor'})
+            if creado:
+                usuario.set_unusable_password()
+                usuario.save(update_fields=['password'])
+            self.cajeros.append(usuario.pk)
+
+        if self.productos:
+            self._crear_productos()
+        else:
+            self.catalogo = list(Producto.objects.filter(activo=True).order_by('id'))
+            if not self.catalogo:
+                raise ValueError('No hay productos activos; indique cuántos productos generar')
+
+        # El orden aleatorio decide qué productos son los más vendidos
+        self.rng.shuffle(self.catalogo)
+        self.popularidad = pesos_zipf(len(self.catalogo))
+        self.precio_venta = np.array([int(p.precio_venta * 100) for p in self.catalogo], dtype=np.int64)
+        self.precio_costo = np.array([int(p.precio_costo * 100) for p in self.catalogo], dtype=np.int64)
+
+    def _crear_productos(self):
+        categorias = [Categoria.objects.get_or_create(nombre=nombre)[0] for nombre in CATEGORIAS]
+        prefijo = f'G{self.semilla}-'
+        inicial = Producto.objects.filter(codigo__startswith=prefijo).count()
+        # Dados de alta antes de la primera venta del periodo
+        alta = inicio_dia(self.desde)
+
+        costo = np.clip(self.rng.lognormal(3.5, 0.8, self.productos) * 100, 500, 300000).astype(np.int64)
+        margen = self.rng.uniform(0.15, 0.60, self.productos)
+        venta = np.round(costo * (1 + margen)).astype(np.int64)
+        stock = self.rng.integers(0, 300, self.productos)
+        stock_minimo = self.rng.choice((5, 10, 20), self.productos)
+        categoria = self.rng.integers(0, len(categorias), self.productos)
+
+        productos = [
+            Producto(
+                codigo=f'{prefijo}{inicial + i:06d}', nombre=f'{categorias[categoria[i]].nombre} {inicial + i}',
+                categoria=categorias[categoria[i]], stock=int(stock[i]), stock_minimo=int(stock_minimo[i]),
+                precio_costo=_pesos(costo[i]), precio_venta=_pesos(venta[i]),
+                fecha_creacion=alta, ultima_actualizacion=alta,
+            )
+            for i in range(self.productos)
+        ]
+        # bulk_create regresa las pks que necesitan los detalles
+        self.catalogo = Producto.objects.bulk_create(productos, batch_size=self.lote)
+        self.progreso(f'{len(self.catalogo)} productos creados')
+
+    # Ventas, detalles y facturas
+
+    def _instantes(self):
+        """Fecha y hora local de cada venta, en orden cronológico"""
+        fechas, pesos = pesos_dias(self.desde, self.dias)
+        dia = self.rng.choice(self.dias, self.ventas, p=pesos)
+        hora = np.array(PESO_HORA, dtype=float)
+        segundo = self.rng.choice(24, self.ventas, p=hora / hora.sum()) * 3600 + self.rng.integers(0, 3600, self.ventas)
+        orden = np.lexsort((segundo, dia))
+
+        medianoches = [inicio_dia(fecha) for fecha in fechas]
+        for i in orden:
+            yield medianoches[dia[i]] + timedelta(seconds=int(segundo[i]))
+
+    def _siguientes_folios(self):
+        ultima = Venta.objects.order_by('-id').values_list('id', 'folio').first()
+        siguiente_id = (ultima[0] if ultima else 0) + 1
+        numero = int(ultima[1].split('-')[1]) + 1 if ultima else 1
+        folio_factura = (Factura.objects.filter(serie='A').aggregate(m=Max('folio'))['m'] or 0) + 1
+        return siguiente_id, numero, folio_factura
+
+    def _rfc(self):
+        letras = self.rng.integers(65, 91, 4)
+        fecha = self.rng.integers(0, 10, 6)
+        homoclave = self.rng.integers(0, 10, 3)
+        return ''.join(map(chr, letras)) + ''.join(map(str, fecha)) + ''.join(map(str, homoclave))
+
+    def generar_ventas(self):
+        venta_id, numero, folio_factura = self._siguientes_folios()
+        clientes = [(f'Cliente {i:04d}', self._rfc()) for i in range(1, 501)]
+        instantes = self._instantes()
+        generadas = 0
+
+        while generadas < self.ventas:
+            n = min(self.lote, self.ventas - generadas)
+            ventas, detalles, facturas = [], [], []
+
+            # Renglones de todo el lote de una vez
+            renglones = 1 + np.minimum(self.rng.poisson(1.3, n), 9)
+            total_renglones = int(renglones.sum())
+            producto = self.rng.choice(len(self.catalogo), total_renglones, p=self.popularidad)
+            cantidad = np.minimum(self.rng.geometric(0.55, total_renglones), 12)
+            subtotal = cantidad * self.precio_venta[producto]
+            utilidad = cantidad * (self.precio_venta[producto] - self.precio_costo[producto])
+            inicios = np.concatenate(([0], np.cumsum(renglones)[:-1]))
+            subtotal_venta = np.add.reduceat(subtotal, inicios)
+            utilidad_venta = np.add.reduceat(utilidad, inicios)
+
+            metodo = self.rng.choice(len(METODOS_PAGO), n, p=PROBABILIDAD_METODOS)
+            dias_credito = self.rng.choice((15, 30), n)
+            azar_credito = self.rng.random(n)
+            azar_pago = self.rng.integers(1, 30, n)
+            cancelada = self.rng.random(n) < PROBABILIDAD_CANCELADA
+            facturada = (self.rng.random(n) < self.facturas) & ~cancelada
+            cliente = self.rng.integers(0, len(clientes), n)
+            cajero = self.rng.integers(0, len(self.cajeros), n)
+
+            for i in range(n):
+                fecha = next(instantes)
+                venta = Venta(
+                    id=venta_id, folio=f'V-{numero:05d}', fecha=fecha,
+                    metodo_pago=METODOS_PAGO[metodo[i]], usuario_id=self.cajeros[cajero[i]],
+                    cancelada=bool(cancelada[i]),
+                )
+                if venta.metodo_pago == 'credito' or facturada[i]:
+                    venta.cliente_nombre, venta.cliente_rfc = clientes[cliente[i]]
+                if venta.metodo_pago == 'credito':
+                    self._credito(venta, int(dias_credito[i]), azar_credito[i], int(azar_pago[i]))
+
+                # Lo mismo que Venta.calcular_totales
+                venta.subtotal = _pesos(subtotal_venta[i])
+                venta.iva = (venta.subtotal * TASA_IVA).quantize(Decimal('0.01'))
+                venta.total = venta.subtotal + venta.iva
+                venta.utilidad_total = _pesos(utilidad_venta[i])
+                venta.costo_total = venta.subtotal - venta.utilidad_total
+                venta.num_items = int(renglones[i])
+                ventas.append(venta)
+
+                for r in range(inicios[i], inicios[i] + renglones[i]):
+                    p = self.catalogo[producto[r]]
+                    detalles.append(DetalleVenta(
+                        venta_id=venta_id, producto_id=p.pk, cantidad=int(cantidad[r]),
+                        precio_unitario=p.precio_venta, costo_unitario=p.precio_costo,
+                        subtotal=_pesos(subtotal[r]), utilidad=_pesos(utilidad[r]),
+                    ))
+
+                if facturada[i]:
+                    facturas.append(self._factura(venta, folio_factura))
+                    folio_factura += 1
+
+                venta_id += 1
+                numero += 1
+
+            with transaction.atomic():
+                self.escritor.insertar(Venta, ventas)
+                self.escritor.insertar(DetalleVenta, detalles)
+                self.escritor.insertar(Factura, facturas)
+
+            generadas += n
+            self.progreso(f'{generadas}/{self.ventas} ventas ({len(detalles)} detalles y {len(facturas)} facturas en el lote)')
+
+        self.escritor.reiniciar_secuencias(Venta)
+
+    def _credito(self, venta, dias, azar, dias_pago):
+        venta.dias_credito = dias
+        venta.fecha_vencimiento = (venta.fecha + timedelta(days=dias)).date()
+        if venta.fecha_vencimiento <= self.hasta:
+            venta.estado_credito = 'pagado' if azar < 0.85 else 'vencido'
+        else:
+            venta.estado_credito = 'pagado' if azar < 0.3 else 'pendiente'
+        if venta.estado_credito == 'pagado':
+            venta.fecha_pago = min(venta.fecha + timedelta(days=min(dias_pago, dias)), self.limite)
+
+    def _factura(self, venta, folio):
+        creada = min(venta.fecha + timedelta(minutes=int(self.rng.integers(5, 2880))), self.limite)
+        cancelada = self.rng.random() < 0.04
+        return Factura(
+            venta_id=venta.id, folio_fiscal=str(uuid.UUID(bytes=self.rng.bytes(16), version=4)),
+            serie='A', folio=folio, cliente_rfc=venta.cliente_rfc, cliente_nombre=venta.cliente_nombre,
+            cliente_email=f'{venta.cliente_rfc.lower()}@example.com',
+            cliente_codigo_postal=f'{int(self.rng.integers(1000, 99999)):05d}',
+            uso_cfdi=str(self.rng.choice(('G01', 'G03', 'P01'))),
+            subtotal=venta.subtotal, iva=venta.iva, total=venta.total,
+            status='cancelada' if cancelada else 'timbrada',
+            fecha_timbrado=creada + timedelta(minutes=1),
+            fecha_cancelacion=creada + timedelta(days=1) if cancelada else None,
+            motivo_cancelacion='02' if cancelada else '',
+            usuario_id=venta.usuario_id, fecha_creacion=creada, ultima_actualizacion=creada,
+        )
+
+    # Movimientos de inventario
+
+    def generar_movimientos(self):
+        if not self.movimientos:
+            return
+        inicio = inicio_dia(self.desde)
+        segundos = np.sort(self.rng.integers(0, self.dias * 86400, self.movimientos))
+        producto = self.rng.choice(len(self.catalogo), self.movimientos, p=self.popularidad)
+        tipo = self.rng.choice(len(TIPOS_MOVIMIENTO), self.movimientos, p=PROBABILIDAD_TIPOS)
+        cantidad = {
+            'entrada': self.rng.integers(10, 200, self.movimientos),
+            'salida': self.rng.integers(1, 20, self.movimientos),
+            # Diferencia del conteo físico contra el stock del sistema
+            'ajuste': self.rng.integers(-5, 6, self.movimientos),
+        }
+        stock = np.array([p.stock for p in self.catalogo], dtype=np.int64)
+
+        lote = []
+        for i in range(self.movimientos):
+            p = producto[i]
+            nombre_tipo = TIPOS_MOVIMIENTO[tipo[i]]
+            n = int(cantidad[nombre_tipo][i])
+            anterior = int(stock[p])
+            if nombre_tipo == 'entrada':
+                nuevo = anterior + n
+            elif nombre_tipo == 'ajuste':
+                # Como MovimientoInventarioCreateSerializer: la cantidad es el stock contado
+                n = nuevo = max(1, anterior + n)
+            else:
+                # No se puede sacar más de lo que hay; sin stock se registra una entrada
+                n = min(n, anterior)
+                if n == 0:
+                    nombre_tipo, n = 'entrada', int(cantidad['entrada'][i])
+                    nuevo = anterior + n
+                else:
+                    nuevo = anterior - n
+            stock[p] = nuevo
+            lote.append(MovimientoInventario(
+                producto_id=self.catalogo[p].pk, tipo=nombre_tipo, cantidad=n,
+                stock_anterior=anterior, stock_nuevo=nuevo, motivo=MOTIVOS[nombre_tipo],
+                usuario_id=self.cajeros[i % len(self.cajeros)],
+                fecha=inicio + timedelta(seconds=int(segundos[i])),
+            ))
+            if len(lote) == self.lote:
+                self.escritor.insertar(MovimientoInventario, lote)
+                lote = []
+                self.progreso(f'{i + 1}/{self.movimientos} movimientos')
+        self.escritor.insertar(MovimientoInventario, lote)
+
+        # El stock del catálogo queda como lo dejó el último movimiento
+        for p, producto_obj in enumerate(self.catalogo):
+            producto_obj.stock = int(stock[p])
+        Producto.objects.bulk_update(self.catalogo, ['stock'], batch_size=self.lote)
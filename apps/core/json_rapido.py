@@ -0,0 +1,124 @@
+"""
+Renderer y parser JSON con orjson.
+
+JSONRapidoRenderer produce lo mismo que el JSONRenderer de DRF (compacto, UTF-8
+sin escapar, U+2028/U+2029 escapados) pero codifica en C. Los Decimal salen
+como número, igual que con el encoder de DRF. Los datetime y date que llegan
+sin pasar por un serializer, como los de los reportes, se formatean con
+DATETIME_FORMAT y DATE_FORMAT de REST_FRAMEWORK en la zona horaria local,
+igual que DateTimeField y DateField.
+
+El comando `benchmark --json` compara ambos renderers con los payloads de los
+reportes.
+"""
+import datetime
+import decimal
+
+import orjson
+from django.conf import settings
+from django.db.models.query import QuerySet
+from django.utils import timezone
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from rest_framework import ISO_8601, parsers, renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.settings import api_settings
+
+OPCIONES = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _iso(valor):
+    texto = valor.isoformat()
+    # Como DRF: UTC como 'Z'
+    return texto[:-6] + 'Z' if texto.endswith('+00:00') else texto
+
+
+def formateador(formato):
+    """Función que formatea un date o datetime (ya en hora local) con `formato` de REST_FRAMEWORK"""
+    if formato is None or formato.lower() == ISO_8601:
+        return _iso
+    # Los formatos de settings equivalen a isoformat, que es varias veces más rápido que strftime
+    if formato == '%Y-%m-%d':
+        return lambda valor: valor.isoformat()
+    if formato == '%Y-%m-%d %H:%M:%S':
+        return lambda valor: valor.replace(tzinfo=None).isoformat(' ', 'seconds')
+    return lambda valor: valor.strftime(formato)
+
+
+def codificador():
+    """
+    Función `default` de orjson para los tipos que no codifica por sí mismo,
+    tratados como en el encoder de DRF. La zona horaria y los formatos se
+    resuelven una vez por respuesta (la zona solo si hay datetimes):
+    get_current_timezone() cuesta más que formatear la fecha.
+    """
+    zona = None
+    fecha_hora = formateador(api_settings.DATETIME_FORMAT)
+    fecha = formateador(api_settings.DATE_FORMAT)
+
+    def por_defecto(obj):
+        nonlocal zona
+        if isinstance(obj, decimal.Decimal):
+            return float(obj)
+        if isinstance(obj, datetime.datetime):
+            if obj.tzinfo is not None:
+                if zona is None:
+                    zona = timezone.get_current_timezone()
+                obj = obj.astimezone(zona)
+            return fecha_hora(obj)
+        if isinstance(obj, datetime.date):
+            return fecha(obj)
+        if isinstance(obj, datetime.time):
+            if timezone.is_aware(obj):
+                raise ValueError("JSON can't represent timezone-aware times.")
+            texto = obj.isoformat()
+            return texto[:12] if obj.microsecond else texto
+        if isinstance(obj, datetime.timedelta):
+            return str(obj.total_seconds())
+        if isinstance(obj, Promise):
+            return force_str(obj)
+        if isinstance(obj, QuerySet):
+            return tuple(obj)
+        if isinstance(obj, bytes):
+            return obj.decode()
+        if hasattr(obj, 'tolist'):
+            return obj.tolist()
+        if hasattr(obj, '__getitem__'):
+            try:
+                return dict(obj)
+            except (TypeError, ValueError):
+                return list(obj)
+        if hasattr(obj, '__iter__'):
+            return list(obj)
+        raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+    return por_defecto
+
+
+class JSONRapidoRenderer(renderers.JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        opciones = OPCIONES
+        # orjson solo sabe indentar a dos espacios
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            opciones |= orjson.OPT_INDENT_2
+        contenido = orjson.dumps(data, default=codificador(), option=opciones)
+        # Igual que JSONRenderer: sin estos escapes el JSON no es JavaScript válido
+        return contenido.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class JSONRapidoParser(parsers.JSONParser):
+    renderer_class = JSONRapidoRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        contenido = stream.read()
+        try:
+            if encoding.lower().replace('-', '') != 'utf8':
+                contenido = contenido.decode(encoding)
+            return orjson.loads(contenido)
+        except ValueError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
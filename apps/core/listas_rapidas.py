@@ -0,0 +1,144 @@
+"""
+Listados rápidos a partir de values().
+
+Un ListaRapida equivale a un serializer de listado de DRF (`serializer_class`)
+y produce exactamente la misma salida sin crear instancias del modelo ni pasar
+por get_attribute en cada renglón: lee las columnas con values() (las
+relaciones como `categoria.nombre` se vuelven joins `categoria__nombre`) y
+convierte cada valor con una función preparada una sola vez por listado a
+partir del campo de DRF correspondiente.
+
+Los campos que no son columnas (SerializerMethodField, propiedades, métodos
+como `usuario.get_full_name`) se calculan con un método `get_<campo>(fila)`
+que recibe el renglón crudo; `columnas_extra` agrega las columnas que esos
+métodos necesitan. Si el método regresa OMITIR el campo no se incluye, igual
+que DRF cuando la relación es nula.
+
+Las vistas lo activan con ListaRapidaMixin y `lista_rapida`, y solo se usa
+con LISTAS_RAPIDAS activo.
+"""
+import decimal
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .json_rapido import formateador
+
+OMITIR = object()
+
+# Campos cuya representación es el mismo valor que regresa la base
+_IDENTICOS = (
+    serializers.CharField, serializers.IntegerField, serializers.BooleanField,
+    serializers.ChoiceField, serializers.PrimaryKeyRelatedField,
+)
+
+
+class ListaRapida:
+    serializer_class = None
+    columnas_extra = ()
+
+    def __init__(self, context=None):
+        self.context = context or {}
+        self.campos = self.serializer_class(context=self.context).fields
+        self._zona = None
+
+    def zona(self):
+        if self._zona is None:
+            self._zona = timezone.get_current_timezone()
+        return self._zona
+
+    def columnas(self):
+        """Columnas de values(): las fuentes de los campos que no se calculan y las extra"""
+        columnas = []
+        for nombre, campo in self.campos.items():
+            if not hasattr(self, f'get_{nombre}'):
+                columnas.append(campo.source.replace('.', '__'))
+        return list(dict.fromkeys([*columnas, *self.columnas_extra]))
+
+    def valores(self, queryset):
+        return queryset.select_related(None).prefetch_related(None).values(*self.columnas())
+
+    def convertidor(self, campo):
+        """Función equivalente a campo.to_representation para un valor no nulo; None si es el mismo valor"""
+        # Con un formato propio del campo o sin formato global se usa el de DRF
+        if (isinstance(campo, serializers.DateTimeField) and not hasattr(campo, 'format')
+                and api_settings.DATETIME_FORMAT is not None):
+            formato = formateador(api_settings.DATETIME_FORMAT)
+
+            def fecha_hora(valor):
+                if timezone.is_aware(valor):
+                    valor = valor.astimezone(self.zona())
+                return formato(valor)
+            return fecha_hora
+        if (isinstance(campo, serializers.DateField) and not hasattr(campo, 'format')
+                and api_settings.DATE_FORMAT is not None):
+            return formateador(api_settings.DATE_FORMAT)
+        if (isinstance(campo, serializers.DecimalField) and campo.decimal_places is not None
+                and getattr(campo, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+                and not campo.localize):
+            exponente = decimal.Decimal('.1') ** campo.decimal_places
+            contexto = decimal.getcontext().copy()
+            if campo.max_digits is not None:
+                contexto.prec = campo.max_digits
+            return lambda valor: '{:f}'.format(valor.quantize(exponente, rounding=campo.rounding, context=contexto))
+        if isinstance(campo, _IDENTICOS) and getattr(campo, 'pk_field', None) is None:
+            return None
+        return campo.to_representation
+
+    def extractores(self):
+        extractores = []
+        for nombre, campo in self.campos.items():
+            metodo = getattr(self, f'get_{nombre}', None)
+            if metodo is not None:
+                extractores.append((nombre, metodo))
+                continue
+            columna = campo.source.replace('.', '__')
+            convertir = self.convertidor(campo)
+            if convertir is None:
+                extractores.append((nombre, lambda fila, columna=columna: fila[columna]))
+            else:
+                extractores.append((nombre, lambda fila, columna=columna, convertir=convertir: (
+                    None if fila[columna] is None else convertir(fila[columna])
+                )))
+        return extractores
+
+    def serializar(self, filas):
+        extractores = self.extractores()
+        datos = []
+        for fila in filas:
+            renglon = {}
+            for nombre, extraer in extractores:
+                valor = extraer(fila)
+                if valor is not OMITIR:
+                    renglon[nombre] = valor
+            datos.append(renglon)
+        return datos
+
+
+def nombre_completo(fila, prefijo='usuario'):
+    """Usuario.get_full_name() desde las columnas del renglón; OMITIR si no hay usuario"""
+    if fila[prefijo] is None:
+        return OMITIR
+    return f"{fila[f'{prefijo}__first_name']} {fila[f'{prefijo}__last_name']}".strip()
+
+
+class ListaRapidaMixin:
+    """
+    Mixin de ViewSet: con LISTAS_RAPIDAS activo la acción list serializa con
+    `lista_rapida` en lugar del serializer de DRF.
+    """
+    lista_rapida = None
+
+    def list(self, request, *args, **kwargs):
+        if self.lista_rapida is None or not settings.LISTAS_RAPIDAS:
+            return super().list(request, *args, **kwargs)
+
+        lista = self.lista_rapida(context=self.get_serializer_context())
+        filas = lista.valores(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(filas)
+        if page is not None:
+            return self.get_paginated_response(lista.serializar(page))
+        return Response(lista.serializar(filas))
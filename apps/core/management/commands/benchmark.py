@@ -0,0 +1,93 @@
+import json
+import platform
+from pathlib import Path
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+from django.utils import timezone
+
+from apps.core.benchmark import VOLUMENES, comparar, ejecutar, medir_json, sembrar
+from localitodjango.celery import app as celery_app
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide latencia (p50/p95/p99) y consultas de checkout, listados, notificaciones '
+        'y reportes sobre una base de pruebas sembrada; compara contra un resultado base'
+    )
+
+    def add_arguments(self, parser):
+        for volumen, defecto in VOLUMENES.items():
+            parser.add_argument(f'--{volumen}', type=int, default=defecto)
+        parser.add_argument('--repeticiones', type=int, default=20)
+        parser.add_argument('--semilla', type=int, default=0)
+        parser.add_argument('--solo', help='Mide solo los escenarios cuyo nombre contiene este texto')
+        parser.add_argument('--con-cache', action='store_true',
+                            help='No vaciar la caché entre peticiones')
+        parser.add_argument('--json', action='store_true',
+                            help='Compara además el tiempo de codificación JSON de DRF y de orjson')
+        parser.add_argument('--salida', help='Archivo JSON donde guardar los resultados')
+        parser.add_argument('--base', help='Resultado JSON anterior contra el cual comparar')
+        parser.add_argument('--tolerancia', type=float, default=0.2,
+                            help='Aumento de p95 permitido contra la base (0.2 = 20%%)')
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Conservar la base de pruebas entre ejecuciones')
+
+    def handle(self, *args, **options):
+        volumen = {clave: options[clave] for clave in VOLUMENES}
+        # Las tareas del checkout se ejecutan en el proceso, nunca en el broker real
+        celery_app.conf.task_always_eager = True
+
+        setup_test_environment()
+        bases = setup_databases(verbosity=0, interactive=False, keepdb=options['keepdb'])
+        try:
+            self.stdout.write(f"Sembrando {', '.join(f'{v} {k}' for k, v in volumen.items())}...")
+            usuario = sembrar(semilla=options['semilla'], **volumen)
+            resultados = ejecutar(
+                usuario, repeticiones=options['repeticiones'], con_cache=options['con_cache'],
+                solo=options['solo'], semilla=options['semilla']
+            )
+            codificacion = medir_json(
+                usuario, solo=options['solo'], semilla=options['semilla']
+            ) if options['json'] else None
+        finally:
+            teardown_databases(bases, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        informe = {
+            'fecha': timezone.now().isoformat(),
+            'motor': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'volumen': volumen,
+            'con_cache': options['con_cache'],
+            'resultados': resultados,
+        }
+        if codificacion is not None:
+            informe['json'] = codificacion
+        contenido = json.dumps(informe, indent=2, ensure_ascii=False)
+        if options['salida']:
+            Path(options['salida']).write_text(contenido, encoding='utf-8')
+        else:
+            self.stdout.write(contenido)
+
+        for nombre, r in resultados.items():
+            self.stdout.write(
+                f"{nombre:<40} p50 {r['p50']:>8.1f}  p95 {r['p95']:>8.1f}  p99 {r['p99']:>8.1f} ms"
+                f"  {r['consultas']:>3} consultas"
+            )
+
+        for nombre, r in (codificacion or {}).items():
+            self.stdout.write(
+                f"{nombre:<40} JSON drf {r['drf']['p50']:>8.3f}  orjson {r['orjson']['p50']:>8.3f} ms"
+                f"  ×{r['aceleracion']:<6} {r['drf']['bytes']:>9} bytes"
+            )
+
+        if options['base']:
+            base = json.loads(Path(options['base']).read_text(encoding='utf-8'))
+            regresiones = comparar(resultados, base['resultados'], options['tolerancia'])
+            if regresiones:
+                raise CommandError('Regresiones contra la base:\n' + '\n'.join(regresiones))
+            self.stdout.write(self.style.SUCCESS('Sin regresiones contra la base'))
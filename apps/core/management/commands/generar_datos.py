@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.generador import GeneradorDatos
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera ventas, detalles, facturas y movimientos sintéticos a escala de producción '
+        '(bulk_create por lotes, o COPY en PostgreSQL). Es determinista con --semilla'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ventas', type=int, default=100000)
+        parser.add_argument('--productos', type=int, default=2000,
+                            help='Productos nuevos a crear; 0 usa el catálogo activo existente')
+        parser.add_argument('--movimientos', type=int,
+                            help='Movimientos de inventario (por omisión, una décima parte de las ventas)')
+        parser.add_argument('--facturas', type=float, default=0.05,
+                            help='Fracción de ventas no canceladas que se facturan')
+        parser.add_argument('--dias', type=int, default=730, help='Días hacia atrás desde hoy')
+        parser.add_argument('--usuarios', type=int, default=5, help='Cajeros que registran las ventas')
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--lote', type=int, default=5000, help='Ventas por lote')
+        copy = parser.add_mutually_exclusive_group()
+        copy.add_argument('--copy', dest='usar_copy', action='store_true', default=None,
+                          help='Insertar con COPY (solo PostgreSQL; por omisión si está disponible)')
+        copy.add_argument('--sin-copy', dest='usar_copy', action='store_false',
+                          help='Insertar con bulk_create aun en PostgreSQL')
+        parser.add_argument('--sin-resumenes', action='store_true',
+                            help='No reconstruir las tablas de resumen de reportes')
+
+    def handle(self, *args, **options):
+        try:
+            generador = GeneradorDatos(
+                ventas=options['ventas'], productos=options['productos'],
+                movimientos=options['movimientos'], facturas=options['facturas'],
+                dias=options['dias'], usuarios=options['usuarios'], semilla=options['semilla'],
+                lote=options['lote'], usar_copy=options['usar_copy'], progreso=self.stdout.write,
+            )
+            generador.generar(resumenes=not options['sin_resumenes'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{options['ventas']} ventas generadas en {options['dias']} días "
+            f"({'COPY' if generador.escritor.usar_copy else 'bulk_create'})"
+        ))
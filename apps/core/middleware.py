@@ -0,0 +1,20 @@
+from rest_framework.permissions import SAFE_METHODS
+
+from .replicas import marcar_escritura
+
+
+class ReplicaPegajosaMiddleware:
+    """
+    Después de una escritura exitosa, el usuario lee de `default` durante
+    REPLICA_LECTURA_PEGAJOSA segundos (ver apps.core.replicas).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            # DRF deja en request.user el usuario autenticado con JWT
+            marcar_escritura(getattr(request, 'user', None))
+        return response
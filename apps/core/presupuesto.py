@@ -0,0 +1,144 @@
+"""
+Presupuesto de consultas para reportes y otras acciones pesadas.
+
+`presupuesto_consulta` rechaza con 400 los parámetros de periodo inválidos y
+los rangos de fechas más largos que `max_dias`, y limita el tiempo de cada sentencia SQL de la petición: en
+PostgreSQL con `statement_timeout` y en SQLite con un progress handler. Si una
+sentencia se pasa del límite responde 503. En ambos casos se sugiere generar
+el reporte de forma asíncrona con ReporteGenerado.
+"""
+from contextlib import contextmanager
+from functools import wraps
+from time import monotonic
+
+from django.conf import settings
+from django.db import DatabaseError, OperationalError, connections
+from rest_framework import status
+from rest_framework.response import Response
+
+from .fechas import fechas_parametros, hoy, sumar_meses
+from .replicas import alias_replica
+
+SUGERENCIA = 'Para periodos largos genere el reporte de forma asíncrona con POST /api/reportes/generados/'
+
+# Instrucciones de la máquina virtual de SQLite entre cada revisión del límite
+_PASOS_SQLITE = 1000
+
+# SQLSTATE de PostgreSQL para query_canceled
+_CONSULTA_CANCELADA = '57014'
+
+
+def _entero(query_params, nombre):
+    valor = int(query_params[nombre])
+    if valor < 0:
+        raise ValueError(nombre)
+    return valor
+
+
+def dias_solicitados(query_params):
+    """
+    Días que abarca la petición: el mayor de dias, meses (días de calendario)
+    y el rango fecha_inicio/fecha_fin, con fecha_fin hoy si no viene (como en
+    fechas_parametros). None sin ninguno de esos parámetros; lanza ValueError
+    si alguno no tiene el formato correcto.
+    """
+    periodos = []
+    if query_params.get('dias'):
+        periodos.append(_entero(query_params, 'dias'))
+    if query_params.get('meses'):
+        # Los meses completos que cubre ultimos_meses, incluyendo el actual
+        meses = _entero(query_params, 'meses')
+        fin = sumar_meses(hoy(), 1)
+        periodos.append((fin - sumar_meses(fin, -meses)).days)
+    if query_params.get('fecha_inicio') or query_params.get('fecha_fin'):
+        desde, hasta = fechas_parametros(query_params)
+        periodos.append((hasta - desde).days + 1)
+    return max(periodos, default=None)
+
+
+def _activar(conexion, milisegundos):
+    conexion.ensure_connection()
+    if conexion.vendor == 'postgresql':
+        with conexion.cursor() as cursor:
+            cursor.execute('SET statement_timeout = %s', [int(milisegundos)])
+        return True
+    if conexion.vendor == 'sqlite':
+        limite = monotonic() + milisegundos / 1000
+        conexion.connection.set_progress_handler(lambda: int(monotonic() > limite), _PASOS_SQLITE)
+        return True
+    return False
+
+
+def _desactivar(conexion):
+    try:
+        if conexion.vendor == 'postgresql':
+            with conexion.cursor() as cursor:
+                cursor.execute('SET statement_timeout TO DEFAULT')
+        elif conexion.vendor == 'sqlite' and conexion.connection is not None:
+            conexion.connection.set_progress_handler(None, 0)
+    except DatabaseError:
+        # Transacción abortada: Django descarta la conexión al terminar la petición
+        pass
+
+
+@contextmanager
+def limite_tiempo(milisegundos):
+    """Limita cada sentencia SQL del bloque en default y en la réplica"""
+    aliases = ['default'] + ([alias_replica()] if alias_replica() else [])
+    activadas = []
+    try:
+        for alias in aliases:
+            if _activar(connections[alias], milisegundos):
+                activadas.append(connections[alias])
+        yield
+    finally:
+        for conexion in activadas:
+            _desactivar(conexion)
+
+
+def es_cancelacion(error):
+    """True si el error es una sentencia cancelada por exceder el límite de tiempo"""
+    causa = error.__cause__
+    codigo = getattr(causa, 'pgcode', None) or getattr(causa, 'sqlstate', None)
+    return codigo == _CONSULTA_CANCELADA or str(error) == 'interrupted'
+
+
+def presupuesto_consulta(max_dias=None, timeout_ms=None):
+    """
+    Decorador para acciones de ViewSet. Usa REPORTES_MAX_DIAS y
+    REPORTES_TIMEOUT_MS cuando no se indican; 0 desactiva el límite.
+    """
+    def decorador(func):
+        @wraps(func)
+        def wrapper(self, request, *args, **kwargs):
+            limite_dias = settings.REPORTES_MAX_DIAS if max_dias is None else max_dias
+            limite_ms = settings.REPORTES_TIMEOUT_MS if timeout_ms is None else timeout_ms
+
+            try:
+                dias = dias_solicitados(request.query_params)
+            except ValueError:
+                return Response({
+                    'error': 'dias y meses deben ser enteros no negativos y las fechas tener el formato YYYY-MM-DD',
+                }, status=status.HTTP_400_BAD_REQUEST)
+            if limite_dias and dias is not None and dias > limite_dias:
+                return Response({
+                    'error': f'El periodo solicitado ({dias} días) excede el máximo de {limite_dias} días',
+                    'max_dias': limite_dias,
+                    'sugerencia': SUGERENCIA,
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            if not limite_ms:
+                return func(self, request, *args, **kwargs)
+
+            try:
+                with limite_tiempo(limite_ms):
+                    return func(self, request, *args, **kwargs)
+            except OperationalError as e:
+                if not es_cancelacion(e):
+                    raise
+                return Response({
+                    'error': f'La consulta excedió el tiempo máximo de {limite_ms / 1000:g} segundos',
+                    'sugerencia': SUGERENCIA,
+                }, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': '60'})
+        return wrapper
+    return decorador
@@ -0,0 +1,115 @@
+"""
+Lecturas en la base de datos réplica.
+
+Solo se leen de la réplica las consultas hechas dentro de `leer_de_replica()`,
+que activan las vistas con LecturaReplicaMixin (reportes, exportaciones y
+listados). Todas las escrituras van a `default`. Después de un POST, PUT,
+PATCH o DELETE el usuario lee de `default` durante REPLICA_LECTURA_PEGAJOSA
+segundos, para que vea sus propios cambios aunque la réplica vaya atrasada.
+La marca vive en la caché, que con réplica debe ser compartida entre workers
+(settings lo exige), y mientras está activa los reportes no usan su caché.
+
+Sin DATABASE_REPLICA_URL no hay alias de réplica y todo se lee de `default`.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from rest_framework.permissions import SAFE_METHODS
+
+_leer_de_replica = ContextVar('leer_de_replica', default=False)
+
+
+def _misma_base(a, b):
+    return all(a.get(clave) == b.get(clave) for clave in ('ENGINE', 'NAME', 'HOST', 'PORT'))
+
+
+def alias_replica():
+    """Alias de la réplica, o None si no está configurada o es la misma base que default"""
+    alias = settings.REPLICA_DATABASE_ALIAS
+    if alias not in connections.databases:
+        return None
+    # En pruebas la réplica es un espejo de default (TEST MIRROR) y se lee de default
+    if _misma_base(connections[alias].settings_dict, connections['default'].settings_dict):
+        return None
+    return alias
+
+
+def _clave_pegajosa(usuario_id):
+    return f'replica:pegajoso:{usuario_id}'
+
+
+def marcar_escritura(usuario):
+    """El usuario acaba de escribir: sus lecturas van a `default` por un tiempo"""
+    if usuario is not None and usuario.is_authenticated and alias_replica():
+        cache.set(_clave_pegajosa(usuario.pk), True, settings.REPLICA_LECTURA_PEGAJOSA)
+
+
+def escribio_recientemente(usuario):
+    return (
+        usuario is not None and usuario.is_authenticated
+        and cache.get(_clave_pegajosa(usuario.pk)) is not None
+    )
+
+
+def lectura_pegajosa(usuario):
+    """True si hay réplica y el usuario lee de `default` por haber escrito recientemente"""
+    return alias_replica() is not None and escribio_recientemente(usuario)
+
+
+@contextmanager
+def leer_de_replica(activo=True):
+    """Envía a la réplica las lecturas hechas dentro del bloque"""
+    token = _leer_de_replica.set(activo)
+    try:
+        yield
+    finally:
+        _leer_de_replica.reset(token)
+
+
+class ReplicaRouter:
+    """Lecturas a la réplica solo dentro de `leer_de_replica()`; escrituras y migraciones a `default`"""
+
+    def db_for_read(self, model, **hints):
+        if _leer_de_replica.get():
+            return alias_replica()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # La réplica tiene los mismos datos que `default`
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+class LecturaReplicaMixin:
+    """
+    Mixin de ViewSet para leer de la réplica en las acciones de
+    `acciones_replica` ('__all__' para todas las acciones de solo lectura).
+    """
+    acciones_replica = ('list',)
+
+    def usar_replica(self, request):
+        if request.method not in SAFE_METHODS or not alias_replica():
+            return False
+        if self.acciones_replica != '__all__' and self.action not in self.acciones_replica:
+            return False
+        return not lectura_pegajosa(request.user)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # Después de autenticar, para saber si el usuario escribió recientemente
+        self._token_replica = _leer_de_replica.set(self.usar_replica(request))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_token_replica', None)
+        if token is not None:
+            _leer_de_replica.reset(token)
+            self._token_replica = None
+        return super().finalize_response(request, response, *args, **kwargs)
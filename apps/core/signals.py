@@ -0,0 +1,21 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.facturacion.models import Factura
+from apps.inventario.models import Categoria, Producto
+from apps.ventas.models import DetalleVenta, Venta
+from .cache import invalidar_modelos
+
+@receiver([post_save, post_delete], sender=Producto)
+@receiver([post_save, post_delete], sender=Categoria)
+@receiver([post_save, post_delete], sender=Venta)
+@receiver([post_save, post_delete], sender=DetalleVenta)
+@receiver([post_save, post_delete], sender=Factura)
+def modelo_modificado(sender, **kwargs):
+    """
+    Invalida las entradas de la caché compartida y los reportes que dependen
+    del modelo, ahora y al confirmarse la transacción
+    """
+    invalidar_modelos(sender)
+    transaction.on_commit(lambda: invalidar_modelos(sender))
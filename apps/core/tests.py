@@ -0,0 +1,401 @@
+import json
+import os
+import subprocess
+import sys
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import BytesIO
+from unittest.mock import patch
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.translation import gettext_lazy
+from prometheus_client import REGISTRY
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from apps.usuarios.models import Usuario
+from apps.ventas.models import DetalleVenta, Venta
+from apps.facturacion.models import Factura
+from apps.inventario.models import Categoria, MovimientoInventario, Producto
+from . import cache as cache_compartida
+from .benchmark import comparar, ejecutar, medir_json, sembrar
+from .factories import (
+    FacturaFactory, MovimientoInventarioFactory, ProductoFactory, UsuarioFactory, VentaFactory,
+)
+from .generador import GeneradorDatos
+from .json_rapido import JSONRapidoParser, JSONRapidoRenderer
+from .fechas import fechas_parametros, hoy, rango_dia, rango_mes, ultimos_meses
+from .replicas import ReplicaRouter, _leer_de_replica, leer_de_replica
+
+ZONA = ZoneInfo('America/Mexico_City')
+
+
+class FechasTests(TestCase):
+    def test_rango_dia_local_semiabierto(self):
+        inicio, fin = rango_dia(date(2024, 3, 15))
+        self.assertEqual(inicio, datetime(2024, 3, 15, tzinfo=ZONA))
+        self.assertEqual(fin, datetime(2024, 3, 16, tzinfo=ZONA))
+        self.assertEqual(inicio.utcoffset().total_seconds(), -6 * 3600)
+
+    def test_rango_mes_cruza_anio(self):
+        inicio, fin = rango_mes(date(2023, 12, 20))
+        self.assertEqual(inicio, datetime(2023, 12, 1, tzinfo=ZONA))
+        self.assertEqual(fin, datetime(2024, 1, 1, tzinfo=ZONA))
+
+    def test_ultimos_meses_completos(self):
+        inicio, fin = ultimos_meses(3, hasta=date(2024, 2, 10))
+        self.assertEqual(inicio, datetime(2023, 12, 1, tzinfo=ZONA))
+        self.assertEqual(fin, datetime(2024, 3, 1, tzinfo=ZONA))
+
+    def test_fechas_parametros(self):
+        self.assertEqual(
+            fechas_parametros({'fecha_inicio': '2024-01-01', 'fecha_fin': '2024-01-31'}),
+            (date(2024, 1, 1), date(2024, 1, 31))
+        )
+        desde, hasta = fechas_parametros({'fecha_fin': '2024-01-31'}, dias=7)
+        self.assertEqual(desde, date(2024, 1, 25))
+        with self.assertRaises(ValueError):
+            fechas_parametros({'fecha_inicio': '31/01/2024'})
+
+
+class ReplicaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.usuario = Usuario.objects.create_user(username='cajero', password='cajero123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def test_router_solo_dentro_del_contexto(self):
+        router = ReplicaRouter()
+        with patch('apps.core.replicas.alias_replica', return_value='replica'):
+            self.assertIsNone(router.db_for_read(Venta))
+            with leer_de_replica():
+                self.assertEqual(router.db_for_read(Venta), 'replica')
+                self.assertEqual(router.db_for_write(Venta), 'default')
+        with patch('apps.core.replicas.alias_replica', return_value=None), leer_de_replica():
+            self.assertIsNone(router.db_for_read(Venta))
+        self.assertFalse(router.allow_migrate('replica', 'ventas'))
+
+    def consultas_en_replica(self, url):
+        estados = []
+
+        def registrar(execute, sql, params, many, context):
+            estados.append(_leer_de_replica.get())
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(registrar):
+            respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        return estados
+
+    def test_lecturas_pegajosas_despues_de_escribir(self):
+        # La réplica apunta a default, como con TEST MIRROR
+        with patch('apps.core.replicas.alias_replica', return_value='default'):
+            estados = self.consultas_en_replica('/api/reportes/analisis/dashboard_metricas/')
+            self.assertTrue(estados and all(estados))
+
+            respuesta = self.client.post('/api/inventario/categorias/', {'nombre': 'Bebidas'})
+            self.assertEqual(respuesta.status_code, 201)
+
+            estados = self.consultas_en_replica('/api/reportes/analisis/dashboard_metricas/')
+            self.assertTrue(estados)
+            self.assertFalse(any(estados))
+
+    def test_sin_cache_de_reportes_con_lectura_pegajosa(self):
+        url = '/api/reportes/analisis/dashboard_metricas/'
+        with patch('apps.core.replicas.alias_replica', return_value='default'):
+            self.client.get(url)
+            self.assertEqual(self.consultas_en_replica(url), [])
+
+            self.client.post('/api/inventario/categorias/', {'nombre': 'Bebidas'})
+            self.client.get(url)
+            # Ni la entrada nueva ni una guardada desde la réplica: siempre de default
+            self.assertTrue(self.consultas_en_replica(url))
+
+    def test_replica_requiere_cache_compartida(self):
+        entorno = {**os.environ, 'DATABASE_REPLICA_URL': 'sqlite:////tmp/replica.db', 'CACHE_BACKEND': 'locmem'}
+        resultado = subprocess.run(
+            [sys.executable, '-c', 'import django; django.setup()'], env=entorno,
+            cwd=settings.BASE_DIR, capture_output=True, text=True
+        )
+        self.assertIn('DATABASE_REPLICA_URL requiere una caché compartida', resultado.stderr)
+
+
+class BenchmarkTests(TestCase):
+    def test_sembrar_y_medir(self):
+        usuario = sembrar(productos=30, ventas=60, facturas=10, movimientos=20, dias=30)
+
+        self.assertEqual(Venta.objects.count(), 60)
+        venta = Venta.objects.exclude(num_items=0).first()
+        self.assertEqual(venta.num_items, venta.detalles.count())
+        self.assertEqual(venta.subtotal, sum(d.subtotal for d in DetalleVenta.objects.filter(venta=venta)))
+
+        resultados = ejecutar(usuario, repeticiones=3, solo='notificaciones')
+        self.assertEqual(list(resultados), ['ventas.notificaciones'])
+        self.assertLessEqual(resultados['ventas.notificaciones']['p50'], resultados['ventas.notificaciones']['p99'])
+
+        peor = {nombre: {**r, 'p95': r['p95'] * 2, 'consultas': r['consultas'] + 1} for nombre, r in resultados.items()}
+        self.assertEqual(comparar(resultados, peor), [])
+        self.assertEqual(len(comparar(peor, resultados)), 2)
+
+        codificacion = medir_json(usuario, repeticiones=2, solo='productos_mas_vendidos')
+        self.assertEqual(list(codificacion), ['reportes.productos_mas_vendidos'])
+        self.assertEqual(set(codificacion['reportes.productos_mas_vendidos']), {'drf', 'orjson', 'aceleracion'})
+
+
+class JSONRapidoTests(TestCase):
+    def test_mismo_json_que_drf_salvo_fechas(self):
+        datos = {
+            'total': Decimal('1234.50'),
+            'nombre': gettext_lazy('Categoría'),
+            'filas': [{'id': 1, 'cantidad': None, 'activo': True}, ('a', 2.5)],
+            'nota': 'línea\u2028separada',
+        }
+        self.assertEqual(
+            json.loads(JSONRapidoRenderer().render(datos)), json.loads(JSONRenderer().render(datos))
+        )
+        self.assertIn(b'\\u2028', JSONRapidoRenderer().render(datos))
+        self.assertEqual(JSONRapidoRenderer().render(None), b'')
+
+    def test_querysets_como_listas(self):
+        Usuario.objects.create_user(username='cajero', password='cajero12345')
+        for datos in (
+            Usuario.objects.none(),
+            Usuario.objects.values('username', 'id'),
+            {'usuarios': Usuario.objects.values_list('username', flat=True)},
+        ):
+            self.assertEqual(JSONRapidoRenderer().render(datos), JSONRenderer().render(datos))
+
+    def test_fechas_con_formato_de_settings(self):
+        datos = {
+            'inicio': datetime(2024, 3, 15, 6, 30, 15, 999, tzinfo=ZoneInfo('UTC')),
+            'dia': date(2024, 3, 15),
+        }
+        self.assertEqual(
+            json.loads(JSONRapidoRenderer().render(datos)),
+            {'inicio': '2024-03-15 00:30:15', 'dia': '2024-03-15'},
+        )
+
+    def test_parser(self):
+        parser = JSONRapidoParser()
+        self.assertEqual(parser.parse(BytesIO('{"nombre": "Café", "n": [1]}'.encode())), {'nombre': 'Café', 'n': [1]})
+        with self.assertRaises(ParseError):
+            parser.parse(BytesIO(b'{"nombre": '))
+
+    def test_api_sin_navegable_fuera_de_debug(self):
+        cliente = APIClient()
+        cliente.force_authenticate(Usuario.objects.create_user(username='admin', password='admin12345'))
+        respuesta = cliente.get('/api/inventario/categorias/', HTTP_ACCEPT='text/html')
+        self.assertEqual(respuesta.status_code, 406)
+        respuesta = cliente.post('/api/inventario/categorias/', {'nombre': 'Bebidas'}, format='json')
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(respuesta['Content-Type'], 'application/json')
+        self.assertEqual(respuesta.json()['nombre'], 'Bebidas')
+
+
+class ListasRapidasTests(TestCase):
+    URLS = (
+        '/api/inventario/productos/',
+        '/api/inventario/productos/?ordering=precio_venta&search=Producto&page=2',
+        '/api/inventario/movimientos/',
+        '/api/ventas/',
+        '/api/ventas/?metodo_pago=credito&ordering=-total',
+        '/api/facturacion/',
+    )
+
+    def setUp(self):
+        usuario = UsuarioFactory(first_name='Ana', last_name='López')
+        sin_nombre = UsuarioFactory()
+        productos = ProductoFactory.create_batch(25, stock_minimo=250)
+        ProductoFactory(descripcion='', precio_costo=Decimal('0.10'), precio_venta=Decimal('1234567.5'))
+        for i, producto in enumerate(productos[:6]):
+            MovimientoInventarioFactory(producto=producto, usuario=(usuario, sin_nombre, None)[i % 3])
+
+        VentaFactory(usuario=usuario, metodo_pago='efectivo', total=Decimal('99.9'), num_items=3)
+        VentaFactory(usuario=None, cliente_nombre='Sin cajero')
+        for dias in (-3, 1, 5):
+            VentaFactory(
+                usuario=sin_nombre, metodo_pago='credito', dias_credito=15,
+                fecha_vencimiento=hoy() + timedelta(days=dias), estado_credito='pendiente',
+            )
+        FacturaFactory(usuario=usuario)
+        FacturaFactory(usuario=usuario, status='borrador', serie='B', fecha_timbrado=None)
+        Factura.objects.filter(status='timbrada').update(fecha_timbrado=datetime(2024, 3, 15, 6, 30, 15, 999, tzinfo=ZONA))
+
+        self.client = APIClient()
+        self.client.force_authenticate(usuario)
+
+    def test_misma_salida_que_los_serializers(self):
+        for url in self.URLS:
+            with self.subTest(url=url):
+                with override_settings(LISTAS_RAPIDAS=False):
+                    esperado = self.client.get(url)
+                with override_settings(LISTAS_RAPIDAS=True):
+                    rapido = self.client.get(url)
+                self.assertEqual(rapido.status_code, 200)
+                self.assertTrue(esperado.json()['results'])
+                self.assertEqual(rapido.content, esperado.content)
+
+    @override_settings(LISTAS_RAPIDAS=True)
+    def test_sin_consultas_por_renglon(self):
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.get('/api/ventas/')
+        self.assertLessEqual(len(consultas), 3)
+
+
+class GetCondicionalTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(UsuarioFactory())
+        self.producto = ProductoFactory(stock=5, stock_minimo=10)
+        ProductoFactory(stock=50, stock_minimo=10)
+
+    def revalidar(self, url, respuesta):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=respuesta['ETag'])
+
+    def test_304_sin_cambios(self):
+        for url in ('/api/inventario/productos/', '/api/inventario/productos/stock_bajo/',
+                    '/api/inventario/categorias/'):
+            with self.subTest(url=url):
+                respuesta = self.client.get(url)
+                self.assertEqual(respuesta.status_code, 200)
+                self.assertIn('no-cache', respuesta['Cache-Control'])
+
+                with CaptureQueriesContext(connection) as consultas:
+                    revalidada = self.revalidar(url, respuesta)
+                self.assertEqual(revalidada.status_code, 304)
+                self.assertEqual(revalidada.content, b'')
+                self.assertEqual(revalidada['ETag'], respuesta['ETag'])
+                self.assertEqual(len(consultas), 2)
+
+                modificada = self.client.get(url, HTTP_IF_MODIFIED_SINCE=respuesta['Last-Modified'])
+                self.assertEqual(modificada.status_code, 304)
+
+    def test_cambios_invalidan(self):
+        url = '/api/inventario/productos/'
+        respuesta = self.client.get(url)
+
+        self.producto.precio_venta += 1
+        self.producto.save()
+        respuesta_editado = self.revalidar(url, respuesta)
+        self.assertEqual(respuesta_editado.status_code, 200)
+
+        Categoria.objects.filter(pk=self.producto.categoria_id).get().save()
+        self.assertEqual(self.revalidar(url, respuesta_editado).status_code, 200)
+
+        # Otra URL, o un producto que sale del filtro, cambian el validador
+        self.assertEqual(self.revalidar(f'{url}?search=zzz', respuesta).status_code, 200)
+        respuesta_bajo = self.client.get('/api/inventario/productos/stock_bajo/')
+        self.producto.stock = 20
+        self.producto.save()
+        self.assertEqual(self.revalidar('/api/inventario/productos/stock_bajo/', respuesta_bajo).status_code, 200)
+
+
+class CacheCompartidaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.producto = ProductoFactory(stock=1, stock_minimo=10)
+
+    def contador(self, espacio, resultado):
+        return REGISTRY.get_sample_value(
+            'localito_cache_consultas_total', {'espacio': espacio, 'resultado': resultado}
+        ) or 0
+
+    def test_invalidacion_por_modelo(self):
+        llamadas = []
+
+        @cache_compartida.cachear('pruebas.stock', modelos=(Producto,))
+        def stock(producto_id):
+            llamadas.append(producto_id)
+            return Producto.objects.get(pk=producto_id).stock
+
+        hits = self.contador('pruebas.stock', 'hit')
+        self.assertEqual(stock(self.producto.pk), 1)
+        self.assertEqual(stock(self.producto.pk), 1)
+        self.assertEqual(len(llamadas), 1)
+        self.assertEqual(self.contador('pruebas.stock', 'hit'), hits + 1)
+
+        # Otro modelo no la invalida; guardar o borrar un producto sí
+        VentaFactory()
+        stock(self.producto.pk)
+        self.assertEqual(len(llamadas), 1)
+        self.producto.stock = 7
+        self.producto.save()
+        self.assertEqual(stock(self.producto.pk), 7)
+        self.assertEqual(len(llamadas), 2)
+
+        with self.assertRaises(ValueError):
+            cache_compartida.versiones(MovimientoInventario)
+
+    def test_cachear_queryset(self):
+        consulta = Producto.objects.filter(stock__lt=5)
+        self.assertEqual(cache_compartida.cachear_queryset('pruebas.productos', consulta), [self.producto])
+        with self.assertNumQueries(0):
+            self.assertEqual(cache_compartida.cachear_queryset('pruebas.productos', consulta), [self.producto])
+        ProductoFactory(stock=2)
+        self.assertEqual(len(cache_compartida.cachear_queryset('pruebas.productos', consulta)), 2)
+
+    def test_notificaciones(self):
+        cliente = APIClient()
+        cliente.force_authenticate(UsuarioFactory())
+        url = '/api/ventas/notificaciones/'
+        self.assertEqual(cliente.get(url).data['notificaciones'][0]['cantidad'], 1)
+        with self.assertNumQueries(0):
+            cliente.get(url)
+
+        self.producto.stock = 50
+        self.producto.save()
+        self.assertEqual(cliente.get(url).data['total'], 0)
+
+
+class GeneradorDatosTests(TestCase):
+    def generar(self, **opciones):
+        GeneradorDatos(ventas=300, productos=40, movimientos=200, facturas=0.2, dias=60, lote=100, **opciones).generar()
+
+    def test_campos_derivados_consistentes(self):
+        self.generar()
+
+        self.assertEqual(Venta.objects.count(), 300)
+        for venta in Venta.objects.prefetch_related('detalles'):
+            detalles = list(venta.detalles.all())
+            self.assertEqual(venta.num_items, len(detalles))
+            self.assertEqual(venta.subtotal, sum(d.subtotal for d in detalles))
+            self.assertEqual(venta.utilidad_total, sum(d.utilidad for d in detalles))
+            self.assertEqual(venta.total, venta.subtotal + venta.iva)
+            for d in detalles:
+                self.assertEqual(d.subtotal, d.precio_unitario * d.cantidad)
+            if venta.metodo_pago == 'credito':
+                self.assertIsNotNone(venta.fecha_vencimiento)
+                self.assertIn(venta.estado_credito, ('pendiente', 'pagado', 'vencido'))
+
+        for factura in Factura.objects.select_related('venta'):
+            self.assertEqual(factura.total, factura.venta.total)
+            self.assertFalse(factura.venta.cancelada)
+
+        ultimo = {}
+        for m in MovimientoInventario.objects.order_by('fecha', 'id'):
+            if m.tipo == 'ajuste':
+                self.assertEqual(m.stock_nuevo, m.cantidad)
+            else:
+                signo = -1 if m.tipo == 'salida' else 1
+                self.assertEqual(m.stock_nuevo, m.stock_anterior + signo * m.cantidad)
+            self.assertGreaterEqual(m.stock_nuevo, 0)
+            ultimo[m.producto_id] = m
+        for producto_id, m in ultimo.items():
+            self.assertEqual(m.producto.stock, m.stock_nuevo)
+
+    def test_determinista_con_semilla(self):
+        self.generar(semilla=7)
+        primera = list(Venta.objects.order_by('id').values_list('fecha', 'metodo_pago', 'total'))
+        Factura.objects.all().delete()
+        Venta.objects.all().delete()
+
+        self.generar(semilla=7)
+        segunda = list(Venta.objects.order_by('id').values_list('fecha', 'metodo_pago', 'total'))
+        self.assertEqual(primera, segunda)
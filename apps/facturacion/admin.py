@@ -1,5 +1,7 @@
+import json
 from django.contrib import admin
-from .models import Factura, ConceptoFactura
+from django.utils.html import format_html
+from .models import Factura, ConceptoFactura, RespuestaFacturapi
 
 class ConceptoFacturaInline(admin.TabularInline):
     model = ConceptoFactura
@@ -13,7 +15,8 @@ class FacturaAdmin(admin.ModelAdmin):
     search_fields = ('folio_fiscal', 'cliente_nombre', 'cliente_rfc')
     date_hierarchy = 'fecha_creacion'
     inlines = [ConceptoFacturaInline]
-    readonly_fields = ('folio_fiscal', 'fecha_timbrado', 'fecha_cancelacion', 'facturapi_id')
+    readonly_fields = ('folio_fiscal', 'fecha_timbrado', 'fecha_cancelacion', 'facturapi_id',
+                       'respuesta_facturapi')
     
     fieldsets = (
         ('Información Básica', {
@@ -33,7 +36,14 @@ class FacturaAdmin(admin.ModelAdmin):
             'fields': ('xml_url', 'pdf_url', 'xml_file', 'pdf_file')
         }),
         ('Facturapi', {
-            'fields': ('facturapi_id', 'facturapi_response'),
+            'fields': ('facturapi_id', 'respuesta_facturapi'),
             'classes': ('collapse',)
         }),
-    )
\ No newline at end of file
+    )
+    
+    @admin.display(description='Respuesta de Facturapi')
+    def respuesta_facturapi(self, obj):
+        respuesta = RespuestaFacturapi.objects.filter(factura_id=obj.pk).first()
+        if not respuesta:
+            return '-'
+        return format_html('<pre>{}</pre>', json.dumps(respuesta.datos, indent=2, ensure_ascii=False))
\ No newline at end of file
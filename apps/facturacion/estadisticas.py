@@ -0,0 +1,79 @@
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from apps.core.cache import obtener
+from .models import Factura
+
+
+def _contadores_vacios():
+    return {
+        'total_facturas': 0,
+        'timbradas': 0,
+        'canceladas': 0,
+        'borradores': 0,
+        'monto_total': Decimal('0'),
+    }
+
+
+def _acumular(destino, fila):
+    for campo in ('total_facturas', 'timbradas', 'canceladas', 'borradores'):
+        destino[campo] += fila[campo]
+    destino['monto_total'] += fila['monto_total'] or Decimal('0')
+
+
+def calcular_estadisticas(fecha_inicio=None, fecha_fin=None):
+    """
+    Calcula las estadísticas de facturación con una sola consulta agrupada
+    por serie y mes; el resumen general se obtiene sumando los grupos.
+    """
+    facturas = Factura.objects.all()
+    if fecha_inicio:
+        facturas = facturas.filter(fecha_creacion__gte=fecha_inicio)
+    if fecha_fin:
+        facturas = facturas.filter(fecha_creacion__lt=fecha_fin)
+
+    grupos = facturas.annotate(
+        mes=TruncMonth('fecha_creacion')
+    ).values('serie', 'mes').annotate(
+        total_facturas=Count('id'),
+        timbradas=Count('id', filter=Q(status='timbrada')),
+        canceladas=Count('id', filter=Q(status='cancelada')),
+        borradores=Count('id', filter=Q(status='borrador')),
+        monto_total=Sum('total', filter=Q(status='timbrada')),
+    ).order_by()
+
+    resumen = _contadores_vacios()
+    por_serie = {}
+    por_mes = {}
+
+    for fila in grupos:
+        _acumular(resumen, fila)
+        _acumular(por_serie.setdefault(fila['serie'], _contadores_vacios()), fila)
+        _acumular(por_mes.setdefault(fila['mes'], _contadores_vacios()), fila)
+
+    resumen['por_serie'] = [
+        OrderedDict(serie=serie, **datos) for serie, datos in sorted(por_serie.items())
+    ]
+    resumen['por_mes'] = [
+        OrderedDict(mes=mes.date(), **datos)
+        for mes, datos in sorted(por_mes.items(), key=lambda item: item[0])
+    ]
+    return resumen
+
+
+def obtener_estadisticas(fecha_inicio=None, fecha_fin=None):
+    """
+    Estadísticas de facturación en la caché compartida; cualquier cambio en
+    las facturas las invalida (apps.core.cache)
+    """
+    return obtener(
+        'facturacion.estadisticas',
+        (fecha_inicio and fecha_inicio.isoformat(), fecha_fin and fecha_fin.isoformat()),
+        lambda: calcular_estadisticas(fecha_inicio, fecha_fin),
+        modelos=(Factura,),
+        timeout=settings.FACTURACION_ESTADISTICAS_CACHE_TIMEOUT,
+    )
@@ -0,0 +1,57 @@
+# Generated by Django 5.1.3 on 2026-10-19 12:09
+
+import json
+import zlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def mover_respuestas(apps, schema_editor):
+    Factura = apps.get_model('facturacion', 'Factura')
+    RespuestaFacturapi = apps.get_model('facturacion', 'RespuestaFacturapi')
+    facturas = Factura.objects.filter(facturapi_response__isnull=False).values_list('id', 'facturapi_response')
+    lote = []
+    for factura_id, datos in facturas.iterator(chunk_size=500):
+        contenido = zlib.compress(json.dumps(datos, separators=(',', ':')).encode('utf-8'))
+        lote.append(RespuestaFacturapi(factura_id=factura_id, contenido=contenido))
+        if len(lote) >= 500:
+            RespuestaFacturapi.objects.bulk_create(lote)
+            lote = []
+    RespuestaFacturapi.objects.bulk_create(lote)
+
+
+def restaurar_respuestas(apps, schema_editor):
+    Factura = apps.get_model('facturacion', 'Factura')
+    RespuestaFacturapi = apps.get_model('facturacion', 'RespuestaFacturapi')
+    for respuesta in RespuestaFacturapi.objects.iterator(chunk_size=500):
+        datos = json.loads(zlib.decompress(bytes(respuesta.contenido)).decode('utf-8'))
+        Factura.objects.filter(pk=respuesta.factura_id).update(facturapi_response=datos)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facturacion', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RespuestaFacturapi',
+            fields=[
+                ('factura', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='respuesta_facturapi', serialize=False, to='facturacion.factura')),
+                ('contenido', models.BinaryField()),
+                ('fecha_registro', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Respuesta de Facturapi',
+                'verbose_name_plural': 'Respuestas de Facturapi',
+                'db_table': 'facturas_respuesta_facturapi',
+            },
+        ),
+        migrations.RunPython(mover_respuestas, restaurar_respuestas),
+        migrations.RemoveField(
+            model_name='factura',
+            name='facturapi_response',
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
 from django.core.validators import MinValueValidator
 from decimal import Decimal
+import json
+import zlib
 from apps.ventas.models import Venta
 from apps.usuarios.models import Usuario
 
@@ -75,9 +77,8 @@ class Factura(models.Model):
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     ultima_actualizacion = models.DateTimeField(auto_now=True)
     
-    # Respuesta de Facturapi
+    # Respuesta de Facturapi (el JSON completo vive en RespuestaFacturapi)
     facturapi_id = models.CharField(max_length=100, blank=True, null=True)
-    facturapi_response = models.JSONField(blank=True, null=True)
     
     class Meta:
         db_table = 'facturas'
@@ -97,6 +98,47 @@ class Factura(models.Model):
     @property
     def numero_completo(self):
         return f"{self.serie}-{self.folio}"
+    
+    def guardar_respuesta_facturapi(self, datos):
+        """Guarda la respuesta completa de Facturapi en su tabla comprimida"""
+        respuesta = RespuestaFacturapi(factura=self)
+        respuesta.datos = datos
+        respuesta.save()
+        return respuesta
+
+class RespuestaFacturapi(models.Model):
+    """
+    Respuesta JSON completa del PAC, comprimida y fuera de la tabla de facturas
+    para que los listados y estadísticas no la carguen
+    """
+    factura = models.OneToOneField(Factura, on_delete=models.CASCADE, primary_key=True,
+                                   related_name='respuesta_facturapi')
+    contenido = models.BinaryField()
+    fecha_registro = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'facturas_respuesta_facturapi'
+        verbose_name = 'Respuesta de Facturapi'
+        verbose_name_plural = 'Respuestas de Facturapi'
+    
+    @staticmethod
+    def comprimir(datos):
+        return zlib.compress(json.dumps(datos, separators=(',', ':')).encode('utf-8'))
+    
+    @staticmethod
+    def descomprimir(contenido):
+        return json.loads(zlib.decompress(bytes(contenido)).decode('utf-8'))
+    
+    @property
+    def datos(self):
+        return self.descomprimir(self.contenido)
+    
+    @datos.setter
+    def datos(self, valor):
+        self.contenido = self.comprimir(valor)
+    
+    def __str__(self):
+        return f"Respuesta Facturapi {self.factura_id}"
 
 class ConceptoFactura(models.Model):
     factura = models.ForeignKey(Factura, on_delete=models.CASCADE, related_name='conceptos')
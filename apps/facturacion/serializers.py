@@ -1,4 +1,6 @@
+from decimal import Decimal
 from rest_framework import serializers
+from apps.core.listas_rapidas import ListaRapida
 from .models import Factura, ConceptoFactura
 
 class ConceptoFacturaSerializer(serializers.ModelSerializer):
@@ -22,7 +24,7 @@ class FacturaSerializer(serializers.ModelSerializer):
         model = Factura
         fields = '__all__'
         read_only_fields = ('folio_fiscal', 'status', 'fecha_timbrado', 'fecha_cancelacion',
-                           'xml_url', 'pdf_url', 'usuario', 'facturapi_id', 'facturapi_response')
+                           'xml_url', 'pdf_url', 'usuario', 'facturapi_id')
 
 class FacturaListSerializer(serializers.ModelSerializer):
     numero_completo = serializers.CharField(read_only=True)
@@ -32,6 +34,13 @@ class FacturaListSerializer(serializers.ModelSerializer):
         fields = ('id', 'numero_completo', 'folio_fiscal', 'cliente_nombre', 'cliente_rfc',
                  'total', 'status', 'fecha_creacion', 'fecha_timbrado')
 
+class FacturaListaRapida(ListaRapida):
+    serializer_class = FacturaListSerializer
+    columnas_extra = ('serie', 'folio')
+    
+    def get_numero_completo(self, fila):
+        return f"{fila['serie']}-{fila['folio']}"
+
 class FacturaCreateSerializer(serializers.ModelSerializer):
     conceptos = ConceptoFacturaCreateSerializer(many=True)
     
@@ -2,6 +2,8 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 from .models import Factura
 
+# Las estadísticas de facturación se invalidan con las señales de apps.core (modelo_modificado)
+
 @receiver(post_save, sender=Factura)
 def factura_timbrada(sender, instance, created, **kwargs):
     """
@@ -9,4 +11,4 @@ def factura_timbrada(sender, instance, created, **kwargs):
     """
     if instance.status == 'timbrada' and instance.xml_url:
         print(f"Factura {instance.numero_completo} timbrada exitosamente")
-        # Aquí puedes enviar email al cliente con la factura
\ No newline at end of file
+        # Aquí puedes enviar email al cliente con la factura
@@ -1,3 +1,105 @@
+from decimal import Decimal
+
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.core.cache import invalidar_modelos
+from apps.usuarios.models import Usuario
+from .models import Factura
+from .estadisticas import calcular_estadisticas
+
+
+def crear_factura(folio, status='borrador', serie='A', total=Decimal('116.00')):
+    return Factura.objects.create(
+        folio_fiscal=f"TEMP-{serie}-{folio}",
+        serie=serie,
+        folio=folio,
+        cliente_rfc='XAXX010101000',
+        cliente_nombre='Cliente',
+        cliente_email='cliente@example.com',
+        cliente_codigo_postal='64000',
+        subtotal=total / Decimal('1.16'),
+        total=total,
+        status=status,
+    )
+
+
+class EstadisticasFacturacionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.usuario = Usuario.objects.create_user(username='admin', password='admin123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+        crear_factura(1, status='timbrada')
+        crear_factura(2, status='timbrada', total=Decimal('232.00'))
+        crear_factura(3, status='cancelada')
+        crear_factura(1, serie='B')
+
+    def test_una_sola_consulta(self):
+        with self.assertNumQueries(1):
+            stats = calcular_estadisticas()
+
+        self.assertEqual(stats['total_facturas'], 4)
+        self.assertEqual(stats['timbradas'], 2)
+        self.assertEqual(stats['canceladas'], 1)
+        self.assertEqual(stats['borradores'], 1)
+        self.assertEqual(stats['monto_total'], Decimal('348.00'))
+        self.assertEqual([s['serie'] for s in stats['por_serie']], ['A', 'B'])
+        self.assertEqual(len(stats['por_mes']), 1)
+
+    def test_cache_se_invalida_al_cambiar_estado(self):
+        respuesta = self.client.get('/api/facturacion/estadisticas/')
+        self.assertEqual(respuesta.data['timbradas'], 2)
+
+        with self.assertNumQueries(0):
+            self.client.get('/api/facturacion/estadisticas/')
+
+        factura = Factura.objects.get(serie='B', folio=1)
+        factura.status = 'timbrada'
+        factura.save()
+
+        respuesta = self.client.get('/api/facturacion/estadisticas/')
+        self.assertEqual(respuesta.data['timbradas'], 3)
+
+    def test_cache_se_invalida_con_serie_y_update(self):
+        self.assertEqual(len(self.client.get('/api/facturacion/estadisticas/').data['por_serie']), 2)
+
+        factura = Factura.objects.get(serie='B', folio=1)
+        factura.serie = 'A'
+        factura.folio = 4
+        factura.save()
+        self.assertEqual(len(self.client.get('/api/facturacion/estadisticas/').data['por_serie']), 1)
+
+        # update() no dispara señales: quien lo hace invalida el modelo
+        Factura.objects.filter(folio=4).update(status='timbrada')
+        invalidar_modelos(Factura)
+        self.assertEqual(self.client.get('/api/facturacion/estadisticas/').data['timbradas'], 3)
+
+    def test_fecha_invalida(self):
+        respuesta = self.client.get('/api/facturacion/estadisticas/?fecha_inicio=2024-13-01')
+        self.assertEqual(respuesta.status_code, 400)
+
+
+class RespuestaFacturapiTests(TestCase):
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(username='admin', password='admin123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+        self.factura = crear_factura(1, status='timbrada')
+
+    def test_respuesta_comprimida_bajo_demanda(self):
+        datos = {'id': 'inv_123', 'uuid': 'ABC', 'items': [{'quantity': 1}] * 50}
+        respuesta = self.factura.guardar_respuesta_facturapi(datos)
+        self.assertLess(len(respuesta.contenido), len(str(datos)))
+
+        detalle = self.client.get(f'/api/facturacion/{self.factura.pk}/')
+        self.assertNotIn('facturapi_response', detalle.data)
+
+        respuesta = self.client.get(f'/api/facturacion/{self.factura.pk}/facturapi_response/')
+        self.assertEqual(respuesta.data, datos)
 
-# Create your tests here.
+    def test_respuesta_inexistente(self):
+        respuesta = self.client.get(f'/api/facturacion/{self.factura.pk}/facturapi_response/')
+        self.assertEqual(respuesta.status_code, 404)
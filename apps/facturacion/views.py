@@ -6,20 +6,27 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from django.conf import settings
-from .models import Factura, ConceptoFactura
+from django.utils import timezone
+from apps.core.fechas import filtrar_por_fechas, parsear_fecha, rango_dia
+from apps.core.listas_rapidas import ListaRapidaMixin
+from apps.core.presupuesto import presupuesto_consulta
+from apps.core.replicas import LecturaReplicaMixin
+from apps.monitoreo.metricas import FACTURAPI_SEGUNDOS, FACTURAS_TIMBRADAS
+from .models import Factura, ConceptoFactura, RespuestaFacturapi
+from .estadisticas import obtener_estadisticas
 from .serializers import (
-    FacturaSerializer, FacturaListSerializer, FacturaCreateSerializer,
+    FacturaSerializer, FacturaListSerializer, FacturaListaRapida, FacturaCreateSerializer,
     ConceptoFacturaSerializer
 )
 import requests
-from datetime import datetime
 
-class FacturaViewSet(viewsets.ModelViewSet):
-    queryset = Factura.objects.prefetch_related('conceptos').all()
+class FacturaViewSet(ListaRapidaMixin, LecturaReplicaMixin, viewsets.ModelViewSet):
+    queryset = Factura.objects.all()
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['status', 'serie']
     search_fields = ['folio_fiscal', 'cliente_nombre', 'cliente_rfc']
     ordering_fields = ['fecha_creacion', 'total']
+    lista_rapida = FacturaListaRapida
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -28,6 +35,19 @@ class FacturaViewSet(viewsets.ModelViewSet):
             return FacturaListSerializer
         return FacturaSerializer
     
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        
+        # Los conceptos y el usuario solo se usan en el detalle y al timbrar
+        if self.action in ['retrieve', 'update', 'partial_update', 'timbrar']:
+            queryset = queryset.select_related('usuario').prefetch_related('conceptos')
+        
+        # Filtrar por rango de fechas (días locales inclusivos)
+        if self.action == 'list':
+            queryset = filtrar_por_fechas(queryset, self.request.query_params, 'fecha_creacion')
+        
+        return queryset
+    
     @action(detail=True, methods=['post'])
     def timbrar(self, request, pk=None):
         """Timbrar factura usando Facturapi"""
@@ -75,24 +95,26 @@ class FacturaViewSet(viewsets.ModelViewSet):
         
         try:
             # Llamar a Facturapi
-            response = requests.post(
-                f"{settings.FACTURAPI_BASE_URL}/invoices",
-                json=data,
-                auth=(settings.FACTURAPI_SECRET_KEY, '')
-            )
+            with FACTURAPI_SEGUNDOS.labels('timbrar').time():
+                response = requests.post(
+                    f"{settings.FACTURAPI_BASE_URL}/invoices",
+                    json=data,
+                    auth=(settings.FACTURAPI_SECRET_KEY, '')
+                )
             
             if response.status_code == 201:
+                FACTURAS_TIMBRADAS.labels('timbrada').inc()
                 factura_data = response.json()
                 
                 # Actualizar factura
                 factura.status = 'timbrada'
                 factura.folio_fiscal = factura_data.get('uuid')
-                factura.fecha_timbrado = datetime.now()
+                factura.fecha_timbrado = timezone.now()
                 factura.xml_url = factura_data.get('xml_url')
                 factura.pdf_url = factura_data.get('pdf_url')
                 factura.facturapi_id = factura_data.get('id')
-                factura.facturapi_response = factura_data
                 factura.save()
+                factura.guardar_respuesta_facturapi(factura_data)
                 
                 return Response({
                     'status': 'Factura timbrada exitosamente',
@@ -101,12 +123,14 @@ class FacturaViewSet(viewsets.ModelViewSet):
                     'pdf_url': factura.pdf_url
                 })
             else:
+                FACTURAS_TIMBRADAS.labels('rechazada').inc()
                 return Response(
                     {'error': 'Error al timbrar', 'details': response.json()},
                     status=status.HTTP_400_BAD_REQUEST
                 )
         
         except Exception as e:
+            FACTURAS_TIMBRADAS.labels('error').inc()
             return Response(
                 {'error': f'Error de conexión: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -134,10 +158,11 @@ class FacturaViewSet(viewsets.ModelViewSet):
         try:
             # Cancelar en Facturapi
             if factura.facturapi_id and settings.FACTURAPI_SECRET_KEY:
-                response = requests.delete(
-                    f"{settings.FACTURAPI_BASE_URL}/invoices/{factura.facturapi_id}",
-                    auth=(settings.FACTURAPI_SECRET_KEY, '')
-                )
+                with FACTURAPI_SEGUNDOS.labels('cancelar').time():
+                    response = requests.delete(
+                        f"{settings.FACTURAPI_BASE_URL}/invoices/{factura.facturapi_id}",
+                        auth=(settings.FACTURAPI_SECRET_KEY, '')
+                    )
                 
                 if response.status_code not in [200, 204]:
                     return Response(
@@ -147,7 +172,7 @@ class FacturaViewSet(viewsets.ModelViewSet):
             
             # Actualizar factura
             factura.status = 'cancelada'
-            factura.fecha_cancelacion = datetime.now()
+            factura.fecha_cancelacion = timezone.now()
             factura.motivo_cancelacion = motivo
             factura.save()
             
@@ -185,19 +210,36 @@ class FacturaViewSet(viewsets.ModelViewSet):
         
         return Response({'pdf_url': factura.pdf_url})
     
+    @action(detail=True, methods=['get'])
+    def facturapi_response(self, request, pk=None):
+        """Respuesta completa de Facturapi, cargada solo bajo demanda"""
+        factura = self.get_object()
+        
+        try:
+            respuesta = RespuestaFacturapi.objects.get(factura=factura)
+        except RespuestaFacturapi.DoesNotExist:
+            return Response(
+                {'error': 'La factura no tiene respuesta de Facturapi'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        return Response(respuesta.datos)
+    
     @action(detail=False, methods=['get'])
+    @presupuesto_consulta()
     def estadisticas(self, request):
-        """Estadísticas de facturación"""
-        from django.db.models import Sum, Count
-        
-        stats = {
-            'total_facturas': self.queryset.count(),
-            'timbradas': self.queryset.filter(status='timbrada').count(),
-            'canceladas': self.queryset.filter(status='cancelada').count(),
-            'borradores': self.queryset.filter(status='borrador').count(),
-            'monto_total': self.queryset.filter(status='timbrada').aggregate(
-                total=Sum('total')
-            )['total'] or 0,
-        }
+        """Estadísticas de facturación por serie y mes"""
+        try:
+            fecha_inicio = request.query_params.get('fecha_inicio')
+            fecha_fin = request.query_params.get('fecha_fin')
+            if fecha_inicio:
+                fecha_inicio = rango_dia(parsear_fecha(fecha_inicio))[0]
+            if fecha_fin:
+                fecha_fin = rango_dia(parsear_fecha(fecha_fin))[1]
+        except ValueError:
+            return Response(
+                {'error': 'Las fechas deben tener el formato YYYY-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        return Response(stats)
\ No newline at end of file
+        return Response(obtener_estadisticas(fecha_inicio, fecha_fin))
\ No newline at end of file
@@ -9,8 +9,9 @@ class CategoriaAdmin(admin.ModelAdmin):
 
 @admin.register(Producto)
 class ProductoAdmin(admin.ModelAdmin):
-    list_display = ('codigo', 'nombre', 'categoria', 'stock', 'stock_minimo', 'precio_venta', 'activo')
-    list_filter = ('categoria', 'activo')
+    list_display = ('codigo', 'nombre', 'categoria', 'stock', 'stock_minimo', 'precio_venta',
+                    'clase_abc_ingresos', 'activo')
+    list_filter = ('categoria', 'activo', 'clase_abc_ingresos', 'clase_abc_margen', 'clase_abc_unidades')
     search_fields = ('codigo', 'nombre')
     list_editable = ('stock', 'precio_venta')
 
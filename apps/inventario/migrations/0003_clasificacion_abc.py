@@ -0,0 +1,33 @@
+# Generated by Django 5.1.3 on 2026-10-19 12:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='producto',
+            name='clase_abc_ingresos',
+            field=models.CharField(blank=True, choices=[('A', 'A'), ('B', 'B'), ('C', 'C')], max_length=1),
+        ),
+        migrations.AddField(
+            model_name='producto',
+            name='clase_abc_margen',
+            field=models.CharField(blank=True, choices=[('A', 'A'), ('B', 'B'), ('C', 'C')], max_length=1),
+        ),
+        migrations.AddField(
+            model_name='producto',
+            name='clase_abc_unidades',
+            field=models.CharField(blank=True, choices=[('A', 'A'), ('B', 'B'), ('C', 'C')], max_length=1),
+        ),
+        migrations.AddField(
+            model_name='producto',
+            name='fecha_clasificacion_abc',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.3 on 2026-10-19 18:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0003_clasificacion_abc'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='categoria',
+            name='ultima_actualizacion',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
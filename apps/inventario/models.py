@@ -7,6 +7,7 @@ class Categoria(models.Model):
     descripcion = models.TextField(blank=True)
     activo = models.BooleanField(default=True)
     fecha_creacion = models.DateTimeField(auto_now_add=True)
+    ultima_actualizacion = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'categorias'
@@ -18,6 +19,12 @@ class Categoria(models.Model):
         return self.nombre
 
 class Producto(models.Model):
+    CLASES_ABC = (
+        ('A', 'A'),
+        ('B', 'B'),
+        ('C', 'C'),
+    )
+    
     codigo = models.CharField(max_length=50, unique=True, db_index=True)
     nombre = models.CharField(max_length=200)
     descripcion = models.TextField(blank=True)
@@ -31,6 +38,12 @@ class Producto(models.Model):
     precio_costo = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(Decimal('0.01'))])
     precio_venta = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(Decimal('0.01'))])
     
+    # Clasificación ABC (la calcula apps.reportes.abc)
+    clase_abc_ingresos = models.CharField(max_length=1, choices=CLASES_ABC, blank=True)
+    clase_abc_margen = models.CharField(max_length=1, choices=CLASES_ABC, blank=True)
+    clase_abc_unidades = models.CharField(max_length=1, choices=CLASES_ABC, blank=True)
+    fecha_clasificacion_abc = models.DateTimeField(null=True, blank=True)
+    
     # Metadata
     imagen = models.ImageField(upload_to='productos/', blank=True, null=True)
     codigo_barras = models.CharField(max_length=50, blank=True, null=True)
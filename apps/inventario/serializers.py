@@ -1,12 +1,20 @@
+from django.db import transaction
 from rest_framework import serializers
+from apps.core.listas_rapidas import ListaRapida, nombre_completo
+from apps.monitoreo.metricas import STOCK_DESCONTADO
 from .models import Categoria, Producto, MovimientoInventario
 
 class CategoriaSerializer(serializers.ModelSerializer):
-    total_productos = serializers.IntegerField(source='productos.count', read_only=True)
+    total_productos = serializers.SerializerMethodField()
     
     class Meta:
         model = Categoria
         fields = '__all__'
+    
+    def get_total_productos(self, obj):
+        # CategoriaViewSet lo anota en el queryset; al crear o editar se cuenta
+        total = getattr(obj, 'total_productos', None)
+        return obj.productos.count() if total is None else total
 
 class ProductoSerializer(serializers.ModelSerializer):
     categoria_nombre = serializers.CharField(source='categoria.nombre', read_only=True)
@@ -16,6 +24,8 @@ class ProductoSerializer(serializers.ModelSerializer):
     class Meta:
         model = Producto
         fields = '__all__'
+        read_only_fields = ('clase_abc_ingresos', 'clase_abc_margen', 'clase_abc_unidades',
+                            'fecha_clasificacion_abc')
 
 class ProductoListSerializer(serializers.ModelSerializer):
     categoria_nombre = serializers.CharField(source='categoria.nombre', read_only=True)
@@ -28,6 +38,12 @@ class ProductoListSerializer(serializers.ModelSerializer):
                  'stock', 'stock_minimo', 'precio_costo', 'precio_venta', 
                  'stock_bajo', 'activo')
 
+class ProductoListaRapida(ListaRapida):
+    serializer_class = ProductoListSerializer
+    
+    def get_stock_bajo(self, fila):
+        return fila['stock'] <= fila['stock_minimo']
+
 class MovimientoInventarioSerializer(serializers.ModelSerializer):
     producto_nombre = serializers.CharField(source='producto.nombre', read_only=True)
     usuario_nombre = serializers.CharField(source='usuario.get_full_name', read_only=True)
@@ -37,6 +53,13 @@ class MovimientoInventarioSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ('stock_anterior', 'stock_nuevo', 'usuario', 'fecha')
 
+class MovimientoInventarioListaRapida(ListaRapida):
+    serializer_class = MovimientoInventarioSerializer
+    columnas_extra = ('usuario__first_name', 'usuario__last_name')
+    
+    def get_usuario_nombre(self, fila):
+        return nombre_completo(fila)
+
 class MovimientoInventarioCreateSerializer(serializers.ModelSerializer):
     # ✅ NUEVO: Soporte para precio_unitario en entradas
     precio_unitario = serializers.DecimalField(
@@ -95,5 +118,9 @@ class MovimientoInventarioCreateSerializer(serializers.ModelSerializer):
         validated_data['stock_nuevo'] = producto.stock
         validated_data['usuario'] = self.context['request'].user
         
+        if validated_data['stock_nuevo'] < validated_data['stock_anterior']:
+            descontado = validated_data['stock_anterior'] - validated_data['stock_nuevo']
+            transaction.on_commit(lambda: STOCK_DESCONTADO.labels(tipo).inc(descontado))
+        
         producto.save()
         return super().create(validated_data)
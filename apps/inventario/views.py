@@ -6,21 +6,26 @@ from django.db import models
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
 
+from apps.core.condicional import get_condicional
+from apps.core.listas_rapidas import ListaRapidaMixin
+from apps.core.replicas import LecturaReplicaMixin
 from .models import Categoria, Producto, MovimientoInventario
 from .serializers import (
     CategoriaSerializer,
     ProductoSerializer,
     ProductoListSerializer,
+    ProductoListaRapida,
     MovimientoInventarioSerializer,
+    MovimientoInventarioListaRapida,
     MovimientoInventarioCreateSerializer  # ✅ AGREGADO
 )
 
 
-class CategoriaViewSet(viewsets.ModelViewSet):
+class CategoriaViewSet(LecturaReplicaMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar categorías de productos
     """
-    queryset = Categoria.objects.all()
+    queryset = Categoria.objects.annotate(total_productos=models.Count('productos'))
     serializer_class = CategoriaSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
@@ -28,30 +33,45 @@ class CategoriaViewSet(viewsets.ModelViewSet):
     ordering_fields = ['nombre', 'fecha_creacion']
     ordering = ['nombre']
 
+    # total_productos cuenta todos los productos de la categoría
+    @get_condicional(lambda vista: [vista.filter_queryset(vista.get_queryset()), Producto.objects.all()])
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
-class ProductoViewSet(viewsets.ModelViewSet):
+
+class ProductoViewSet(ListaRapidaMixin, LecturaReplicaMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar productos
     """
     queryset = Producto.objects.select_related('categoria').filter(activo=True)
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['categoria', 'activo']
+    filterset_fields = ['categoria', 'activo', 'clase_abc_ingresos', 'clase_abc_margen', 'clase_abc_unidades']
     search_fields = ['nombre', 'codigo', 'descripcion']
     ordering_fields = ['nombre', 'codigo', 'precio_venta', 'stock', 'fecha_creacion']
     ordering = ['-fecha_creacion']
+    lista_rapida = ProductoListaRapida
 
     def get_serializer_class(self):
         if self.action == 'list':
             return ProductoListSerializer
         return ProductoSerializer
 
+    def productos_stock_bajo(self):
+        return self.queryset.filter(stock__lte=models.F('stock_minimo'))
+
+    # Los listados incluyen el nombre de la categoría
+    @get_condicional(lambda vista: [vista.filter_queryset(vista.get_queryset()), Categoria.objects.all()])
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
     @action(detail=False, methods=['get'])
+    @get_condicional(lambda vista: [vista.productos_stock_bajo(), Categoria.objects.all()])
     def stock_bajo(self, request):
         """
         Retorna productos con stock bajo (stock <= stock_minimo)
         """
-        productos = self.queryset.filter(stock__lte=models.F('stock_minimo'))
+        productos = self.productos_stock_bajo()
         serializer = self.get_serializer(productos, many=True)
         return Response(serializer.data)
 
@@ -126,7 +146,7 @@ class ProductoViewSet(viewsets.ModelViewSet):
         instance.save()
 
 
-class MovimientoInventarioViewSet(viewsets.ModelViewSet):
+class MovimientoInventarioViewSet(ListaRapidaMixin, LecturaReplicaMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar movimientos de inventario
     ✅ MEJORADO: Soporte para crear entradas con precio_unitario
@@ -137,6 +157,7 @@ class MovimientoInventarioViewSet(viewsets.ModelViewSet):
     filterset_fields = ['producto', 'tipo', 'usuario']
     ordering_fields = ['fecha', 'cantidad']
     ordering = ['-fecha']
+    lista_rapida = MovimientoInventarioListaRapida
 
     def get_serializer_class(self):
         """Usar serializer diferente para crear vs listar"""
@@ -0,0 +1,2 @@
+# apps/monitoreo/__init__.py
+default_app_config = 'apps.monitoreo.apps.MonitoreoConfig'
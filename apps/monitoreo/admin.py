@@ -0,0 +1,67 @@
+from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
+from .models import ConsultaLenta, PerfilPeticion
+
+@admin.register(PerfilPeticion)
+class PerfilPeticionAdmin(admin.ModelAdmin):
+    list_display = ('fecha', 'metodo', 'ruta', 'vista', 'status', 'duracion_ms', 'db_ms', 'num_consultas',
+                    'usuario', 'descargar')
+    list_filter = ('metodo', 'status', 'vista')
+    search_fields = ('ruta', 'vista')
+    date_hierarchy = 'fecha'
+    readonly_fields = ('fecha', 'usuario', 'metodo', 'ruta', 'vista', 'status', 'duracion_ms', 'db_ms',
+                       'num_consultas', 'consultas', 'descargar', 'resumen')
+    exclude = ('archivo',)
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def get_urls(self):
+        return [
+            path('<int:pk>/descargar/', self.admin_site.admin_view(self.descargar_perfil),
+                 name='monitoreo_perfilpeticion_descargar'),
+        ] + super().get_urls()
+    
+    @admin.display(description='Perfil')
+    def descargar(self, obj):
+        url = reverse('admin:monitoreo_perfilpeticion_descargar', args=[obj.pk])
+        return format_html('<a href="{}">Descargar .prof</a>', url)
+    
+    def descargar_perfil(self, request, pk):
+        perfil = get_object_or_404(PerfilPeticion, pk=pk)
+        if not self.has_view_permission(request, perfil):
+            raise PermissionDenied
+        return FileResponse(perfil.archivo.open('rb'), as_attachment=True, filename=f'perfil_{perfil.pk}.prof')
+
+
+@admin.register(ConsultaLenta)
+class ConsultaLentaAdmin(admin.ModelAdmin):
+    list_display = ('vista', 'huella_corta', 'veces', 'tiempo_total_ms', 'promedio_ms', 'tiempo_max_ms',
+                    'escaneo_secuencial', 'ultima_vez')
+    list_filter = ('escaneo_secuencial', 'vista')
+    search_fields = ('huella', 'vista')
+    ordering = ('-tiempo_total_ms',)
+    readonly_fields = ('vista', 'huella', 'veces', 'tiempo_total_ms', 'promedio_ms', 'tiempo_max_ms',
+                       'ejemplo', 'parametros', 'plan', 'escaneo_secuencial', 'primera_vez', 'ultima_vez')
+    exclude = ('clave',)
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    @admin.display(description='Consulta')
+    def huella_corta(self, obj):
+        return obj.huella[:120]
+    
+    @admin.display(description='Promedio (ms)')
+    def promedio_ms(self, obj):
+        return round(obj.tiempo_promedio_ms, 1)
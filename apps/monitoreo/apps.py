@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+class MonitoreoConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.monitoreo'
+    verbose_name = 'Monitoreo'
+    
+    def ready(self):
+        import apps.monitoreo.signals
@@ -0,0 +1,83 @@
+"""
+Registro de las consultas SQL de una petición.
+
+RegistroConsultas se instala con `connection.execute_wrapper` y cuenta las
+consultas, su tiempo y cuántas veces se repite cada forma (huella) de
+consulta: la misma sentencia con distintos parámetros ejecutada muchas veces
+en una petición es la señal de un N+1.
+"""
+import re
+from collections import Counter
+from functools import lru_cache
+from time import perf_counter
+
+_CADENAS = re.compile(r"'(?:[^']|'')*'")
+_NUMEROS = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PARAMETROS = re.compile(r'%s|\?')
+_LISTAS = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_ESPACIOS = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=2048)
+def huella(sql):
+    """Forma de la consulta: literales y parámetros como ?, listas IN como (...)"""
+    sql = _CADENAS.sub('?', sql)
+    sql = _NUMEROS.sub('?', sql)
+    sql = _PARAMETROS.sub('?', sql)
+    sql = _LISTAS.sub('(...)', sql)
+    return _ESPACIOS.sub(' ', sql).strip()
+
+
+class TiempoConsultas:
+    """execute_wrapper mínimo: solo acumula el tiempo de las consultas"""
+
+    def __init__(self):
+        self.tiempo = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.tiempo += perf_counter() - inicio
+
+
+class RegistroConsultas:
+    """execute_wrapper que acumula consultas, tiempo y repeticiones por huella"""
+
+    def __init__(self):
+        self.total = 0
+        self.tiempo = 0.0
+        self.por_huella = Counter()
+        self.tiempo_por_huella = Counter()
+        self.ejemplos = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracion = perf_counter() - inicio
+            self.tiempo += duracion
+            self.total += 1
+            forma = huella(sql)
+            self.por_huella[forma] += 1
+            self.tiempo_por_huella[forma] += duracion
+            if forma not in self.ejemplos:
+                self.ejemplos[forma] = (sql, params)
+
+    def repetidas(self, umbral):
+        """[(huella, veces)] de las consultas que se repiten `umbral` veces o más"""
+        return [(forma, veces) for forma, veces in self.por_huella.most_common() if veces >= umbral]
+
+    def mas_costosas(self, limite=20):
+        """Las formas de consulta que más tiempo tomaron, con sus repeticiones y un ejemplo"""
+        return [
+            {
+                'huella': forma,
+                'veces': self.por_huella[forma],
+                'ms': round(tiempo * 1000, 3),
+                'ejemplo': self.ejemplos[forma][0][:1000],
+            }
+            for forma, tiempo in self.tiempo_por_huella.most_common(limite)
+        ]
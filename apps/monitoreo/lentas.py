@@ -0,0 +1,117 @@
+"""
+Captura de consultas lentas.
+
+ConsultasLentasMiddleware instala un CapturaConsultasLentas en todas las
+conexiones; las sentencias que tardan MONITOREO_CONSULTA_LENTA_MS o más se
+guardan al terminar la petición en ConsultaLenta, agregadas por huella y
+vista: veces, tiempo total y máximo, y un ejemplo con sus parámetros.
+
+La primera vez que aparece una forma de SELECT se adjunta su plan (EXPLAIN en
+PostgreSQL, EXPLAIN QUERY PLAN en SQLite) y se marca si recorre una tabla
+completa, que suele ser un índice faltante. El comando `consultas_lentas` y
+el admin muestran las peores.
+"""
+import hashlib
+import logging
+from time import perf_counter
+
+from django.db import DatabaseError, IntegrityError, connections, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .consultas import huella
+from .models import ConsultaLenta
+
+logger = logging.getLogger(__name__)
+
+
+class CapturaConsultasLentas:
+    """execute_wrapper que guarda las sentencias que pasan del umbral"""
+
+    def __init__(self, umbral_ms):
+        self.umbral = umbral_ms / 1000
+        self.lentas = []
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracion = perf_counter() - inicio
+            if duracion >= self.umbral:
+                self.lentas.append((context['connection'].alias, sql, None if many else params, duracion))
+
+
+def clave(forma, vista):
+    return hashlib.sha1(f'{vista}\n{forma}'.encode()).hexdigest()
+
+
+def _parametros_json(params):
+    if params is None:
+        return None
+    return [valor if isinstance(valor, (int, float, bool, type(None))) else str(valor) for valor in params]
+
+
+def explicar(alias, sql, params):
+    """Plan de una SELECT y si recorre alguna tabla completa; ('', False) si no aplica"""
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return '', False
+    conexion = connections[alias]
+    if conexion.vendor == 'postgresql':
+        prefijo, recorre = 'EXPLAIN ', lambda linea: 'Seq Scan' in linea
+    elif conexion.vendor == 'sqlite':
+        prefijo, recorre = 'EXPLAIN QUERY PLAN ', lambda linea: linea.split()[0] == 'SCAN'
+    else:
+        return '', False
+
+    with transaction.atomic(using=alias):
+        with conexion.cursor() as cursor:
+            cursor.execute(prefijo + sql, params)
+            filas = cursor.fetchall()
+    # PostgreSQL regresa una columna con cada línea; SQLite (id, padre, _, detalle)
+    lineas = [str(fila[-1]) for fila in filas]
+    return '\n'.join(lineas), any(recorre(linea) for linea in lineas)
+
+
+def registrar(alias, sql, params, duracion, vista):
+    """Suma la ejecución a su ConsultaLenta; la crea, con su plan, si es la primera"""
+    forma = huella(sql)
+    llave = clave(forma, vista)
+    ms = duracion * 1000
+    ahora = timezone.now()
+
+    actualizadas = ConsultaLenta.objects.filter(clave=llave).update(
+        veces=F('veces') + 1,
+        tiempo_total_ms=F('tiempo_total_ms') + ms,
+        tiempo_max_ms=Greatest('tiempo_max_ms', ms),
+        ultima_vez=ahora,
+    )
+    if actualizadas:
+        return
+
+    try:
+        plan, secuencial = explicar(alias, sql, params)
+    except DatabaseError:
+        logger.warning('No se pudo obtener el plan de %s', forma[:200], exc_info=True)
+        plan, secuencial = '', False
+
+    try:
+        with transaction.atomic():
+            ConsultaLenta.objects.create(
+                clave=llave, huella=forma, vista=vista, veces=1,
+                tiempo_total_ms=ms, tiempo_max_ms=ms, ejemplo=sql, parametros=_parametros_json(params),
+                plan=plan, escaneo_secuencial=secuencial, primera_vez=ahora, ultima_vez=ahora,
+            )
+    except IntegrityError:
+        # Otro proceso la creó al mismo tiempo
+        registrar(alias, sql, params, duracion, vista)
+
+
+def registrar_lentas(captura, vista):
+    """Guarda las consultas lentas de una petición sin dejar que un error la afecte"""
+    for alias, sql, params, duracion in captura.lentas:
+        try:
+            registrar(alias, sql, params, duracion, vista)
+        except DatabaseError:
+            logger.exception('No se pudo registrar una consulta lenta en %s', vista)
@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand
+from django.db.models import ExpressionWrapper, F, FloatField
+
+from apps.monitoreo.models import ConsultaLenta
+
+ORDENES = {
+    'total': '-tiempo_total_ms',
+    'max': '-tiempo_max_ms',
+    'veces': '-veces',
+    'promedio': '-promedio',
+}
+
+
+class Command(BaseCommand):
+    help = 'Lista las consultas lentas registradas, de la más costosa a la menos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orden', choices=ORDENES, default='total',
+                            help='Tiempo total (default), máximo, promedio o número de veces')
+        parser.add_argument('--limite', type=int, default=20)
+        parser.add_argument('--vista', help='Solo las de vistas que contienen este texto')
+        parser.add_argument('--secuenciales', action='store_true',
+                            help='Solo las que recorren una tabla completa (posible índice faltante)')
+        parser.add_argument('--plan', action='store_true', help='Muestra el plan y un ejemplo de cada una')
+        parser.add_argument('--reiniciar', action='store_true', help='Borra el registro y termina')
+
+    def handle(self, *args, **options):
+        if options['reiniciar']:
+            borradas, _ = ConsultaLenta.objects.all().delete()
+            self.stdout.write(self.style.SUCCESS(f'{borradas} consultas lentas borradas'))
+            return
+
+        consultas = ConsultaLenta.objects.annotate(
+            promedio=ExpressionWrapper(F('tiempo_total_ms') / F('veces'), output_field=FloatField())
+        )
+        if options['vista']:
+            consultas = consultas.filter(vista__icontains=options['vista'])
+        if options['secuenciales']:
+            consultas = consultas.filter(escaneo_secuencial=True)
+        consultas = consultas.order_by(ORDENES[options['orden']])[:options['limite']]
+
+        if not consultas:
+            self.stdout.write('No hay consultas lentas registradas')
+            return
+
+        for consulta in consultas:
+            marca = self.style.WARNING(' [recorre tabla completa]') if consulta.escaneo_secuencial else ''
+            self.stdout.write(
+                f'{consulta.tiempo_total_ms:10.1f} ms  {consulta.veces:6d}×  '
+                f'prom {consulta.tiempo_promedio_ms:8.1f}  max {consulta.tiempo_max_ms:8.1f}  '
+                f'{consulta.vista}{marca}'
+            )
+            self.stdout.write(f'    {consulta.huella[:300]}')
+            if options['plan']:
+                self.stdout.write(f'    Ejemplo: {consulta.ejemplo}')
+                self.stdout.write(f'    Parámetros: {consulta.parametros}')
+                for linea in (consulta.plan or '(sin plan)').splitlines():
+                    self.stdout.write(f'      {linea}')
@@ -0,0 +1,75 @@
+"""
+Métricas de Prometheus.
+
+Con varios workers de gunicorn cada proceso lleva sus propios contadores; si
+PROMETHEUS_MULTIPROC_DIR está definido (settings lo exporta antes de que se
+importe prometheus_client) cada proceso escribe sus valores en archivos de ese
+directorio y el endpoint de métricas los suma todos. gunicorn.conf.py limpia
+los archivos de los workers que terminan.
+"""
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest,
+    multiprocess,
+)
+
+BUCKETS_PETICION = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+PETICION_SEGUNDOS = Histogram(
+    'localito_peticion_segundos', 'Latencia de las peticiones por vista y acción',
+    ['vista', 'accion', 'metodo'], buckets=BUCKETS_PETICION,
+)
+PETICION_DB_SEGUNDOS = Histogram(
+    'localito_peticion_db_segundos', 'Tiempo en la base de datos por petición',
+    ['vista', 'accion', 'metodo'], buckets=BUCKETS_PETICION,
+)
+PETICIONES = Counter(
+    'localito_peticiones_total', 'Peticiones por vista, acción y código de estado',
+    ['vista', 'accion', 'metodo', 'status'],
+)
+PETICIONES_EN_CURSO = Gauge(
+    'localito_peticiones_en_curso', 'Peticiones que se están atendiendo',
+    multiprocess_mode='livesum',
+)
+
+VENTAS_CREADAS = Counter('localito_ventas_creadas_total', 'Ventas registradas', ['metodo_pago'])
+STOCK_DESCONTADO = Counter(
+    'localito_stock_descontado_unidades_total', 'Unidades descontadas del inventario', ['origen'],
+)
+FACTURAS_TIMBRADAS = Counter('localito_facturas_timbradas_total', 'Intentos de timbrado', ['resultado'])
+CACHE_CONSULTAS = Counter(
+    'localito_cache_consultas_total', 'Aciertos y fallos de la caché por espacio', ['espacio', 'resultado'],
+)
+FACTURAPI_SEGUNDOS = Histogram(
+    'localito_facturapi_segundos', 'Latencia de las llamadas a Facturapi', ['operacion'],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 30),
+)
+
+
+def registro():
+    """Registro a exponer: el de todos los workers en modo multiproceso, o el del proceso"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registro_multiproceso = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registro_multiproceso)
+        return registro_multiproceso
+    return REGISTRY
+
+
+def exposicion():
+    """Contenido y content type del formato de texto de Prometheus"""
+    return generate_latest(registro()), CONTENT_TYPE_LATEST
+
+
+def etiquetas_vista(request):
+    """(vista, acción) de la petición: clase del ViewSet y acción de DRF, o la ruta de Django"""
+    resolver_match = getattr(request, 'resolver_match', None)
+    if resolver_match is None:
+        # Sin ruta (404): una sola serie para no crear una por URL
+        return 'sin_ruta', ''
+    vista = resolver_match.func
+    clase = getattr(vista, 'cls', None)
+    if clase is None:
+        return resolver_match.view_name or resolver_match._func_path, ''
+    acciones = getattr(vista, 'actions', None) or {}
+    return clase.__name__, acciones.get(request.method.lower(), request.method.lower())
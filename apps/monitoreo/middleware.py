@@ -0,0 +1,161 @@
+"""
+Middlewares de métricas e instrumentación SQL por petición.
+
+MetricasMiddleware registra en Prometheus (apps.monitoreo.metricas) la
+latencia, el tiempo de base de datos y el código de estado de cada petición
+por vista y acción, y las peticiones en curso.
+
+ConsultasLentasMiddleware guarda las consultas que pasan de
+MONITOREO_CONSULTA_LENTA_MS con la vista que las hizo (ver
+apps.monitoreo.lentas).
+
+PerfiladorMiddleware perfila con cProfile las peticiones que un
+administrador marca (ver apps.monitoreo.perfilador).
+
+InstrumentacionSQLMiddleware, en una fracción MONITOREO_SQL_MUESTREO de las
+peticiones, instala un RegistroConsultas en todas las conexiones y agrega a
+la respuesta un encabezado Server-Timing con el tiempo y el número de
+consultas (visible en la pestaña de red del navegador). Si una misma forma de
+consulta se repite MONITOREO_N_MAS_UNO_UMBRAL veces o más registra un aviso
+con el endpoint y un ejemplo, como mucho una vez cada
+MONITOREO_N_MAS_UNO_INTERVALO segundos por endpoint y consulta. Las
+peticiones fuera de la muestra solo pagan un número aleatorio.
+"""
+import logging
+import random
+import threading
+from contextlib import ExitStack
+from time import monotonic, perf_counter
+
+from django.conf import settings
+from django.db import connections
+
+from . import lentas, metricas, perfilador
+from .consultas import RegistroConsultas, TiempoConsultas
+
+logger = logging.getLogger(__name__)
+
+_avisos = {}
+_candado = threading.Lock()
+
+
+def endpoint(request):
+    """Nombre estable del endpoint (sin ids): nombre de la ruta o, si no hay, la ruta"""
+    resolver_match = getattr(request, 'resolver_match', None)
+    if resolver_match is not None and resolver_match.view_name:
+        return f'{request.method} {resolver_match.view_name}'
+    return f'{request.method} {request.path}'
+
+
+def _debe_avisar(clave):
+    ahora = monotonic()
+    with _candado:
+        if _avisos.get(clave, 0) > ahora:
+            return False
+        _avisos[clave] = ahora + settings.MONITOREO_N_MAS_UNO_INTERVALO
+        return True
+
+
+class MetricasMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.MONITOREO_METRICAS:
+            return self.get_response(request)
+
+        tiempo_db = TiempoConsultas()
+        metricas.PETICIONES_EN_CURSO.inc()
+        inicio = perf_counter()
+        try:
+            with ExitStack() as pila:
+                for conexion in connections.all():
+                    pila.enter_context(conexion.execute_wrapper(tiempo_db))
+                response = self.get_response(request)
+        finally:
+            metricas.PETICIONES_EN_CURSO.dec()
+        duracion = perf_counter() - inicio
+
+        vista, accion = metricas.etiquetas_vista(request)
+        metricas.PETICION_SEGUNDOS.labels(vista, accion, request.method).observe(duracion)
+        metricas.PETICION_DB_SEGUNDOS.labels(vista, accion, request.method).observe(tiempo_db.tiempo)
+        metricas.PETICIONES.labels(vista, accion, request.method, str(response.status_code)).inc()
+        return response
+
+
+class InstrumentacionSQLMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        muestreo = settings.MONITOREO_SQL_MUESTREO
+        if muestreo <= 0 or (muestreo < 1 and random.random() >= muestreo):
+            return self.get_response(request)
+
+        registro = RegistroConsultas()
+        inicio = perf_counter()
+        with ExitStack() as pila:
+            for conexion in connections.all():
+                pila.enter_context(conexion.execute_wrapper(registro))
+            response = self.get_response(request)
+        duracion = perf_counter() - inicio
+
+        # Para los middlewares y vistas que quieran reportar el tiempo de base de datos
+        request.consultas_sql = registro
+
+        metricas = (
+            f'db;dur={registro.tiempo * 1000:.1f};desc="{registro.total} consultas", '
+            f'app;dur={(duracion - registro.tiempo) * 1000:.1f}'
+        )
+        if response.has_header('Server-Timing'):
+            metricas = f"{response['Server-Timing']}, {metricas}"
+        response['Server-Timing'] = metricas
+
+        self.avisar_repetidas(request, registro)
+        return response
+
+    def avisar_repetidas(self, request, registro):
+        nombre = endpoint(request)
+        for forma, veces in registro.repetidas(settings.MONITOREO_N_MAS_UNO_UMBRAL):
+            if not _debe_avisar((nombre, forma)):
+                continue
+            sql, params = registro.ejemplos[forma]
+            logger.warning(
+                'Posible N+1 en %s: %d consultas con la misma forma (%d en total). Ejemplo: %s; params=%r',
+                nombre, veces, registro.total, sql[:500], params,
+            )
+
+
+class ConsultasLentasMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        umbral = settings.MONITOREO_CONSULTA_LENTA_MS
+        if umbral <= 0:
+            return self.get_response(request)
+
+        captura = lentas.CapturaConsultasLentas(umbral)
+        with ExitStack() as pila:
+            for conexion in connections.all():
+                pila.enter_context(conexion.execute_wrapper(captura))
+            response = self.get_response(request)
+
+        if captura.lentas:
+            vista, accion = metricas.etiquetas_vista(request)
+            lentas.registrar_lentas(captura, f'{vista}.{accion}' if accion else vista)
+        return response
+
+
+class PerfiladorMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.MONITOREO_PERFILADOR or not perfilador.solicitado(request):
+            return self.get_response(request)
+
+        usuario = perfilador.usuario_staff(request)
+        if usuario is None:
+            return self.get_response(request)
+        return perfilador.perfilar(request, self.get_response, usuario)
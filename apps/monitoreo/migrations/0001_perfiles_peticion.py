@@ -0,0 +1,41 @@
+# Generated by Django 5.1.3 on 2026-10-19 12:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PerfilPeticion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('metodo', models.CharField(max_length=10)),
+                ('ruta', models.CharField(max_length=500)),
+                ('vista', models.CharField(blank=True, max_length=200)),
+                ('status', models.PositiveSmallIntegerField()),
+                ('duracion_ms', models.FloatField()),
+                ('db_ms', models.FloatField()),
+                ('num_consultas', models.PositiveIntegerField()),
+                ('consultas', models.JSONField(default=list)),
+                ('archivo', models.FileField(upload_to='perfiles/')),
+                ('resumen', models.TextField(blank=True)),
+                ('usuario', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='perfiles', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Perfil de petición',
+                'verbose_name_plural': 'Perfiles de peticiones',
+                'db_table': 'perfiles_peticion',
+                'ordering': ['-fecha'],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.3 on 2026-10-19 12:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoreo', '0001_perfiles_peticion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConsultaLenta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(max_length=40, unique=True)),
+                ('huella', models.TextField()),
+                ('vista', models.CharField(max_length=200)),
+                ('veces', models.PositiveIntegerField(default=0)),
+                ('tiempo_total_ms', models.FloatField(default=0)),
+                ('tiempo_max_ms', models.FloatField(default=0)),
+                ('ejemplo', models.TextField()),
+                ('parametros', models.JSONField(blank=True, null=True)),
+                ('plan', models.TextField(blank=True)),
+                ('escaneo_secuencial', models.BooleanField(default=False, help_text='El plan recorre alguna tabla completa')),
+                ('primera_vez', models.DateTimeField()),
+                ('ultima_vez', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Consulta lenta',
+                'verbose_name_plural': 'Consultas lentas',
+                'db_table': 'consultas_lentas',
+                'ordering': ['-tiempo_total_ms'],
+            },
+        ),
+    ]
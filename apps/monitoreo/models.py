@@ -0,0 +1,63 @@
+from django.db import models
+from apps.usuarios.models import Usuario
+
+class PerfilPeticion(models.Model):
+    """Perfil de cProfile de una petición, pedido por un administrador"""
+    fecha = models.DateTimeField(auto_now_add=True, db_index=True)
+    usuario = models.ForeignKey(Usuario, on_delete=models.SET_NULL, null=True, related_name='perfiles')
+    
+    metodo = models.CharField(max_length=10)
+    ruta = models.CharField(max_length=500)
+    vista = models.CharField(max_length=200, blank=True)
+    status = models.PositiveSmallIntegerField()
+    
+    duracion_ms = models.FloatField()
+    db_ms = models.FloatField()
+    num_consultas = models.PositiveIntegerField()
+    # Formas de consulta más costosas: huella, veces, ms y un ejemplo
+    consultas = models.JSONField(default=list)
+    
+    # Estadísticas de cProfile en formato pstats (snakeviz, flameprof, pstats)
+    archivo = models.FileField(upload_to='perfiles/')
+    resumen = models.TextField(blank=True)
+    
+    class Meta:
+        db_table = 'perfiles_peticion'
+        verbose_name = 'Perfil de petición'
+        verbose_name_plural = 'Perfiles de peticiones'
+        ordering = ['-fecha']
+    
+    def __str__(self):
+        return f"{self.metodo} {self.ruta} ({self.duracion_ms:.0f} ms)"
+
+class ConsultaLenta(models.Model):
+    """Consultas que pasan de MONITOREO_CONSULTA_LENTA_MS, agregadas por huella y vista"""
+    clave = models.CharField(max_length=40, unique=True)
+    huella = models.TextField()
+    vista = models.CharField(max_length=200)
+    
+    veces = models.PositiveIntegerField(default=0)
+    tiempo_total_ms = models.FloatField(default=0)
+    tiempo_max_ms = models.FloatField(default=0)
+    
+    # Primera ejecución lenta: SQL, parámetros y plan
+    ejemplo = models.TextField()
+    parametros = models.JSONField(null=True, blank=True)
+    plan = models.TextField(blank=True)
+    escaneo_secuencial = models.BooleanField(default=False, help_text='El plan recorre alguna tabla completa')
+    
+    primera_vez = models.DateTimeField()
+    ultima_vez = models.DateTimeField(db_index=True)
+    
+    class Meta:
+        db_table = 'consultas_lentas'
+        verbose_name = 'Consulta lenta'
+        verbose_name_plural = 'Consultas lentas'
+        ordering = ['-tiempo_total_ms']
+    
+    def __str__(self):
+        return f"{self.vista}: {self.huella[:80]}"
+    
+    @property
+    def tiempo_promedio_ms(self):
+        return self.tiempo_total_ms / self.veces if self.veces else 0
@@ -0,0 +1,110 @@
+"""
+Perfilador de peticiones bajo demanda.
+
+Un administrador agrega el encabezado `X-Perfilar: 1` o el parámetro
+`?perfilar=1` y la petición corre bajo cProfile con un RegistroConsultas en
+todas las conexiones. El resultado se guarda en PerfilPeticion: archivo
+pstats (se abre con snakeviz o flameprof para verlo como flame graph),
+resumen por tiempo acumulado y las consultas más costosas. La respuesta
+lleva `X-Perfil` con el id del perfil, que se descarga desde el admin.
+
+Sin el encabezado ni el parámetro el middleware solo revisa dos cadenas. Si
+quien lo pide no es staff la petición se atiende normal, sin perfilar.
+"""
+import cProfile
+import io
+import marshal
+import pstats
+from contextlib import ExitStack
+from time import perf_counter
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+
+from apps.usuarios.autenticacion import JWTClaimsAuthentication
+from .consultas import RegistroConsultas
+from .metricas import etiquetas_vista
+from .models import PerfilPeticion
+
+ENCABEZADO = 'HTTP_X_PERFILAR'
+PARAMETRO = 'perfilar'
+
+LINEAS_RESUMEN = 60
+
+
+def solicitado(request):
+    if request.META.get(ENCABEZADO):
+        return True
+    return PARAMETRO in request.META.get('QUERY_STRING', '') and bool(request.GET.get(PARAMETRO))
+
+
+def usuario_staff(request):
+    """Usuario staff de la sesión de Django o del token JWT, o None"""
+    usuario = getattr(request, 'user', None)
+    if usuario is not None and usuario.is_authenticated:
+        return usuario if usuario.is_staff else None
+    try:
+        autenticado = JWTClaimsAuthentication().authenticate(Request(request))
+    except APIException:
+        return None
+    if autenticado is not None and autenticado[0].is_staff:
+        return autenticado[0]
+    return None
+
+
+def perfilar(request, get_response, usuario):
+    """Atiende la petición bajo cProfile y guarda el PerfilPeticion"""
+    registro = RegistroConsultas()
+    perfil = cProfile.Profile()
+    inicio = perf_counter()
+    with ExitStack() as pila:
+        for conexion in connections.all():
+            pila.enter_context(conexion.execute_wrapper(registro))
+        perfil.enable()
+        try:
+            response = get_response(request)
+        finally:
+            perfil.disable()
+    duracion = perf_counter() - inicio
+
+    guardado = guardar_perfil(request, response, usuario, perfil, registro, duracion)
+    response['X-Perfil'] = str(guardado.pk)
+    return response
+
+
+def guardar_perfil(request, response, usuario, perfil, registro, duracion):
+    estadisticas = pstats.Stats(perfil)
+    resumen = io.StringIO()
+    estadisticas.stream = resumen
+    estadisticas.sort_stats('cumulative').print_stats(LINEAS_RESUMEN)
+
+    vista, accion = etiquetas_vista(request)
+    guardado = PerfilPeticion(
+        usuario_id=usuario.pk,
+        metodo=request.method,
+        ruta=request.get_full_path()[:500],
+        vista=f'{vista}.{accion}' if accion else vista,
+        status=response.status_code,
+        duracion_ms=round(duracion * 1000, 3),
+        db_ms=round(registro.tiempo * 1000, 3),
+        num_consultas=registro.total,
+        consultas=registro.mas_costosas(),
+        resumen=resumen.getvalue(),
+    )
+    # Mismo formato que Profile.dump_stats
+    guardado.archivo.save('perfil.prof', ContentFile(marshal.dumps(estadisticas.stats)), save=False)
+    guardado.save()
+
+    depurar_perfiles()
+    return guardado
+
+
+def depurar_perfiles(maximo=None):
+    """Conserva solo los `maximo` perfiles más recientes (MONITOREO_PERFILES_MAXIMO)"""
+    maximo = settings.MONITOREO_PERFILES_MAXIMO if maximo is None else maximo
+    for perfil in PerfilPeticion.objects.order_by('-fecha', '-id')[maximo:]:
+        perfil.archivo.delete(save=False)
+        perfil.delete()
@@ -0,0 +1,15 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from apps.ventas.models import Venta
+from .metricas import VENTAS_CREADAS
+
+@receiver(post_save, sender=Venta)
+def venta_creada(sender, instance, created, **kwargs):
+    """
+    Cuenta las ventas registradas por método de pago, al confirmarse la transacción
+    """
+    if created:
+        metodo_pago = instance.metodo_pago
+        transaction.on_commit(lambda: VENTAS_CREADAS.labels(metodo_pago).inc())
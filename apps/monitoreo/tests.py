@@ -0,0 +1,236 @@
+import marshal
+import tempfile
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from prometheus_client import REGISTRY
+from rest_framework.test import APIClient
+
+from apps.inventario.models import Categoria, Producto
+from apps.usuarios.models import Usuario
+from . import lentas, middleware
+from .consultas import huella
+from .models import ConsultaLenta, PerfilPeticion
+
+
+class HuellaTests(TestCase):
+    def test_misma_forma_con_distintos_parametros(self):
+        self.assertEqual(
+            huella('SELECT * FROM "productos" WHERE "id" = %s'),
+            huella('SELECT *  FROM "productos"\nWHERE "id" = 42'),
+        )
+        self.assertEqual(
+            huella("SELECT * FROM t WHERE a IN (%s, %s, %s) AND b = 'x'"),
+            'SELECT * FROM t WHERE a IN (...) AND b = ?',
+        )
+
+
+@override_settings(MONITOREO_SQL_MUESTREO=1.0, MONITOREO_N_MAS_UNO_UMBRAL=3)
+class InstrumentacionSQLTests(TestCase):
+    def setUp(self):
+        middleware._avisos.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(Usuario.objects.create_user(username='admin', password='admin12345'))
+
+    def test_server_timing(self):
+        respuesta = self.client.get('/api/inventario/productos/')
+        self.assertRegex(respuesta['Server-Timing'], r'db;dur=[\d.]+;desc="\d+ consultas", app;dur=[\d.]+')
+
+    @override_settings(MONITOREO_SQL_MUESTREO=0)
+    def test_sin_muestreo(self):
+        respuesta = self.client.get('/api/inventario/productos/')
+        self.assertFalse(respuesta.has_header('Server-Timing'))
+
+    def test_avisa_consultas_repetidas(self):
+        categoria = Categoria.objects.create(nombre='Abarrotes')
+        for i in range(4):
+            Producto.objects.create(
+                codigo=f'P-{i}', nombre=f'Producto {i}', categoria=categoria,
+                precio_costo=Decimal('10.00'), precio_venta=Decimal('15.00'),
+            )
+
+        def vista(request):
+            # Sin select_related: una consulta de categoría por producto
+            return HttpResponse(', '.join(p.categoria.nombre for p in Producto.objects.all()))
+
+        instrumentada = middleware.InstrumentacionSQLMiddleware(vista)
+        with self.assertLogs('apps.monitoreo.middleware', 'WARNING') as logs:
+            respuesta = instrumentada(RequestFactory().get('/productos/'))
+        self.assertIn('5 consultas', respuesta['Server-Timing'])
+        self.assertIn('Posible N+1 en GET /productos/: 4 consultas', logs.output[0])
+
+        # El mismo aviso no se repite dentro del intervalo
+        with self.assertNoLogs('apps.monitoreo.middleware', 'WARNING'):
+            instrumentada(RequestFactory().get('/productos/'))
+
+    def test_categorias_sin_n_mas_uno(self):
+        for i in range(4):
+            categoria = Categoria.objects.create(nombre=f'Categoría {i}')
+            Producto.objects.create(
+                codigo=f'P-{i}', nombre=f'Producto {i}', categoria=categoria,
+                precio_costo=Decimal('10.00'), precio_venta=Decimal('15.00'),
+            )
+
+        with self.assertNoLogs('apps.monitoreo.middleware', 'WARNING'):
+            respuesta = self.client.get('/api/inventario/categorias/')
+        self.assertEqual(respuesta.data['results'][0]['total_productos'], 1)
+
+
+class MetricasTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(Usuario.objects.create_user(username='admin', password='admin12345'))
+
+    def valor(self, nombre, **etiquetas):
+        return REGISTRY.get_sample_value(nombre, etiquetas) or 0
+
+    def test_latencia_por_vista_y_accion(self):
+        etiquetas = {'vista': 'VentaViewSet', 'accion': 'notificaciones', 'metodo': 'GET'}
+        antes = self.valor('localito_peticion_segundos_count', **etiquetas)
+        ok = self.valor('localito_peticiones_total', status='200', **etiquetas)
+
+        self.client.get('/api/ventas/notificaciones/')
+
+        self.assertEqual(self.valor('localito_peticion_segundos_count', **etiquetas), antes + 1)
+        self.assertEqual(self.valor('localito_peticion_db_segundos_count', **etiquetas), antes + 1)
+        self.assertEqual(self.valor('localito_peticiones_total', status='200', **etiquetas), ok + 1)
+
+    def test_contadores_de_dominio(self):
+        categoria = Categoria.objects.create(nombre='Abarrotes')
+        producto = Producto.objects.create(
+            codigo='P-1', nombre='Arroz', categoria=categoria, stock=10,
+            precio_costo=Decimal('10.00'), precio_venta=Decimal('15.00'),
+        )
+        ventas = self.valor('localito_ventas_creadas_total', metodo_pago='efectivo')
+        unidades = self.valor('localito_stock_descontado_unidades_total', origen='venta')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/ventas/', {
+                'metodo_pago': 'efectivo',
+                'detalles': [{'producto': producto.pk, 'cantidad': 3, 'precio_unitario': '15.00'}],
+            }, format='json')
+
+        self.assertEqual(self.valor('localito_ventas_creadas_total', metodo_pago='efectivo'), ventas + 1)
+        self.assertEqual(self.valor('localito_stock_descontado_unidades_total', origen='venta'), unidades + 3)
+
+        # Una venta revertida no cuenta
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.client.post('/api/ventas/', {
+                    'metodo_pago': 'efectivo',
+                    'detalles': [{'producto': producto.pk, 'cantidad': 2, 'precio_unitario': '15.00'}],
+                }, format='json')
+                raise RuntimeError
+
+        self.assertEqual(self.valor('localito_ventas_creadas_total', metodo_pago='efectivo'), ventas + 1)
+        self.assertEqual(self.valor('localito_stock_descontado_unidades_total', origen='venta'), unidades + 3)
+
+    def test_endpoint(self):
+        respuesta = self.client.get('/api/monitoreo/metricas/')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn(b'localito_peticion_segundos_bucket', respuesta.content)
+
+        with override_settings(MONITOREO_METRICAS_TOKEN='secreto'):
+            self.assertEqual(self.client.get('/api/monitoreo/metricas/').status_code, 403)
+            respuesta = self.client.get('/api/monitoreo/metricas/', HTTP_AUTHORIZATION='Bearer secreto')
+            self.assertEqual(respuesta.status_code, 200)
+
+
+class PerfiladorTests(TestCase):
+    def setUp(self):
+        self.enterContext(override_settings(MEDIA_ROOT=tempfile.mkdtemp()))
+        self.admin = Usuario.objects.create_user(
+            username='admin', password='admin12345', rol='admin', is_staff=True, is_superuser=True
+        )
+        self.cajero = Usuario.objects.create_user(username='cajero', password='cajero12345')
+        self.client = APIClient()
+
+    def autenticar(self, username, password):
+        respuesta = self.client.post('/api/auth/jwt/create/', {'username': username, 'password': password})
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {respuesta.data['access']}")
+
+    def test_admin_perfila_con_parametro(self):
+        self.autenticar('admin', 'admin12345')
+        respuesta = self.client.get('/api/reportes/analisis/rendimiento_categorias/', {'perfilar': '1'})
+        self.assertEqual(respuesta.status_code, 200)
+
+        perfil = PerfilPeticion.objects.get(pk=respuesta['X-Perfil'])
+        self.assertEqual(perfil.vista, 'ReporteViewSet.rendimiento_categorias')
+        self.assertEqual(perfil.usuario, self.admin)
+        self.assertGreater(perfil.num_consultas, 0)
+        self.assertIn('cumulative', perfil.resumen)
+        with perfil.archivo.open('rb') as archivo:
+            self.assertTrue(marshal.loads(archivo.read()))
+
+        self.client.force_login(self.admin)
+        descarga = self.client.get(f'/admin/monitoreo/perfilpeticion/{perfil.pk}/descargar/')
+        self.assertEqual(descarga.status_code, 200)
+        self.assertIn('perfil_', descarga['Content-Disposition'])
+
+    def test_encabezado_solo_para_staff(self):
+        self.autenticar('cajero', 'cajero12345')
+        respuesta = self.client.get('/api/inventario/productos/', HTTP_X_PERFILAR='1')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertFalse(respuesta.has_header('X-Perfil'))
+
+        self.autenticar('admin', 'admin12345')
+        respuesta = self.client.get('/api/inventario/productos/', HTTP_X_PERFILAR='1')
+        self.assertTrue(respuesta.has_header('X-Perfil'))
+
+    @override_settings(MONITOREO_PERFILES_MAXIMO=2)
+    def test_conserva_los_mas_recientes(self):
+        self.autenticar('admin', 'admin12345')
+        ids = [self.client.get('/api/inventario/categorias/', {'perfilar': '1'})['X-Perfil'] for _ in range(3)]
+        self.assertEqual(sorted(PerfilPeticion.objects.values_list('pk', flat=True)), sorted(map(int, ids[1:])))
+
+
+@override_settings(MONITOREO_SQL_MUESTREO=0, MONITOREO_CONSULTA_LENTA_MS=0.000001)
+class ConsultasLentasTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(Usuario.objects.create_user(username='admin', password='admin12345'))
+        categoria = Categoria.objects.create(nombre='Abarrotes')
+        self.productos = [
+            Producto.objects.create(
+                codigo=f'P-{i}', nombre=f'Producto {i}', categoria=categoria,
+                precio_costo=Decimal('10.00'), precio_venta=Decimal('15.00'),
+            )
+            for i in range(2)
+        ]
+
+    def test_agrega_por_huella_y_vista(self):
+        for producto in self.productos:
+            self.client.get(f'/api/inventario/productos/{producto.pk}/')
+
+        consulta = ConsultaLenta.objects.get(vista='ProductoViewSet.retrieve', huella__contains='FROM "productos"')
+        self.assertEqual(consulta.veces, 2)
+        self.assertGreaterEqual(consulta.tiempo_total_ms, consulta.tiempo_max_ms)
+        self.assertEqual(consulta.parametros, [self.productos[0].pk])
+        # Búsqueda por llave primaria: tiene plan y no recorre la tabla
+        self.assertIn('productos', consulta.plan)
+        self.assertFalse(consulta.escaneo_secuencial)
+
+    @override_settings(MONITOREO_CONSULTA_LENTA_MS=0)
+    def test_desactivado(self):
+        self.client.get('/api/inventario/productos/')
+        self.assertFalse(ConsultaLenta.objects.exists())
+
+    def test_marca_indice_faltante(self):
+        sql = 'SELECT "productos"."id" FROM "productos" WHERE "productos"."codigo_barras" = %s'
+        lentas.registrar('default', sql, ['7501234567890'], 0.3, 'pruebas')
+        lentas.registrar('default', sql, ['7509876543210'], 0.5, 'pruebas')
+
+        consulta = ConsultaLenta.objects.get(vista='pruebas')
+        self.assertTrue(consulta.escaneo_secuencial)
+        self.assertEqual(consulta.veces, 2)
+        self.assertAlmostEqual(consulta.tiempo_total_ms, 800)
+        self.assertAlmostEqual(consulta.tiempo_max_ms, 500)
+
+        salida = StringIO()
+        call_command('consultas_lentas', '--secuenciales', '--plan', stdout=salida)
+        self.assertIn('recorre tabla completa', salida.getvalue())
+        self.assertIn('codigo_barras', salida.getvalue())
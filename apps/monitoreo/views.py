@@ -0,0 +1,25 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+from .metricas import exposicion
+
+LOCALES = ('127.0.0.1', '::1')
+
+
+def autorizado(request):
+    """Con MONITOREO_METRICAS_TOKEN se exige `Authorization: Bearer <token>`; sin él, solo localhost"""
+    token = settings.MONITOREO_METRICAS_TOKEN
+    if not token:
+        return request.META.get('REMOTE_ADDR') in LOCALES
+    encabezado = request.META.get('HTTP_AUTHORIZATION', '')
+    return hmac.compare_digest(encabezado.encode(), f'Bearer {token}'.encode())
+
+
+def metricas(request):
+    """Métricas en el formato de texto de Prometheus"""
+    if not autorizado(request):
+        return HttpResponseForbidden()
+    contenido, tipo = exposicion()
+    return HttpResponse(contenido, content_type=tipo)
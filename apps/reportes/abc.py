@@ -0,0 +1,142 @@
+"""
+Clasificación ABC (Pareto) del catálogo por ingresos, margen y unidades.
+
+Una consulta trae los productos activos y otra los agregados por producto de
+los detalles del periodo, que solo recorre las ventas de esos días; NumPy los
+une por id, ordena
+las tres columnas a la vez, calcula la participación acumulada y asigna la
+clase: A hasta el UMBRAL_A del total, B hasta el UMBRAL_B y C el resto. Los
+productos sin ventas (o con margen negativo en ese criterio) quedan en C.
+"""
+import numpy as np
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from apps.core.cache import invalidar_modelos
+from apps.core.fechas import ultimos_dias
+from apps.inventario.models import Producto
+from apps.ventas.models import DetalleVenta
+
+CRITERIOS = ('ingresos', 'margen', 'unidades')
+
+UMBRAL_A = 0.80
+UMBRAL_B = 0.95
+
+DIAS = 90
+
+
+def agregados_productos(dias=DIAS):
+    """Ids y matriz (producto x criterio) de ingresos, margen y unidades de los productos activos"""
+    inicio, fin = ultimos_dias(dias)
+    productos = list(Producto.objects.filter(activo=True).values_list('id', 'codigo', 'nombre').order_by('id'))
+    ventas = list(DetalleVenta.objects.filter(
+        venta__fecha__gte=inicio,
+        venta__fecha__lt=fin,
+        venta__cancelada=False
+    ).values('producto_id').annotate(
+        ingresos=Sum('subtotal'),
+        margen=Sum('utilidad'),
+        unidades=Sum('cantidad')
+    ).values_list('producto_id', 'ingresos', 'margen', 'unidades').order_by())
+
+    ids = np.array([fila[0] for fila in productos], dtype=np.int64)
+    valores = np.zeros((len(productos), len(CRITERIOS)))
+    if ventas and len(ids):
+        vendidos = np.array([fila[0] for fila in ventas], dtype=np.int64)
+        # ids está ordenado: posición de cada producto vendido, descartando los inactivos
+        posiciones = np.minimum(np.searchsorted(ids, vendidos), len(ids) - 1)
+        activos = ids[posiciones] == vendidos
+        totales = np.array([[float(v or 0) for v in fila[1:]] for fila in ventas])
+        valores[posiciones[activos]] = totales[activos]
+    return ids, [fila[1:] for fila in productos], valores
+
+
+def clasificar(valores, umbral_a=UMBRAL_A, umbral_b=UMBRAL_B):
+    """
+    Participación, participación acumulada y clase de cada producto en cada
+    criterio (columnas de `valores`), en el orden original de las filas.
+    """
+    positivos = np.clip(valores, 0, None)
+    orden = np.argsort(-positivos, axis=0, kind='stable')
+    ordenados = np.take_along_axis(positivos, orden, axis=0)
+
+    totales = ordenados.sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        participacion = np.where(totales > 0, ordenados / totales, 0.0)
+    acumulada = np.cumsum(participacion, axis=0)
+    # La clase depende de lo acumulado antes del producto: el que cruza el umbral sigue en A
+    previa = acumulada - participacion
+
+    clases = np.select(
+        [(ordenados > 0) & (previa < umbral_a), (ordenados > 0) & (previa < umbral_b)],
+        ['A', 'B'],
+        default='C'
+    )
+
+    # Regresar cada columna al orden original de los productos
+    resultado = {}
+    for nombre, matriz in (('participacion', participacion), ('acumulada', acumulada), ('clase', clases)):
+        original = np.empty_like(matriz)
+        np.put_along_axis(original, orden, matriz, axis=0)
+        resultado[nombre] = original
+    return resultado
+
+
+def clasificacion_abc(dias=DIAS, criterio='ingresos'):
+    """Catálogo activo ordenado por `criterio`, con participación y clase en cada criterio"""
+    ids, productos, valores = agregados_productos(dias)
+    resultado = clasificar(valores)
+    columna = CRITERIOS.index(criterio)
+
+    filas = []
+    for i in np.argsort(-valores[:, columna], kind='stable'):
+        fila = {'id': int(ids[i]), 'codigo': productos[i][0], 'nombre': productos[i][1]}
+        for j, nombre in enumerate(CRITERIOS):
+            fila[nombre] = round(float(valores[i, j]), 2)
+            fila[f'participacion_{nombre}'] = round(float(resultado['participacion'][i, j]) * 100, 2)
+            fila[f'acumulada_{nombre}'] = round(float(resultado['acumulada'][i, j]) * 100, 2)
+            fila[f'clase_{nombre}'] = str(resultado['clase'][i, j])
+        filas.append(fila)
+
+    clases = resultado['clase'][:, columna]
+    return {
+        'dias': dias,
+        'criterio': criterio,
+        'umbrales': {'A': UMBRAL_A * 100, 'B': UMBRAL_B * 100},
+        'resumen': {clase: int((clases == clase).sum()) for clase in ('A', 'B', 'C')},
+        'productos': filas,
+    }
+
+
+def clasificar_productos(dias=DIAS):
+    """Calcula la clasificación y la guarda en los productos activos con bulk_update"""
+    ids, _, valores = agregados_productos(dias)
+    clases = clasificar(valores)['clase']
+    ahora = timezone.now()
+
+    productos = []
+    for i, producto_id in enumerate(ids.tolist()):
+        producto = Producto(id=producto_id, fecha_clasificacion_abc=ahora, ultima_actualizacion=ahora)
+        producto.clase_abc_ingresos, producto.clase_abc_margen, producto.clase_abc_unidades = (
+            str(clase) for clase in clases[i]
+        )
+        productos.append(producto)
+
+    with transaction.atomic():
+        Producto.objects.bulk_update(
+            productos,
+            # ultima_actualizacion a mano: bulk_update no aplica auto_now y los
+            # listados filtrados por clase dependen de ella (apps.core.condicional)
+            ['clase_abc_ingresos', 'clase_abc_margen', 'clase_abc_unidades', 'fecha_clasificacion_abc',
+             'ultima_actualizacion'],
+            batch_size=1000
+        )
+        # Los inactivos no participan en la clasificación
+        Producto.objects.filter(activo=False).exclude(clase_abc_ingresos='').update(
+            clase_abc_ingresos='', clase_abc_margen='', clase_abc_unidades='',
+            fecha_clasificacion_abc=None, ultima_actualizacion=ahora
+        )
+
+    invalidar_modelos(Producto)
+    return len(productos)
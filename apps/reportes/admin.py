@@ -1,10 +1,16 @@
 from django.contrib import admin
-from .models import ReporteGenerado
+from .models import ReporteGenerado, ResumenVentasHora
 
 @admin.register(ReporteGenerado)
 class ReporteGeneradoAdmin(admin.ModelAdmin):
-    list_display = ('nombre', 'tipo', 'fecha_inicio', 'fecha_fin', 'formato', 'usuario', 'fecha_generacion')
-    list_filter = ('tipo', 'formato', 'fecha_generacion')
+    list_display = ('nombre', 'tipo', 'fecha_inicio', 'fecha_fin', 'formato', 'estado', 'progreso',
+                    'usuario', 'fecha_generacion')
+    list_filter = ('tipo', 'formato', 'estado', 'fecha_generacion')
     search_fields = ('nombre', 'descripcion')
     date_hierarchy = 'fecha_generacion'
-    readonly_fields = ('fecha_generacion',)
\ No newline at end of file
+    readonly_fields = ('fecha_generacion', 'estado', 'progreso', 'mensaje_error', 'fecha_finalizacion')
+
+@admin.register(ResumenVentasHora)
+class ResumenVentasHoraAdmin(admin.ModelAdmin):
+    list_display = ('fecha', 'hora', 'num_ventas', 'ventas_total', 'utilidad_total', 'fecha_actualizacion')
+    date_hierarchy = 'fecha'
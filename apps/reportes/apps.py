@@ -3,4 +3,7 @@ from django.apps import AppConfig
 class ReportesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.reportes'
-    verbose_name = 'Reportes y Análisis'
\ No newline at end of file
+    verbose_name = 'Reportes y Análisis'
+    
+    def ready(self):
+        import apps.reportes.signals
\ No newline at end of file
@@ -0,0 +1,136 @@
+"""
+Caché de reportes por acción y parámetros normalizados.
+
+Cada reporte declara de qué dominios depende (ventas, inventario, facturacion).
+Un dominio es un grupo de modelos de la caché compartida (apps.core.cache): la
+clave incluye las versiones de esos modelos, que las señales de apps.core
+incrementan cuando cambian, por lo que las entradas anteriores dejan de usarse
+sin tener que borrarlas una por una.
+"""
+import hashlib
+from functools import wraps
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.response import Response
+
+from apps.core.cache import invalidar_modelos, versiones as versiones_modelos
+from apps.core.replicas import lectura_pegajosa
+from apps.monitoreo.metricas import CACHE_CONSULTAS
+
+DOMINIOS = {
+    'ventas': ('ventas.venta', 'ventas.detalleventa'),
+    'inventario': ('inventario.producto', 'inventario.categoria'),
+    'facturacion': ('facturacion.factura',),
+}
+
+_acciones_cacheadas = set()
+
+
+def modelos(*dominios):
+    return [apps.get_model(etiqueta) for dominio in dominios for etiqueta in DOMINIOS[dominio]]
+
+
+def versiones(*dominios):
+    return versiones_modelos(*modelos(*dominios))
+
+
+def invalidar(*dominios):
+    """
+    Incrementa la versión de los modelos de los dominios indicados, para
+    cambios que no pasan por las señales de un modelo (tablas de resumen,
+    generación masiva)
+    """
+    invalidar_modelos(*modelos(*dominios))
+
+
+def normalizar_parametros(query_params):
+    """Parámetros ordenados y sin valores vacíos, para que el orden en la URL no importe"""
+    parametros = []
+    for nombre in sorted(query_params.keys()):
+        valores = sorted(valor.strip() for valor in query_params.getlist(nombre) if valor.strip())
+        if valores:
+            parametros.append(f"{nombre}={','.join(valores)}")
+    return '&'.join(parametros)
+
+
+def clave_reporte(accion, query_params, dominios):
+    parametros = normalizar_parametros(query_params)
+    huella = hashlib.sha1(parametros.encode('utf-8')).hexdigest()
+    version = '.'.join(str(v) for v in versiones(*dominios))
+    # La fecha local forma parte de la clave porque varios reportes son relativos a "hoy"
+    return f'reportes:{accion}:{timezone.localdate().isoformat()}:{version}:{huella}'
+
+
+def _registrar(accion, evento):
+    CACHE_CONSULTAS.labels(f'reportes.{accion}', evento).inc()
+    clave = f'reportes:metricas:{accion}:{evento}'
+    if not cache.add(clave, 1, timeout=None):
+        try:
+            cache.incr(clave)
+        except ValueError:
+            cache.set(clave, 1, timeout=None)
+
+
+def metricas():
+    """Aciertos y fallos de la caché por acción"""
+    claves = []
+    for accion in sorted(_acciones_cacheadas):
+        claves += [f'reportes:metricas:{accion}:hit', f'reportes:metricas:{accion}:miss']
+    valores = cache.get_many(claves)
+
+    resultado = {}
+    for accion in sorted(_acciones_cacheadas):
+        hits = valores.get(f'reportes:metricas:{accion}:hit', 0)
+        misses = valores.get(f'reportes:metricas:{accion}:miss', 0)
+        total = hits + misses
+        resultado[accion] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / total, 4) if total else None,
+        }
+    return resultado
+
+
+def cachear_reporte(*dominios, timeout=None):
+    """
+    Decorador para acciones de ReporteViewSet. Cachea `response.data` de las
+    respuestas exitosas bajo la acción, los parámetros y las versiones de los
+    dominios de los que depende el reporte.
+
+    Con lectura pegajosa no se usa la caché: una entrada con la versión nueva
+    pudo calcularse en la réplica antes de que llegara la escritura del usuario.
+    """
+    for dominio in dominios:
+        if dominio not in DOMINIOS:
+            raise ValueError(f"Dominio de caché desconocido: {dominio}")
+
+    def decorador(func):
+        accion = func.__name__
+        _acciones_cacheadas.add(accion)
+
+        @wraps(func)
+        def wrapper(self, request, *args, **kwargs):
+            if lectura_pegajosa(request.user):
+                return func(self, request, *args, **kwargs)
+
+            clave = clave_reporte(accion, request.query_params, dominios)
+            datos = cache.get(clave)
+            if datos is not None:
+                _registrar(accion, 'hit')
+                return Response(datos)
+
+            _registrar(accion, 'miss')
+            response = func(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(
+                    clave, response.data,
+                    timeout if timeout is not None else settings.REPORTES_CACHE_TIMEOUT
+                )
+            return response
+
+        return wrapper
+
+    return decorador
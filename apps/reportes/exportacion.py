@@ -0,0 +1,129 @@
+"""
+Exportación de ventas a Excel con memoria constante.
+
+Usa el modo write-only de openpyxl, que escribe cada fila directamente al
+archivo, alimentado con querysets recorridos con `.iterator()`. Ninguna hoja
+se arma completa en memoria, así que el consumo no depende del tamaño del rango.
+"""
+import tempfile
+
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+from apps.ventas.models import Venta, DetalleVenta
+
+CHUNK_SIZE = 2000
+
+_NEGRITA = Font(bold=True)
+
+
+def _fecha_local(valor):
+    # Excel no maneja fechas con zona horaria
+    return timezone.localtime(valor).replace(tzinfo=None) if valor else None
+
+
+class ExportadorVentasXLSX:
+    """
+    Libro de ventas con las hojas Resumen, Por día, Por producto y Detalle
+    para el rango [inicio, fin).
+    """
+
+    def __init__(self, inicio, fin, incluir_detalle=True, chunk_size=CHUNK_SIZE):
+        self.inicio = inicio
+        self.fin = fin
+        self.incluir_detalle = incluir_detalle
+        self.chunk_size = chunk_size
+
+    def ventas(self):
+        return Venta.objects.filter(fecha__gte=self.inicio, fecha__lt=self.fin, cancelada=False)
+
+    def detalles(self):
+        return DetalleVenta.objects.filter(
+            venta__fecha__gte=self.inicio,
+            venta__fecha__lt=self.fin,
+            venta__cancelada=False
+        )
+
+    def _hoja(self, libro, titulo, encabezados):
+        hoja = libro.create_sheet(title=titulo)
+        fila = []
+        for encabezado in encabezados:
+            celda = WriteOnlyCell(hoja, value=encabezado)
+            celda.font = _NEGRITA
+            fila.append(celda)
+        hoja.append(fila)
+        return hoja
+
+    def escribir_resumen(self, libro):
+        hoja = self._hoja(libro, 'Resumen', ['Concepto', 'Valor'])
+        ventas = self.ventas().aggregate(
+            num_ventas=Count('id'),
+            monto_total=Sum('total'),
+            utilidad=Sum('utilidad_total')
+        )
+        detalles = self.detalles().aggregate(unidades=Sum('cantidad'))
+
+        hoja.append(['Inicio', _fecha_local(self.inicio)])
+        hoja.append(['Fin', _fecha_local(self.fin)])
+        hoja.append(['Número de ventas', ventas['num_ventas']])
+        hoja.append(['Monto total', ventas['monto_total'] or 0])
+        hoja.append(['Unidades vendidas', detalles['unidades'] or 0])
+        hoja.append(['Utilidad', ventas['utilidad'] or 0])
+
+    def escribir_por_dia(self, libro):
+        hoja = self._hoja(libro, 'Por día', ['Día', 'Número de ventas', 'Total'])
+        por_dia = self.ventas().annotate(
+            dia=TruncDate('fecha')
+        ).values_list('dia').annotate(
+            num_ventas=Count('id'),
+            total=Sum('total')
+        ).order_by('dia')
+        for fila in por_dia.iterator(chunk_size=self.chunk_size):
+            hoja.append(list(fila))
+
+    def escribir_por_producto(self, libro):
+        hoja = self._hoja(libro, 'Por producto', [
+            'Código', 'Producto', 'Categoría', 'Cantidad vendida', 'Total vendido', 'Utilidad'
+        ])
+        por_producto = self.detalles().values_list(
+            'producto__codigo', 'producto__nombre', 'producto__categoria__nombre'
+        ).annotate(
+            cantidad_vendida=Sum('cantidad'),
+            total_vendido=Sum('subtotal'),
+            utilidad_total=Sum('utilidad')
+        ).order_by('-total_vendido')
+        for fila in por_producto.iterator(chunk_size=self.chunk_size):
+            hoja.append(list(fila))
+
+    def escribir_detalle(self, libro):
+        hoja = self._hoja(libro, 'Detalle', [
+            'Fecha', 'Folio', 'Código', 'Producto', 'Cantidad', 'Precio unitario',
+            'Subtotal', 'Costo unitario', 'Utilidad'
+        ])
+        detalles = self.detalles().order_by('venta__fecha', 'id').values_list(
+            'venta__fecha', 'venta__folio', 'producto__codigo', 'producto__nombre',
+            'cantidad', 'precio_unitario', 'subtotal', 'costo_unitario', 'utilidad'
+        )
+        for fecha, *resto in detalles.iterator(chunk_size=self.chunk_size):
+            hoja.append([_fecha_local(fecha), *resto])
+
+    def escribir(self, destino):
+        """Escribe el libro en `destino` (ruta o archivo binario)"""
+        libro = Workbook(write_only=True)
+        self.escribir_resumen(libro)
+        self.escribir_por_dia(libro)
+        self.escribir_por_producto(libro)
+        if self.incluir_detalle:
+            self.escribir_detalle(libro)
+        libro.save(destino)
+
+    def archivo_temporal(self):
+        """Escribe el libro en un archivo temporal y lo regresa posicionado al inicio"""
+        archivo = tempfile.TemporaryFile(suffix='.xlsx')
+        self.escribir(archivo)
+        archivo.seek(0)
+        return archivo
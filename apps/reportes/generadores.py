@@ -0,0 +1,184 @@
+"""
+Generación de los archivos de ReporteGenerado (CSV, XLSX y PDF).
+
+Cada tipo de reporte define una fuente de datos que regresa un título, los
+encabezados de columna y las filas; cada formato define un escritor que
+convierte esas filas en el contenido del archivo.
+"""
+import io
+
+import pandas as pd
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.db.models import Avg, Count, F, Sum
+from django.db.models.functions import TruncMonth
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import landscape, letter
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from apps.core.fechas import rango_dias
+from apps.ventas.models import Venta, DetalleVenta
+from apps.inventario.models import Producto
+from .exportacion import ExportadorVentasXLSX, _fecha_local
+
+
+def rango_reporte(reporte):
+    """Convierte las fechas del reporte (inclusivas) en un rango [inicio, fin)"""
+    return rango_dias(reporte.fecha_inicio, reporte.fecha_fin)
+
+
+def datos_ventas(inicio, fin):
+    ventas = Venta.objects.filter(
+        fecha__gte=inicio, fecha__lt=fin
+    ).order_by('fecha').values_list(
+        'folio', 'fecha', 'cliente_nombre', 'metodo_pago', 'subtotal', 'iva', 'total',
+        'usuario__username', 'cancelada'
+    )
+    filas = [
+        (folio, _fecha_local(fecha), cliente, metodo, subtotal, iva, total, usuario or '',
+         'Sí' if cancelada else 'No')
+        for folio, fecha, cliente, metodo, subtotal, iva, total, usuario, cancelada
+        in ventas.iterator(chunk_size=2000)
+    ]
+    columnas = ['Folio', 'Fecha', 'Cliente', 'Método de pago', 'Subtotal', 'IVA', 'Total',
+                'Vendedor', 'Cancelada']
+    return 'Reporte de ventas', columnas, filas
+
+
+def datos_productos(inicio, fin):
+    productos = DetalleVenta.objects.filter(
+        venta__fecha__gte=inicio,
+        venta__fecha__lt=fin,
+        venta__cancelada=False
+    ).values_list(
+        'producto__codigo', 'producto__nombre', 'producto__categoria__nombre'
+    ).annotate(
+        cantidad_vendida=Sum('cantidad'),
+        total_vendido=Sum('subtotal'),
+        utilidad_total=Sum('utilidad'),
+        num_ventas=Count('venta', distinct=True)
+    ).order_by('-cantidad_vendida')
+    columnas = ['Código', 'Producto', 'Categoría', 'Cantidad vendida', 'Total vendido',
+                'Utilidad', 'Número de ventas']
+    return 'Productos vendidos', columnas, list(productos)
+
+
+def datos_inventario(inicio, fin):
+    productos = Producto.objects.filter(activo=True).order_by('nombre').values_list(
+        'codigo', 'nombre', 'categoria__nombre', 'stock', 'stock_minimo',
+        'precio_costo', 'precio_venta'
+    ).annotate(valor_costo=F('stock') * F('precio_costo'))
+    columnas = ['Código', 'Producto', 'Categoría', 'Stock', 'Stock mínimo', 'Precio costo',
+                'Precio venta', 'Valor a costo']
+    return 'Inventario actual', columnas, list(productos)
+
+
+def datos_financiero(inicio, fin):
+    ventas_mensuales = Venta.objects.filter(
+        fecha__gte=inicio, fecha__lt=fin, cancelada=False
+    ).annotate(
+        mes=TruncMonth('fecha')
+    ).values('mes').annotate(
+        ingresos=Sum('total'),
+        num_ventas=Count('id'),
+        ticket_promedio=Avg('total'),
+        utilidad_total=Sum('utilidad_total')
+    ).order_by('mes')
+
+    filas = [
+        (fila['mes'].strftime('%Y-%m'), fila['ingresos'], fila['num_ventas'],
+         round(fila['ticket_promedio'], 2), fila['utilidad_total'])
+        for fila in ventas_mensuales
+    ]
+    columnas = ['Mes', 'Ingresos', 'Número de ventas', 'Ticket promedio', 'Utilidad']
+    return 'Análisis financiero', columnas, filas
+
+
+FUENTES = {
+    'ventas': datos_ventas,
+    'productos': datos_productos,
+    'inventario': datos_inventario,
+    'financiero': datos_financiero,
+}
+
+
+def escribir_csv(titulo, columnas, filas):
+    buffer = io.StringIO()
+    pd.DataFrame(filas, columns=columnas).to_csv(buffer, index=False)
+    # BOM para que Excel abra correctamente los acentos
+    return buffer.getvalue().encode('utf-8-sig')
+
+
+def escribir_xlsx(titulo, columnas, filas):
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet(title=titulo[:31])
+    encabezados = []
+    for columna in columnas:
+        celda = WriteOnlyCell(hoja, value=columna)
+        celda.font = Font(bold=True)
+        encabezados.append(celda)
+    hoja.append(encabezados)
+    for fila in filas:
+        hoja.append(list(fila))
+
+    buffer = io.BytesIO()
+    libro.save(buffer)
+    return buffer.getvalue()
+
+
+def escribir_pdf(titulo, columnas, filas):
+    buffer = io.BytesIO()
+    documento = SimpleDocTemplate(buffer, pagesize=landscape(letter), title=titulo)
+    estilos = getSampleStyleSheet()
+
+    datos = [columnas] + [
+        ['' if valor is None else str(valor) for valor in fila] for fila in filas
+    ]
+    tabla = Table(datos, repeatRows=1)
+    tabla.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1f2937')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 8),
+        ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f3f4f6')]),
+    ]))
+
+    documento.build([Paragraph(titulo, estilos['Title']), Spacer(1, 12), tabla])
+    return buffer.getvalue()
+
+
+ESCRITORES = {
+    'CSV': (escribir_csv, 'csv'),
+    'XLSX': (escribir_xlsx, 'xlsx'),
+    'PDF': (escribir_pdf, 'pdf'),
+}
+
+
+def generar_archivo(reporte, progreso=None):
+    """
+    Construye el archivo del reporte y lo regresa como File.
+    `progreso` recibe el porcentaje de avance en cada etapa.
+    """
+    progreso = progreso or (lambda porcentaje: None)
+    escritor, extension = ESCRITORES[reporte.formato]
+    inicio, fin = rango_reporte(reporte)
+    nombre = f"{reporte.tipo}_{reporte.fecha_inicio:%Y%m%d}_{reporte.fecha_fin:%Y%m%d}_{reporte.pk}.{extension}"
+
+    if reporte.tipo == 'ventas' and reporte.formato == 'XLSX':
+        # Las ventas pueden ser cientos de miles de filas: se escriben en streaming
+        archivo = ExportadorVentasXLSX(inicio, fin).archivo_temporal()
+        progreso(90)
+        return File(archivo, name=nombre)
+
+    titulo, columnas, filas = FUENTES[reporte.tipo](inicio, fin)
+    progreso(50)
+
+    contenido = escritor(titulo, columnas, filas)
+    progreso(90)
+
+    return ContentFile(contenido, name=nombre)
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from apps.reportes.abc import DIAS, clasificar_productos
+
+
+class Command(BaseCommand):
+    help = 'Calcula la clasificación ABC de los productos activos y la guarda en el catálogo'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=DIAS,
+                            help='Días de ventas considerados (incluye hoy)')
+
+    def handle(self, *args, **options):
+        total = clasificar_productos(options['dias'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Clasificación ABC actualizada para {total} productos (últimos {options['dias']} días)"
+        ))
@@ -0,0 +1,44 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.ventas.models import Venta
+from apps.reportes.resumenes import refrescar_resumenes
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye las tablas de resumen de reportes para un rango de días'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=2,
+                            help='Reconstruye los últimos N días (incluye hoy)')
+        parser.add_argument('--desde', type=date.fromisoformat, help='Fecha inicial YYYY-MM-DD')
+        parser.add_argument('--hasta', type=date.fromisoformat, help='Fecha final YYYY-MM-DD')
+        parser.add_argument('--todo', action='store_true',
+                            help='Reconstruye desde la primera venta registrada')
+
+    def handle(self, *args, **options):
+        hasta = options['hasta'] or timezone.localdate()
+
+        if options['todo']:
+            primera = Venta.objects.order_by('fecha').values_list('fecha', flat=True).first()
+            if not primera:
+                self.stdout.write(self.style.WARNING('No hay ventas registradas'))
+                return
+            desde = timezone.localdate(primera)
+        else:
+            desde = options['desde'] or hasta - timedelta(days=options['dias'] - 1)
+
+        if desde > hasta:
+            raise CommandError('La fecha inicial no puede ser posterior a la final')
+
+        # Por meses para no agrupar años completos en una sola transacción
+        filas = 0
+        inicio = desde
+        while inicio <= hasta:
+            fin = min(inicio + timedelta(days=30), hasta)
+            filas += refrescar_resumenes(inicio, fin)
+            inicio = fin + timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(f'Resúmenes reconstruidos del {desde} al {hasta} ({filas} filas)'))
@@ -0,0 +1,57 @@
+# Generated by Django 5.1.3 on 2026-10-19 12:10
+
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import Upper
+
+
+def marcar_existentes(apps, schema_editor):
+    # Los reportes registrados antes ya tienen su archivo cargado
+    ReporteGenerado = apps.get_model('reportes', 'ReporteGenerado')
+    ReporteGenerado.objects.update(
+        estado='completado',
+        progreso=100,
+        fecha_finalizacion=F('fecha_generacion'),
+        formato=Upper('formato'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reportes', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportegenerado',
+            name='estado',
+            field=models.CharField(choices=[('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('completado', 'Completado'), ('error', 'Error')], default='pendiente', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='reportegenerado',
+            name='fecha_finalizacion',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reportegenerado',
+            name='mensaje_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='reportegenerado',
+            name='progreso',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='reportegenerado',
+            name='archivo',
+            field=models.FileField(blank=True, upload_to='reportes/'),
+        ),
+        migrations.AlterField(
+            model_name='reportegenerado',
+            name='formato',
+            field=models.CharField(choices=[('PDF', 'PDF'), ('XLSX', 'Excel'), ('CSV', 'CSV')], max_length=10),
+        ),
+        migrations.RunPython(marcar_existentes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.3 on 2026-10-19 12:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0002_initial'),
+        ('reportes', '0003_generacion_asincrona'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenCategoriaDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('ventas_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cantidad_vendida', models.IntegerField(default=0)),
+                ('utilidad_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('num_ventas', models.IntegerField(default=0)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('categoria', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_diarios', to='inventario.categoria')),
+            ],
+            options={
+                'verbose_name': 'Resumen diario por categoría',
+                'verbose_name_plural': 'Resúmenes diarios por categoría',
+                'db_table': 'resumen_categoria_diario',
+                'ordering': ['-fecha'],
+                'indexes': [models.Index(fields=['fecha'], name='resumen_cat_fecha_393c92_idx')],
+                'constraints': [models.UniqueConstraint(fields=('categoria', 'fecha'), name='resumen_categoria_fecha_unico')],
+            },
+        ),
+    ]
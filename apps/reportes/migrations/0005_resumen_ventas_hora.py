@@ -0,0 +1,32 @@
+# Generated by Django 5.1.3 on 2026-10-19 12:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reportes', '0004_resumen_categoria_diario'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenVentasHora',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('hora', models.PositiveSmallIntegerField()),
+                ('num_ventas', models.IntegerField(default=0)),
+                ('ventas_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('utilidad_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Resumen de ventas por hora',
+                'verbose_name_plural': 'Resúmenes de ventas por hora',
+                'db_table': 'resumen_ventas_hora',
+                'ordering': ['-fecha', 'hora'],
+                'constraints': [models.UniqueConstraint(fields=('fecha', 'hora'), name='resumen_ventas_fecha_hora_unico')],
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.1.3 on 2026-10-19 18:02
+
+from django.db import migrations
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def llenar_resumenes(apps, schema_editor):
+    # rendimiento_categorias solo lee el resumen: sin esto el historial anterior sale en cero
+    DetalleVenta = apps.get_model('ventas', 'DetalleVenta')
+    ResumenCategoriaDiario = apps.get_model('reportes', 'ResumenCategoriaDiario')
+    filas = DetalleVenta.objects.filter(
+        venta__cancelada=False
+    ).annotate(
+        dia=TruncDate('venta__fecha')
+    ).values('producto__categoria_id', 'dia').annotate(
+        ventas_total=Sum('subtotal'),
+        cantidad_vendida=Sum('cantidad'),
+        utilidad_total=Sum('utilidad'),
+        num_ventas=Count('venta', distinct=True)
+    ).order_by()
+
+    lote = []
+    for fila in filas.iterator(chunk_size=1000):
+        lote.append(ResumenCategoriaDiario(
+            categoria_id=fila['producto__categoria_id'],
+            fecha=fila['dia'],
+            ventas_total=fila['ventas_total'],
+            cantidad_vendida=fila['cantidad_vendida'],
+            utilidad_total=fila['utilidad_total'],
+            num_ventas=fila['num_ventas'],
+        ))
+        if len(lote) >= 1000:
+            guardar(ResumenCategoriaDiario, lote)
+            lote = []
+    guardar(ResumenCategoriaDiario, lote)
+
+
+def guardar(ResumenCategoriaDiario, lote):
+    ResumenCategoriaDiario.objects.bulk_create(
+        lote, update_conflicts=True, unique_fields=['categoria', 'fecha'],
+        update_fields=['ventas_total', 'cantidad_vendida', 'utilidad_total', 'num_ventas', 'fecha_actualizacion']
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reportes', '0005_resumen_ventas_hora'),
+        ('ventas', '0002_credito_y_totales_precalculados'),
+    ]
+
+    operations = [
+        migrations.RunPython(llenar_resumenes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.3 on 2026-10-19 18:20
+
+from django.db import migrations
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractHour, TruncDate
+
+
+def llenar_resumenes(apps, schema_editor):
+    # Mapa de calor y comparativo leen el resumen: sin esto el historial anterior sale en cero
+    Venta = apps.get_model('ventas', 'Venta')
+    ResumenVentasHora = apps.get_model('reportes', 'ResumenVentasHora')
+    filas = Venta.objects.filter(
+        cancelada=False
+    ).annotate(
+        dia=TruncDate('fecha'),
+        hora=ExtractHour('fecha')
+    ).values('dia', 'hora').annotate(
+        num_ventas=Count('id'),
+        ventas_total=Sum('total'),
+        utilidad_total=Sum('utilidad_total')
+    ).order_by()
+
+    lote = []
+    for fila in filas.iterator(chunk_size=1000):
+        lote.append(ResumenVentasHora(
+            fecha=fila['dia'],
+            hora=fila['hora'],
+            num_ventas=fila['num_ventas'],
+            ventas_total=fila['ventas_total'],
+            utilidad_total=fila['utilidad_total'],
+        ))
+        if len(lote) >= 1000:
+            guardar(ResumenVentasHora, lote)
+            lote = []
+    guardar(ResumenVentasHora, lote)
+
+
+def guardar(ResumenVentasHora, lote):
+    ResumenVentasHora.objects.bulk_create(
+        lote, update_conflicts=True, unique_fields=['fecha', 'hora'],
+        update_fields=['num_ventas', 'ventas_total', 'utilidad_total', 'fecha_actualizacion']
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reportes', '0006_llenar_resumen_categoria_diario'),
+    ]
+
+    operations = [
+        migrations.RunPython(llenar_resumenes, migrations.RunPython.noop),
+    ]
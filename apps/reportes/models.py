@@ -10,6 +10,19 @@ class ReporteGenerado(models.Model):
         ('productos', 'Productos'),
     )
     
+    FORMATOS = (
+        ('PDF', 'PDF'),
+        ('XLSX', 'Excel'),
+        ('CSV', 'CSV'),
+    )
+    
+    ESTADOS = (
+        ('pendiente', 'Pendiente'),
+        ('procesando', 'Procesando'),
+        ('completado', 'Completado'),
+        ('error', 'Error'),
+    )
+    
     nombre = models.CharField(max_length=200)
     tipo = models.CharField(max_length=20, choices=TIPOS)
     descripcion = models.TextField(blank=True)
@@ -17,8 +30,14 @@ class ReporteGenerado(models.Model):
     fecha_inicio = models.DateField()
     fecha_fin = models.DateField()
     
-    archivo = models.FileField(upload_to='reportes/')
-    formato = models.CharField(max_length=10)  # PDF, XLSX, CSV
+    archivo = models.FileField(upload_to='reportes/', blank=True)
+    formato = models.CharField(max_length=10, choices=FORMATOS)
+    
+    # Generación en segundo plano
+    estado = models.CharField(max_length=20, choices=ESTADOS, default='pendiente')
+    progreso = models.PositiveSmallIntegerField(default=0)
+    mensaje_error = models.TextField(blank=True)
+    fecha_finalizacion = models.DateTimeField(null=True, blank=True)
     
     usuario = models.ForeignKey('usuarios.Usuario', on_delete=models.SET_NULL, null=True)
     fecha_generacion = models.DateTimeField(auto_now_add=True)
@@ -30,4 +49,71 @@ class ReporteGenerado(models.Model):
         ordering = ['-fecha_generacion']
     
     def __str__(self):
-        return f"{self.nombre} - {self.fecha_generacion.strftime('%Y-%m-%d')}"
\ No newline at end of file
+        return f"{self.nombre} - {self.fecha_generacion.strftime('%Y-%m-%d')}"
+    
+    def actualizar_progreso(self, progreso, estado=None):
+        """Actualiza el progreso sin tocar el resto de la fila"""
+        self.progreso = progreso
+        campos = ['progreso']
+        if estado:
+            self.estado = estado
+            campos.append('estado')
+        self.save(update_fields=campos)
+
+class ResumenCategoriaDiario(models.Model):
+    """
+    Ventas, unidades y utilidad por categoría y día local.
+    Se mantiene de forma incremental al registrar o cancelar ventas
+    y se reconstruye periódicamente con `refrescar_resumenes`.
+    """
+    categoria = models.ForeignKey('inventario.Categoria', on_delete=models.CASCADE,
+                                  related_name='resumenes_diarios')
+    fecha = models.DateField()
+    
+    ventas_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    cantidad_vendida = models.IntegerField(default=0)
+    utilidad_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    num_ventas = models.IntegerField(default=0)
+    
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'resumen_categoria_diario'
+        verbose_name = 'Resumen diario por categoría'
+        verbose_name_plural = 'Resúmenes diarios por categoría'
+        ordering = ['-fecha']
+        constraints = [
+            models.UniqueConstraint(fields=['categoria', 'fecha'], name='resumen_categoria_fecha_unico'),
+        ]
+        indexes = [
+            models.Index(fields=['fecha']),
+        ]
+    
+    def __str__(self):
+        return f"{self.categoria_id} - {self.fecha}"
+
+class ResumenVentasHora(models.Model):
+    """
+    Ventas por día y hora local. Alimenta el mapa de calor día de la semana x
+    hora y el comparativo de periodos; se mantiene igual que ResumenCategoriaDiario.
+    """
+    fecha = models.DateField()
+    hora = models.PositiveSmallIntegerField()
+    
+    num_ventas = models.IntegerField(default=0)
+    ventas_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    utilidad_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'resumen_ventas_hora'
+        verbose_name = 'Resumen de ventas por hora'
+        verbose_name_plural = 'Resúmenes de ventas por hora'
+        ordering = ['-fecha', 'hora']
+        constraints = [
+            models.UniqueConstraint(fields=['fecha', 'hora'], name='resumen_ventas_fecha_hora_unico'),
+        ]
+    
+    def __str__(self):
+        return f"{self.fecha} {self.hora:02d}:00"
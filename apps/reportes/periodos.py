@@ -0,0 +1,160 @@
+"""
+Mapa de calor día de la semana x hora y comparativo contra el periodo anterior.
+
+Ambos salen de una sola consulta agrupada por (periodo, día de la semana, hora)
+que cubre el periodo actual y el anterior de la misma duración. La consulta se
+hace sobre resumen_ventas_hora cuando REPORTES_USAR_RESUMENES está activo, o
+directamente sobre ventas; NumPy arma el cubo y calcula diferencias y variaciones.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Case, Count, IntegerField, Sum, Value, When
+from django.db.models.functions import ExtractHour, ExtractIsoWeekDay
+
+from apps.core.fechas import rango_dias
+from apps.ventas.models import Venta
+from .models import ResumenVentasHora
+
+MEDIDAS = ('total', 'num_ventas', 'utilidad')
+
+DIAS_SEMANA = ('Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo')
+
+ANTERIOR, ACTUAL = 0, 1
+
+
+def periodo_anterior(desde, hasta):
+    """Días [desde, hasta] del periodo inmediato anterior con la misma duración"""
+    duracion = (hasta - desde).days + 1
+    return desde - timedelta(days=duracion), desde - timedelta(days=1)
+
+
+def _filas_resumen(desde, hasta):
+    anterior_desde, _ = periodo_anterior(desde, hasta)
+    return ResumenVentasHora.objects.filter(
+        fecha__gte=anterior_desde, fecha__lte=hasta
+    ).annotate(
+        periodo=Case(When(fecha__gte=desde, then=Value(ACTUAL)),
+                     default=Value(ANTERIOR), output_field=IntegerField()),
+        dia_semana=ExtractIsoWeekDay('fecha')
+    ).values('periodo', 'dia_semana', 'hora').annotate(
+        total=Sum('ventas_total'),
+        num_ventas=Sum('num_ventas'),
+        utilidad=Sum('utilidad_total')
+    ).order_by()
+
+
+def _filas_ventas(desde, hasta):
+    anterior_desde, _ = periodo_anterior(desde, hasta)
+    inicio, _ = rango_dias(anterior_desde)
+    inicio_actual, fin = rango_dias(desde, hasta)
+    return Venta.objects.filter(
+        fecha__gte=inicio, fecha__lt=fin, cancelada=False
+    ).annotate(
+        periodo=Case(When(fecha__gte=inicio_actual, then=Value(ACTUAL)),
+                     default=Value(ANTERIOR), output_field=IntegerField()),
+        dia_semana=ExtractIsoWeekDay('fecha'),
+        hora=ExtractHour('fecha')
+    ).values('periodo', 'dia_semana', 'hora').annotate(
+        total=Sum('total'),
+        num_ventas=Count('id'),
+        utilidad=Sum('utilidad_total')
+    ).order_by()
+
+
+def cubo_periodos(desde, hasta, usar_resumenes=None):
+    """
+    Arreglo de forma (periodo, medida, día de la semana, hora) con los valores
+    del periodo anterior (índice 0) y del actual (índice 1).
+    """
+    if usar_resumenes is None:
+        usar_resumenes = settings.REPORTES_USAR_RESUMENES
+    filas = list((_filas_resumen if usar_resumenes else _filas_ventas)(desde, hasta))
+
+    cubo = np.zeros((2, len(MEDIDAS), 7, 24))
+    if filas:
+        periodo = np.array([fila['periodo'] for fila in filas])
+        dia = np.array([fila['dia_semana'] for fila in filas]) - 1
+        hora = np.array([fila['hora'] for fila in filas])
+        for i, medida in enumerate(MEDIDAS):
+            valores = np.array([float(fila[medida] or 0) for fila in filas])
+            np.add.at(cubo, (periodo, i, dia, hora), valores)
+    return cubo
+
+
+def _variacion(actual, anterior):
+    """Diferencia y variación porcentual; sin base de comparación la variación es None"""
+    diferencia = actual - anterior
+    with np.errstate(divide='ignore', invalid='ignore'):
+        porcentaje = np.where(anterior != 0, diferencia / np.abs(anterior) * 100, np.nan)
+    porcentaje = np.round(porcentaje, 2)
+    return np.round(diferencia, 2), porcentaje
+
+
+def _lista(valores):
+    """Convierte un arreglo en listas anidadas cambiando NaN por None"""
+    if np.ndim(valores) == 0:
+        return None if np.isnan(valores) else float(valores)
+    return [_lista(v) for v in valores]
+
+
+def mapa_calor(desde, hasta, medida='total', usar_resumenes=None):
+    """Matriz 7 x 24 (lunes a domingo, 0 a 23 h) de la medida en [desde, hasta]"""
+    cubo = cubo_periodos(desde, hasta, usar_resumenes)
+    indice = MEDIDAS.index(medida)
+    actual = cubo[ACTUAL, indice]
+    diferencia, porcentaje = _variacion(actual, cubo[ANTERIOR, indice])
+
+    return {
+        'inicio': desde,
+        'fin': hasta,
+        'medida': medida,
+        'dias': list(DIAS_SEMANA),
+        'horas': list(range(24)),
+        'valores': _lista(np.round(actual, 2)),
+        'total_por_dia': _lista(np.round(actual.sum(axis=1), 2)),
+        'total_por_hora': _lista(np.round(actual.sum(axis=0), 2)),
+        'diferencia_periodo_anterior': _lista(diferencia),
+        'variacion_pct_periodo_anterior': _lista(porcentaje),
+    }
+
+
+def comparativo(desde, hasta, usar_resumenes=None):
+    """Totales del periodo [desde, hasta] contra el periodo anterior de la misma duración"""
+    cubo = cubo_periodos(desde, hasta, usar_resumenes)
+    totales = cubo.sum(axis=(2, 3))
+    por_dia = cubo.sum(axis=3)
+    anterior_desde, anterior_hasta = periodo_anterior(desde, hasta)
+
+    diferencia, porcentaje = _variacion(totales[ACTUAL], totales[ANTERIOR])
+    diferencia_dia, porcentaje_dia = _variacion(por_dia[ACTUAL], por_dia[ANTERIOR])
+
+    return {
+        'actual': {'inicio': desde, 'fin': hasta},
+        'anterior': {'inicio': anterior_desde, 'fin': anterior_hasta},
+        'medidas': {
+            medida: {
+                'actual': round(float(totales[ACTUAL, i]), 2),
+                'anterior': round(float(totales[ANTERIOR, i]), 2),
+                'diferencia': _lista(diferencia[i]),
+                'variacion_pct': _lista(porcentaje[i]),
+            }
+            for i, medida in enumerate(MEDIDAS)
+        },
+        'por_dia_semana': [
+            {
+                'dia': nombre,
+                **{
+                    medida: {
+                        'actual': round(float(por_dia[ACTUAL, i, d]), 2),
+                        'anterior': round(float(por_dia[ANTERIOR, i, d]), 2),
+                        'diferencia': _lista(diferencia_dia[i, d]),
+                        'variacion_pct': _lista(porcentaje_dia[i, d]),
+                    }
+                    for i, medida in enumerate(MEDIDAS)
+                }
+            }
+            for d, nombre in enumerate(DIAS_SEMANA)
+        ],
+    }
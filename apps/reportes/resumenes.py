@@ -0,0 +1,145 @@
+"""
+Mantenimiento de las tablas de resumen usadas por los reportes.
+
+Cada fila se recalcula desde una consulta agrupada sobre detalles_venta y se
+guarda con un upsert (INSERT ... ON CONFLICT DO UPDATE), así que dos procesos
+que recalculan la misma fila no chocan con la restricción única. Después se
+borran las filas del alcance que ya no tienen ventas (las que no se tocaron).
+
+Al registrar o cancelar una venta solo se recalculan sus filas
+(`refrescar_resumenes_venta`); la reconstrucción por rango de días corrige
+lo que se haya perdido. Funciona igual en PostgreSQL y en SQLite.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractHour, TruncDate
+from django.utils import timezone
+
+from apps.core.fechas import rango_dias
+from apps.ventas.models import Venta, DetalleVenta
+from .models import ResumenCategoriaDiario, ResumenVentasHora
+from .cache import invalidar
+
+
+CAMPOS_CATEGORIA = ('ventas_total', 'cantidad_vendida', 'utilidad_total', 'num_ventas', 'fecha_actualizacion')
+CAMPOS_HORA = ('num_ventas', 'ventas_total', 'utilidad_total', 'fecha_actualizacion')
+
+
+def _guardar(resumenes, claves, campos, alcance):
+    """
+    Inserta o actualiza `resumenes` y borra las filas de `alcance` que no se
+    tocaron: las de claves que ya no tienen ventas.
+    """
+    marca = timezone.now()
+    with transaction.atomic():
+        alcance.model.objects.bulk_create(
+            resumenes, batch_size=1000, update_conflicts=True,
+            unique_fields=claves, update_fields=campos
+        )
+        alcance.filter(fecha_actualizacion__lt=marca).delete()
+    return len(resumenes)
+
+
+def _resumenes_categorias(inicio, fin, categorias=None):
+    detalles = DetalleVenta.objects.filter(
+        venta__fecha__gte=inicio,
+        venta__fecha__lt=fin,
+        venta__cancelada=False
+    )
+    if categorias is not None:
+        detalles = detalles.filter(producto__categoria_id__in=categorias)
+
+    filas = detalles.annotate(
+        dia=TruncDate('venta__fecha')
+    ).values('producto__categoria_id', 'dia').annotate(
+        ventas_total=Sum('subtotal'),
+        cantidad_vendida=Sum('cantidad'),
+        utilidad_total=Sum('utilidad'),
+        num_ventas=Count('venta', distinct=True)
+    ).order_by()
+
+    return [
+        ResumenCategoriaDiario(
+            categoria_id=fila['producto__categoria_id'],
+            fecha=fila['dia'],
+            ventas_total=fila['ventas_total'],
+            cantidad_vendida=fila['cantidad_vendida'],
+            utilidad_total=fila['utilidad_total'],
+            num_ventas=fila['num_ventas'],
+        )
+        for fila in filas
+    ]
+
+
+def refrescar_resumen_categorias(desde, hasta):
+    """Reconstruye el resumen por categoría de los días locales [desde, hasta]"""
+    filas = _guardar(
+        _resumenes_categorias(*rango_dias(desde, hasta)),
+        ['categoria', 'fecha'], CAMPOS_CATEGORIA,
+        ResumenCategoriaDiario.objects.filter(fecha__gte=desde, fecha__lte=hasta)
+    )
+    invalidar('ventas')
+    return filas
+
+
+def refrescar_resumenes_venta(venta):
+    """Recalcula solo las filas de resumen del día, la hora y las categorías de `venta`"""
+    fecha = timezone.localdate(venta.fecha)
+    categorias = set(venta.detalles.values_list('producto__categoria_id', flat=True))
+    filas = _guardar(
+        _resumenes_categorias(*rango_dias(fecha), categorias=categorias),
+        ['categoria', 'fecha'], CAMPOS_CATEGORIA,
+        ResumenCategoriaDiario.objects.filter(fecha=fecha, categoria_id__in=categorias)
+    )
+    inicio = timezone.localtime(venta.fecha).replace(minute=0, second=0, microsecond=0)
+    filas += _guardar(
+        _resumenes_horas(inicio, inicio + timedelta(hours=1)),
+        ['fecha', 'hora'], CAMPOS_HORA,
+        ResumenVentasHora.objects.filter(fecha=fecha, hora=inicio.hour)
+    )
+    invalidar('ventas')
+    return filas
+
+
+def _resumenes_horas(inicio, fin):
+    filas = Venta.objects.filter(
+        fecha__gte=inicio,
+        fecha__lt=fin,
+        cancelada=False
+    ).annotate(
+        dia=TruncDate('fecha'),
+        hora=ExtractHour('fecha')
+    ).values('dia', 'hora').annotate(
+        num_ventas=Count('id'),
+        ventas_total=Sum('total'),
+        utilidad_total=Sum('utilidad_total')
+    ).order_by()
+
+    return [
+        ResumenVentasHora(
+            fecha=fila['dia'],
+            hora=fila['hora'],
+            num_ventas=fila['num_ventas'],
+            ventas_total=fila['ventas_total'],
+            utilidad_total=fila['utilidad_total'],
+        )
+        for fila in filas
+    ]
+
+
+def refrescar_resumen_horas(desde, hasta):
+    """Reconstruye el resumen por día y hora local de los días [desde, hasta]"""
+    filas = _guardar(
+        _resumenes_horas(*rango_dias(desde, hasta)),
+        ['fecha', 'hora'], CAMPOS_HORA,
+        ResumenVentasHora.objects.filter(fecha__gte=desde, fecha__lte=hasta)
+    )
+    invalidar('ventas')
+    return filas
+
+
+def refrescar_resumenes(desde, hasta):
+    """Reconstruye todas las tablas de resumen del rango de días locales [desde, hasta]"""
+    return refrescar_resumen_categorias(desde, hasta) + refrescar_resumen_horas(desde, hasta)
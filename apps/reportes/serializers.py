@@ -7,4 +7,16 @@ class ReporteGeneradoSerializer(serializers.ModelSerializer):
     class Meta:
         model = ReporteGenerado
         fields = '__all__'
-        read_only_fields = ('usuario', 'fecha_generacion')
\ No newline at end of file
+        read_only_fields = ('usuario', 'fecha_generacion', 'archivo', 'estado', 'progreso',
+                            'mensaje_error', 'fecha_finalizacion')
+    
+    def validate(self, data):
+        fecha_inicio = data.get('fecha_inicio', getattr(self.instance, 'fecha_inicio', None))
+        fecha_fin = data.get('fecha_fin', getattr(self.instance, 'fecha_fin', None))
+        
+        if fecha_inicio and fecha_fin and fecha_inicio > fecha_fin:
+            raise serializers.ValidationError(
+                "La fecha de inicio no puede ser posterior a la fecha de fin"
+            )
+        
+        return data
\ No newline at end of file
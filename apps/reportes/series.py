@@ -0,0 +1,173 @@
+"""
+Series de tiempo de ventas con periodos en la zona horaria del negocio.
+
+La base de datos agrupa por periodo (y dimensión); NumPy genera el eje
+completo de periodos y acomoda cada grupo en su posición, de modo que los
+periodos sin ventas quedan en cero y todas las series tienen la misma longitud.
+"""
+from datetime import timedelta
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, Sum
+from django.db.models.functions import Trunc
+
+from apps.core.fechas import rango_dias
+from apps.ventas.models import Venta, DetalleVenta
+
+ZONA_HORARIA = ZoneInfo(settings.TIME_ZONE)
+
+# granularidad: (kind de Trunc, unidad de numpy, paso)
+GRANULARIDADES = {
+    'hora': ('hour', 'h', 1),
+    'dia': ('day', 'D', 1),
+    'semana': ('week', 'D', 7),
+    'mes': ('month', 'M', 1),
+}
+
+MEDIDAS_VENTA = {
+    'total': lambda: Sum('total'),
+    'num_ventas': lambda: Count('id'),
+    'utilidad': lambda: Sum('utilidad_total'),
+}
+
+MEDIDAS_DETALLE = {
+    'unidades': lambda: Sum('cantidad'),
+}
+
+MEDIDAS = tuple(MEDIDAS_VENTA) + tuple(MEDIDAS_DETALLE)
+
+DIMENSIONES = {
+    'metodo_pago': 'metodo_pago',
+    'usuario': 'usuario__username',
+}
+
+MAX_PERIODOS = 5000
+
+
+class SerieInvalida(ValueError):
+    pass
+
+
+def eje_periodos(desde, hasta, granularidad):
+    """Inicio local de cada periodo que toca los días [desde, hasta], como datetime64"""
+    _, unidad, paso = GRANULARIDADES[granularidad]
+    fin = np.datetime64(hasta + timedelta(days=1), 'D')
+
+    if granularidad == 'semana':
+        inicio = np.datetime64(desde - timedelta(days=desde.weekday()), 'D')
+    else:
+        inicio = np.datetime64(desde, unidad)
+
+    if granularidad == 'mes':
+        fin = np.datetime64(hasta, 'M') + 1
+
+    return np.arange(inicio, fin.astype(f'datetime64[{unidad}]'), np.timedelta64(paso, unidad))
+
+
+def _etiquetas(periodos, granularidad):
+    if granularidad == 'hora':
+        return [str(p) + ':00' for p in periodos]
+    return [str(p) for p in periodos]
+
+
+def _a_local(valor, unidad):
+    return np.datetime64(valor.astimezone(ZONA_HORARIA).replace(tzinfo=None), unidad)
+
+
+def _agrupar(queryset, campo_fecha, granularidad, dimension, medidas):
+    kind = GRANULARIDADES[granularidad][0]
+    campos = ['periodo'] + ([dimension] if dimension else [])
+    return queryset.annotate(
+        periodo=Trunc(campo_fecha, kind, tzinfo=ZONA_HORARIA)
+    ).values(*campos).annotate(**medidas).order_by()
+
+
+def serie_temporal(desde, hasta, granularidad='dia', medidas=('total', 'num_ventas'), agrupar_por=None):
+    """
+    Series de ventas de los días locales [desde, hasta], con un valor por periodo
+    (incluyendo los periodos sin ventas) para cada medida y grupo.
+    """
+    if granularidad not in GRANULARIDADES:
+        raise SerieInvalida(f"Granularidad inválida. Opciones: {', '.join(GRANULARIDADES)}")
+    desconocidas = set(medidas) - set(MEDIDAS)
+    if desconocidas or not medidas:
+        raise SerieInvalida(f"Medidas inválidas. Opciones: {', '.join(MEDIDAS)}")
+    if agrupar_por and agrupar_por not in DIMENSIONES:
+        raise SerieInvalida(f"Dimensión inválida. Opciones: {', '.join(DIMENSIONES)}")
+    if desde > hasta:
+        raise SerieInvalida("La fecha de inicio no puede ser posterior a la fecha de fin")
+
+    periodos = eje_periodos(desde, hasta, granularidad)
+    if len(periodos) > MAX_PERIODOS:
+        raise SerieInvalida(
+            f"El rango genera {len(periodos)} periodos; el máximo es {MAX_PERIODOS}. "
+            "Use una granularidad mayor."
+        )
+    unidad = GRANULARIDADES[granularidad][1]
+
+    inicio, fin = rango_dias(desde, hasta)
+    dimension = DIMENSIONES.get(agrupar_por)
+
+    filas = []
+    medidas_venta = {m: MEDIDAS_VENTA[m]() for m in medidas if m in MEDIDAS_VENTA}
+    if medidas_venta:
+        ventas = Venta.objects.filter(fecha__gte=inicio, fecha__lt=fin, cancelada=False)
+        filas += [
+            (fila['periodo'], fila.get(dimension), medida, fila[medida])
+            for fila in _agrupar(ventas, 'fecha', granularidad, dimension, medidas_venta)
+            for medida in medidas_venta
+        ]
+
+    medidas_detalle = {m: MEDIDAS_DETALLE[m]() for m in medidas if m in MEDIDAS_DETALLE}
+    if medidas_detalle:
+        detalles = DetalleVenta.objects.filter(
+            venta__fecha__gte=inicio, venta__fecha__lt=fin, venta__cancelada=False
+        )
+        dimension_detalle = f'venta__{dimension}' if dimension else None
+        filas += [
+            (fila['periodo'], fila.get(dimension_detalle), medida, fila[medida])
+            for fila in _agrupar(detalles, 'venta__fecha', granularidad, dimension_detalle, medidas_detalle)
+            for medida in medidas_detalle
+        ]
+
+    grupos = sorted({grupo for _, grupo, _, _ in filas}, key=lambda g: (g is None, g or ''))
+    if not grupos:
+        grupos = [None]
+
+    # Índices de cada fila en el cubo grupo x medida x periodo
+    valores = np.zeros((len(grupos), len(medidas), len(periodos)))
+    if filas:
+        posicion_grupo = {grupo: i for i, grupo in enumerate(grupos)}
+        posicion_medida = {medida: i for i, medida in enumerate(medidas)}
+        fechas = np.array([_a_local(periodo, unidad) for periodo, _, _, _ in filas])
+        indice_periodo = np.clip(np.searchsorted(periodos, fechas), 0, len(periodos) - 1)
+        indice_grupo = np.array([posicion_grupo[grupo] for _, grupo, _, _ in filas])
+        indice_medida = np.array([posicion_medida[medida] for _, _, medida, _ in filas])
+        datos = np.array([float(valor or 0) for _, _, _, valor in filas])
+        # Solo se acomodan los grupos cuyo periodo coincide exactamente con el eje
+        validos = periodos[indice_periodo] == fechas
+        np.add.at(
+            valores,
+            (indice_grupo[validos], indice_medida[validos], indice_periodo[validos]),
+            datos[validos]
+        )
+
+    valores = np.round(valores, 2)
+    series = []
+    for i, grupo in enumerate(grupos):
+        serie = {'grupo': grupo}
+        for j, medida in enumerate(medidas):
+            serie[medida] = valores[i, j].tolist()
+        series.append(serie)
+
+    return {
+        'granularidad': granularidad,
+        'zona_horaria': settings.TIME_ZONE,
+        'inicio': desde,
+        'fin': hasta,
+        'agrupar_por': agrupar_por,
+        'periodos': _etiquetas(periodos, granularidad),
+        'series': series,
+    }
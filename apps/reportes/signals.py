@@ -0,0 +1,23 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from apps.ventas.models import Venta
+from .tasks import refrescar_resumenes_de_venta
+
+# La caché de reportes se invalida con las señales de apps.core (modelo_modificado)
+
+@receiver(post_save, sender=Venta)
+def venta_actualizar_resumenes(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Recalcula las filas de resumen de la venta cuando cambian sus totales
+    o se cancela. Al crearse todavía no tiene detalles: se recalcula cuando
+    calcular_totales la guarda de nuevo.
+    """
+    if created:
+        return
+    if update_fields is not None and not {'total', 'cancelada'} & set(update_fields):
+        return
+    
+    venta_id = instance.pk
+    transaction.on_commit(lambda: refrescar_resumenes_de_venta.delay(venta_id))
@@ -0,0 +1,69 @@
+import logging
+from datetime import date, timedelta
+
+from celery import shared_task
+from django.utils import timezone
+
+from apps.core.replicas import leer_de_replica
+from apps.ventas.models import Venta
+from .models import ReporteGenerado
+from .generadores import generar_archivo
+from .resumenes import refrescar_resumenes, refrescar_resumenes_venta
+from .abc import clasificar_productos
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def generar_reporte(reporte_id):
+    """Genera el archivo de un ReporteGenerado y registra su avance"""
+    reporte = ReporteGenerado.objects.get(pk=reporte_id)
+    reporte.mensaje_error = ''
+    reporte.actualizar_progreso(10, estado='procesando')
+
+    try:
+        # Los datos del reporte se leen de la réplica; el avance se escribe en default
+        with leer_de_replica():
+            archivo = generar_archivo(reporte, progreso=reporte.actualizar_progreso)
+        with archivo:
+            reporte.archivo.save(archivo.name, archivo, save=False)
+    except Exception as e:
+        logger.exception("Error al generar el reporte %s", reporte_id)
+        reporte.estado = 'error'
+        reporte.mensaje_error = str(e)
+        reporte.fecha_finalizacion = timezone.now()
+        reporte.save(update_fields=['estado', 'mensaje_error', 'fecha_finalizacion'])
+        return
+
+    reporte.estado = 'completado'
+    reporte.progreso = 100
+    reporte.fecha_finalizacion = timezone.now()
+    reporte.save(update_fields=['archivo', 'estado', 'progreso', 'fecha_finalizacion'])
+
+
+@shared_task
+def refrescar_resumen_dia(fecha):
+    """Recalcula los resúmenes de un día local (fecha en formato ISO)"""
+    dia = date.fromisoformat(fecha)
+    refrescar_resumenes(dia, dia)
+
+
+@shared_task
+def refrescar_resumenes_de_venta(venta_id):
+    """Recalcula las filas de resumen que dependen de una venta"""
+    venta = Venta.objects.filter(pk=venta_id).first()
+    if venta is not None:
+        refrescar_resumenes_venta(venta)
+
+
+@shared_task
+def refrescar_resumenes_recientes(dias=2):
+    """Reconstrucción programada de los últimos días, por si se perdió algún cambio incremental"""
+    hoy = timezone.localdate()
+    refrescar_resumenes(hoy - timedelta(days=dias - 1), hoy)
+
+
+@shared_task
+def clasificar_productos_abc(dias=90):
+    """Recalcula la clasificación ABC guardada en los productos"""
+    return clasificar_productos(dias)
@@ -1,3 +1,442 @@
-from django.test import TestCase
+import io
+import itertools
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest.mock import patch
 
-# Create your tests here.
+import numpy as np
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import QueryDict
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from openpyxl import load_workbook
+from rest_framework.test import APIClient
+
+from apps.core import cache as cache_compartida
+from apps.inventario.models import Categoria, Producto
+from apps.usuarios.models import Usuario
+from apps.ventas.models import DetalleVenta, Venta
+from .cache import normalizar_parametros, versiones
+from .models import ReporteGenerado, ResumenCategoriaDiario, ResumenVentasHora
+from .series import eje_periodos
+from .periodos import comparativo
+from .resumenes import refrescar_resumenes_venta
+from .abc import clasificar
+
+
+class CacheReportesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.usuario = Usuario.objects.create_user(username='gerente', password='gerente123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+        self.categoria = Categoria.objects.create(nombre='Bebidas')
+        Producto.objects.create(
+            codigo='P-001', nombre='Refresco', categoria=self.categoria,
+            stock=5, stock_minimo=10,
+            precio_costo=Decimal('10.00'), precio_venta=Decimal('15.00'),
+        )
+
+    def test_parametros_normalizados(self):
+        self.assertEqual(
+            normalizar_parametros(QueryDict('dias=30&b=&a=1')),
+            normalizar_parametros(QueryDict('a=1&dias=30')),
+        )
+
+    def test_hit_y_invalidacion_por_dominio(self):
+        url = '/api/reportes/analisis/inventario_actual/'
+        primera = self.client.get(url)
+        self.assertEqual(primera.data['resumen']['productos_stock_bajo'], 1)
+
+        with self.assertNumQueries(0):
+            segunda = self.client.get(url)
+        self.assertEqual(segunda.data, primera.data)
+
+        Producto.objects.update(stock=50)
+        Producto.objects.get(codigo='P-001').save()
+
+        tercera = self.client.get(url)
+        self.assertEqual(tercera.data['resumen']['productos_stock_bajo'], 0)
+
+        metricas = self.client.get('/api/reportes/analisis/cache_metricas/').data
+        self.assertEqual(metricas['inventario_actual']['hits'], 1)
+        self.assertEqual(metricas['inventario_actual']['misses'], 2)
+
+    def test_un_solo_contador_por_modelo(self):
+        url = '/api/reportes/analisis/inventario_actual/'
+        self.client.get(url)
+        antes = cache_compartida.versiones(Producto)
+
+        # Un update() masivo solo incrementa la versión del modelo en la caché compartida
+        Producto.objects.update(stock=50)
+        cache_compartida.invalidar_modelos(Producto)
+
+        self.assertEqual(versiones('inventario')[0], antes[0] + 1)
+        self.assertEqual(self.client.get(url).data['resumen']['productos_stock_bajo'], 0)
+
+
+class GeneracionReportesTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media_root))
+        self.usuario = Usuario.objects.create_user(username='gerente', password='gerente123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+        categoria = Categoria.objects.create(nombre='Abarrotes')
+        Producto.objects.create(
+            codigo='P-100', nombre='Frijol', categoria=categoria, stock=20,
+            precio_costo=Decimal('18.00'), precio_venta=Decimal('25.00'),
+        )
+
+    def solicitar(self, tipo, formato):
+        with self.captureOnCommitCallbacks(execute=True):
+            respuesta = self.client.post('/api/reportes/generados/', {
+                'nombre': f'{tipo} {formato}', 'tipo': tipo, 'formato': formato,
+                'fecha_inicio': '2024-01-01', 'fecha_fin': '2024-12-31',
+            })
+        self.assertEqual(respuesta.status_code, 201)
+        return ReporteGenerado.objects.get(pk=respuesta.data['id'])
+
+    def test_genera_archivo_en_cada_formato(self):
+        for formato, firma in (('CSV', b'\xef\xbb\xbf'), ('XLSX', b'PK'), ('PDF', b'%PDF')):
+            reporte = self.solicitar('inventario', formato)
+            self.assertEqual(reporte.estado, 'completado')
+            self.assertEqual(reporte.progreso, 100)
+            with reporte.archivo.open('rb') as archivo:
+                self.assertTrue(archivo.read().startswith(firma))
+
+    def test_estado_consultable(self):
+        reporte = self.solicitar('inventario', 'CSV')
+        respuesta = self.client.get(f'/api/reportes/generados/{reporte.pk}/estado/')
+        self.assertEqual(respuesta.data['estado'], 'completado')
+        self.assertTrue(respuesta.data['archivo'].endswith('.csv'))
+
+    def test_rango_invalido(self):
+        respuesta = self.client.post('/api/reportes/generados/', {
+            'nombre': 'x', 'tipo': 'ventas', 'formato': 'CSV',
+            'fecha_inicio': '2024-12-31', 'fecha_fin': '2024-01-01',
+        })
+        self.assertEqual(respuesta.status_code, 400)
+
+
+class ExportacionXLSXTests(TestCase):
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(username='gerente', password='gerente123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def test_libro_con_hojas(self):
+        categoria = Categoria.objects.create(nombre='Abarrotes')
+        producto = Producto.objects.create(
+            codigo='P-100', nombre='Frijol', categoria=categoria, stock=20,
+            precio_costo=Decimal('18.00'), precio_venta=Decimal('25.00'),
+        )
+        venta = Venta.objects.create(folio='V-1', metodo_pago='efectivo', usuario=self.usuario)
+        DetalleVenta.objects.create(
+            venta=venta, producto=producto, cantidad=2,
+            precio_unitario=Decimal('25.00'), costo_unitario=Decimal('18.00')
+        )
+        venta.calcular_totales()
+        # 20:30 del 15 en la Ciudad de México ya es el 16 en UTC
+        Venta.objects.filter(pk=venta.pk).update(fecha=timezone.make_aware(datetime(2024, 1, 15, 20, 30)))
+
+        respuesta = self.client.get(
+            '/api/reportes/analisis/exportar_xlsx/?fecha_inicio=2024-01-01&fecha_fin=2024-01-31'
+        )
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn('attachment', respuesta['Content-Disposition'])
+
+        libro = load_workbook(io.BytesIO(b''.join(respuesta.streaming_content)), read_only=True)
+        self.assertEqual(libro.sheetnames, ['Resumen', 'Por día', 'Por producto', 'Detalle'])
+
+        def filas(hoja):
+            return [list(fila) for fila in libro[hoja].iter_rows(values_only=True)]
+
+        self.assertEqual(filas('Resumen'), [
+            ['Concepto', 'Valor'],
+            ['Inicio', datetime(2024, 1, 1)],
+            ['Fin', datetime(2024, 2, 1)],
+            ['Número de ventas', 1],
+            ['Monto total', 58],
+            ['Unidades vendidas', 2],
+            ['Utilidad', 14],
+        ])
+        self.assertEqual(filas('Por día'), [
+            ['Día', 'Número de ventas', 'Total'],
+            [datetime(2024, 1, 15), 1, 58],
+        ])
+        self.assertEqual(filas('Por producto'), [
+            ['Código', 'Producto', 'Categoría', 'Cantidad vendida', 'Total vendido', 'Utilidad'],
+            ['P-100', 'Frijol', 'Abarrotes', 2, 50, 14],
+        ])
+        self.assertEqual(filas('Detalle'), [
+            ['Fecha', 'Folio', 'Código', 'Producto', 'Cantidad', 'Precio unitario',
+             'Subtotal', 'Costo unitario', 'Utilidad'],
+            [datetime(2024, 1, 15, 20, 30), 'V-1', 'P-100', 'Frijol', 2, 25, 50, 18, 14],
+        ])
+
+    def test_requiere_rango(self):
+        respuesta = self.client.get('/api/reportes/analisis/exportar_xlsx/')
+        self.assertEqual(respuesta.status_code, 400)
+
+
+class ResumenCategoriasTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.usuario = Usuario.objects.create_user(username='cajero', password='cajero123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+        self.bebidas = Categoria.objects.create(nombre='Bebidas')
+        self.limpieza = Categoria.objects.create(nombre='Limpieza')
+        self.refresco = Producto.objects.create(
+            codigo='P-001', nombre='Refresco', categoria=self.bebidas, stock=50,
+            precio_costo=Decimal('10.00'), precio_venta=Decimal('15.00'),
+        )
+
+    def vender(self, cantidad):
+        with self.captureOnCommitCallbacks(execute=True):
+            respuesta = self.client.post('/api/ventas/', {
+                'metodo_pago': 'efectivo',
+                'detalles': [{'producto': self.refresco.pk, 'cantidad': cantidad, 'precio_unitario': '15.00'}],
+            }, format='json')
+        self.assertEqual(respuesta.status_code, 201)
+        return respuesta
+
+    def test_resumen_incremental_y_cancelacion(self):
+        self.vender(2)
+        self.vender(3)
+
+        resumen = ResumenCategoriaDiario.objects.get(categoria=self.bebidas)
+        self.assertEqual(resumen.cantidad_vendida, 5)
+        self.assertEqual(resumen.ventas_total, Decimal('75.00'))
+        self.assertEqual(resumen.num_ventas, 2)
+
+        categorias = self.client.get('/api/reportes/analisis/rendimiento_categorias/').data
+        self.assertEqual(categorias[0]['nombre'], 'Bebidas')
+        self.assertEqual(categorias[0]['utilidad_total'], Decimal('25.00'))
+        self.assertIsNone(categorias[1]['ventas_total'])
+
+        venta = Venta.objects.latest('id')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/ventas/{venta.pk}/cancelar/')
+
+        resumen = ResumenCategoriaDiario.objects.get(categoria=self.bebidas)
+        self.assertEqual(resumen.cantidad_vendida, 2)
+
+    def test_venta_solo_recalcula_sus_filas(self):
+        # Fila que una reconstrucción del día completo borraría
+        ResumenCategoriaDiario.objects.create(
+            categoria=self.limpieza, fecha=timezone.localdate(), ventas_total=Decimal('9.00')
+        )
+        self.vender(2)
+
+        venta = Venta.objects.latest('id')
+        refrescar_resumenes_venta(venta)
+        refrescar_resumenes_venta(venta)
+
+        self.assertEqual(ResumenCategoriaDiario.objects.get(categoria=self.bebidas).cantidad_vendida, 2)
+        self.assertEqual(ResumenCategoriaDiario.objects.get(categoria=self.limpieza).ventas_total, Decimal('9.00'))
+
+    def test_venta_solo_recalcula_su_hora(self):
+        ahora = timezone.localtime()
+        otra_hora = (ahora.hour + 1) % 24
+        ResumenVentasHora.objects.create(fecha=ahora.date(), hora=otra_hora, num_ventas=4)
+        self.vender(2)
+        self.vender(1)
+
+        resumen = ResumenVentasHora.objects.get(fecha=ahora.date(), hora=ahora.hour)
+        self.assertEqual(resumen.num_ventas, 2)
+        self.assertEqual(resumen.ventas_total, Decimal('52.20'))
+        self.assertEqual(ResumenVentasHora.objects.get(hora=otra_hora).num_ventas, 4)
+
+    def test_comando_reconstruye(self):
+        self.vender(4)
+        ResumenCategoriaDiario.objects.all().delete()
+
+        call_command('refrescar_resumenes', '--todo', stdout=io.StringIO())
+
+        self.assertEqual(ResumenCategoriaDiario.objects.get(categoria=self.bebidas).cantidad_vendida, 4)
+
+    def test_mapa_calor_y_comparativo(self):
+        self.vender(2)
+        self.vender(3)
+        anterior = Venta.objects.earliest('id')
+        Venta.objects.filter(pk=anterior.pk).update(fecha=anterior.fecha - timedelta(days=7))
+        call_command('refrescar_resumenes', '--dias', '8', stdout=io.StringIO())
+
+        ahora = timezone.localtime()
+        hoy = ahora.date()
+        parametros = {'fecha_inicio': (hoy - timedelta(days=6)).isoformat(), 'fecha_fin': hoy.isoformat()}
+
+        mapa = self.client.get('/api/reportes/analisis/mapa_calor/', parametros).data
+        self.assertEqual(len(mapa['valores']), 7)
+        self.assertEqual(mapa['valores'][ahora.weekday()][ahora.hour], 52.2)
+        self.assertEqual(mapa['variacion_pct_periodo_anterior'][ahora.weekday()][ahora.hour], 50.0)
+        self.assertIsNone(mapa['variacion_pct_periodo_anterior'][ahora.weekday()][(ahora.hour + 1) % 24])
+
+        datos = self.client.get('/api/reportes/analisis/comparativo_periodos/', parametros).data
+        self.assertEqual(datos['medidas']['num_ventas'], {
+            'actual': 1.0, 'anterior': 1.0, 'diferencia': 0.0, 'variacion_pct': 0.0
+        })
+        self.assertEqual(datos['medidas']['total']['diferencia'], 17.4)
+        self.assertEqual(comparativo(hoy - timedelta(days=6), hoy, usar_resumenes=False), datos)
+
+
+class SerieTemporalTests(TestCase):
+    def test_eje_de_periodos(self):
+        from datetime import date
+        self.assertEqual(len(eje_periodos(date(2024, 1, 1), date(2024, 1, 31), 'dia')), 31)
+        self.assertEqual(len(eje_periodos(date(2024, 1, 1), date(2024, 1, 2), 'hora')), 48)
+        self.assertEqual(len(eje_periodos(date(2024, 1, 3), date(2024, 1, 16), 'semana')), 3)
+        self.assertEqual(len(eje_periodos(date(2024, 1, 15), date(2024, 3, 1), 'mes')), 3)
+
+    def test_serie_rellena_periodos_vacios(self):
+        usuario = Usuario.objects.create_user(username='cajero', password='cajero123')
+        client = APIClient()
+        client.force_authenticate(usuario)
+        categoria = Categoria.objects.create(nombre='Bebidas')
+        producto = Producto.objects.create(
+            codigo='P-001', nombre='Refresco', categoria=categoria, stock=50,
+            precio_costo=Decimal('10.00'), precio_venta=Decimal('15.00'),
+        )
+        for metodo in ('efectivo', 'tarjeta', 'efectivo'):
+            client.post('/api/ventas/', {
+                'metodo_pago': metodo,
+                'detalles': [{'producto': producto.pk, 'cantidad': 2, 'precio_unitario': '15.00'}],
+            }, format='json')
+
+        hoy = timezone.localdate()
+        respuesta = client.get('/api/reportes/analisis/serie_temporal/', {
+            'fecha_inicio': (hoy - timedelta(days=6)).isoformat(),
+            'fecha_fin': hoy.isoformat(),
+            'medidas': 'num_ventas,unidades',
+            'agrupar_por': 'metodo_pago',
+        })
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(len(respuesta.data['periodos']), 7)
+
+        efectivo, tarjeta = respuesta.data['series']
+        self.assertEqual(efectivo['grupo'], 'efectivo')
+        self.assertEqual(efectivo['num_ventas'], [0.0] * 6 + [2.0])
+        self.assertEqual(efectivo['unidades'][-1], 4.0)
+        self.assertEqual(tarjeta['num_ventas'][-1], 1.0)
+
+    def test_parametros_invalidos(self):
+        usuario = Usuario.objects.create_user(username='cajero', password='cajero123')
+        client = APIClient()
+        client.force_authenticate(usuario)
+        respuesta = client.get('/api/reportes/analisis/serie_temporal/', {'granularidad': 'minuto'})
+        self.assertEqual(respuesta.status_code, 400)
+
+
+class ClasificacionABCTests(TestCase):
+    def test_clasificar_vectorizado(self):
+        valores = np.array([[10, 5, 1], [70, -2, 1], [0, 0, 0], [20, 7, 8]], dtype=float)
+        resultado = clasificar(valores)
+
+        self.assertEqual(resultado['clase'][:, 0].tolist(), ['B', 'A', 'C', 'A'])
+        self.assertEqual(resultado['clase'][:, 1].tolist(), ['A', 'C', 'C', 'A'])
+        self.assertEqual(resultado['clase'][:, 2].tolist(), ['B', 'B', 'C', 'A'])
+        self.assertAlmostEqual(resultado['acumulada'][0, 0], 1.0)
+
+    def test_comando_guarda_clases(self):
+        usuario = Usuario.objects.create_user(username='cajero', password='cajero123')
+        client = APIClient()
+        client.force_authenticate(usuario)
+        categoria = Categoria.objects.create(nombre='Abarrotes')
+        productos = [
+            Producto.objects.create(
+                codigo=f'P-{i}', nombre=f'Producto {i}', categoria=categoria, stock=100,
+                precio_costo=Decimal('5.00'), precio_venta=Decimal('10.00'),
+            )
+            for i in range(3)
+        ]
+        inactivo = Producto.objects.create(
+            codigo='P-X', nombre='Descontinuado', categoria=categoria, stock=100,
+            precio_costo=Decimal('5.00'), precio_venta=Decimal('10.00'),
+        )
+        productos_vendidos = [*productos, inactivo]
+        for producto, cantidad in zip(productos_vendidos, (40, 8, 0, 50)):
+            if cantidad:
+                client.post('/api/ventas/', {
+                    'metodo_pago': 'efectivo',
+                    'detalles': [{'producto': producto.pk, 'cantidad': cantidad, 'precio_unitario': '10.00'}],
+                }, format='json')
+
+        Producto.objects.filter(pk=inactivo.pk).update(activo=False)
+        call_command('clasificar_abc', stdout=io.StringIO())
+
+        clases = dict(Producto.objects.values_list('codigo', 'clase_abc_ingresos'))
+        self.assertEqual(clases, {'P-0': 'A', 'P-1': 'B', 'P-2': 'C', 'P-X': ''})
+
+        datos = client.get('/api/reportes/analisis/clasificacion_abc/', {'criterio': 'unidades'}).data
+        self.assertEqual(datos['resumen'], {'A': 1, 'B': 1, 'C': 1})
+        self.assertEqual(datos['productos'][0]['participacion_unidades'], 83.33)
+
+
+class PresupuestoConsultasTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.usuario = Usuario.objects.create_user(username='cajero', password='cajero123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def test_rango_excedido(self):
+        respuesta = self.client.get('/api/reportes/analisis/productos_mas_vendidos/', {'dias': 3650})
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(respuesta.data['max_dias'], 366)
+        self.assertIn('/api/reportes/generados/', respuesta.data['sugerencia'])
+
+        respuesta = self.client.get('/api/reportes/analisis/analisis_financiero/', {'meses': 120})
+        self.assertEqual(respuesta.status_code, 400)
+        respuesta = self.client.get('/api/reportes/analisis/analisis_financiero/', {'meses': 12})
+        self.assertEqual(respuesta.status_code, 200)
+
+    def test_limite_de_meses(self):
+        # 24 meses calendario son a lo más 731 días, el máximo de analisis_financiero
+        url = '/api/reportes/analisis/analisis_financiero/'
+        self.assertEqual(self.client.get(url, {'meses': 24}).status_code, 200)
+        self.assertEqual(self.client.get(url, {'meses': 25}).status_code, 400)
+
+    def test_rango_abierto_hasta_hoy(self):
+        for accion in ('ventas_general', 'mapa_calor', 'comparativo_periodos'):
+            respuesta = self.client.get(f'/api/reportes/analisis/{accion}/', {'fecha_inicio': '2000-01-01'})
+            self.assertEqual(respuesta.status_code, 400, accion)
+            self.assertIn('max_dias', respuesta.data)
+
+        # Un dias corto no cubre un rango de fechas largo
+        respuesta = self.client.get('/api/reportes/analisis/ventas_general/', {
+            'dias': 1, 'fecha_inicio': '2000-01-01', 'fecha_fin': '2000-12-31'
+        })
+        self.assertEqual(respuesta.status_code, 200)
+        respuesta = self.client.get('/api/reportes/analisis/ventas_general/', {
+            'dias': 1, 'fecha_inicio': '2000-01-01', 'fecha_fin': '2001-12-31'
+        })
+        self.assertEqual(respuesta.status_code, 400)
+
+    def test_parametros_invalidos(self):
+        for accion, parametros in (
+            ('productos_mas_vendidos', {'dias': 'abc'}),
+            ('rendimiento_categorias', {'dias': '-5'}),
+            ('analisis_financiero', {'meses': 'seis'}),
+            ('ventas_general', {'fecha_inicio': '01/01/2024'}),
+        ):
+            respuesta = self.client.get(f'/api/reportes/analisis/{accion}/', parametros)
+            self.assertEqual(respuesta.status_code, 400, accion)
+
+    def test_consulta_cancelada_por_tiempo(self):
+        # Cada revisión del límite avanza el reloj 1000 s
+        with patch('apps.core.presupuesto.monotonic', side_effect=itertools.count(0, 1000)), \
+                patch('apps.core.presupuesto._PASOS_SQLITE', 1):
+            respuesta = self.client.get('/api/reportes/analisis/dashboard_metricas/')
+
+        self.assertEqual(respuesta.status_code, 503)
+        self.assertEqual(respuesta['Retry-After'], '60')
+
+        respuesta = self.client.get('/api/reportes/analisis/dashboard_metricas/')
+        self.assertEqual(respuesta.status_code, 200)
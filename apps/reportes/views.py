@@ -1,37 +1,53 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db import transaction
+from django.http import FileResponse
 from django.db.models import Sum, Count, Avg, F, Q
 from django.db.models.functions import TruncDate, TruncMonth
-from datetime import datetime, timedelta
+from datetime import timedelta
 from decimal import Decimal
 
+from apps.core.fechas import (
+    fechas_parametros, hoy, parsear_fecha, rango_dia, rango_dias, rango_mes,
+    ultimos_dias, ultimos_meses
+)
 from apps.ventas.models import Venta, DetalleVenta
 from apps.inventario.models import Producto, Categoria
 from apps.facturacion.models import Factura
+from apps.core.presupuesto import presupuesto_consulta
+from apps.core.replicas import LecturaReplicaMixin
 from .models import ReporteGenerado
 from .serializers import ReporteGeneradoSerializer
+from .cache import cachear_reporte, metricas
+from .tasks import generar_reporte
+from .exportacion import ExportadorVentasXLSX
+from .series import serie_temporal, SerieInvalida
+from .periodos import MEDIDAS as MEDIDAS_PERIODO, comparativo, mapa_calor
+from .abc import CRITERIOS as CRITERIOS_ABC, clasificacion_abc
 
-class ReporteViewSet(viewsets.ViewSet):
+class ReporteViewSet(LecturaReplicaMixin, viewsets.ViewSet):
     """
     ViewSet para generar diferentes tipos de reportes
     """
+    acciones_replica = '__all__'
     
     @action(detail=False, methods=['get'])
+    @cachear_reporte('ventas')
+    @presupuesto_consulta()
     def ventas_general(self, request):
         """Reporte general de ventas"""
-        fecha_inicio = request.query_params.get('fecha_inicio')
-        fecha_fin = request.query_params.get('fecha_fin')
-        
-        if not fecha_inicio or not fecha_fin:
-            fecha_fin = datetime.now()
-            fecha_inicio = fecha_fin - timedelta(days=30)
-        else:
-            fecha_inicio = datetime.strptime(fecha_inicio, '%Y-%m-%d')
-            fecha_fin = datetime.strptime(fecha_fin, '%Y-%m-%d')
+        try:
+            fecha_inicio, fecha_fin = rango_dias(*fechas_parametros(request.query_params, dias=31))
+        except ValueError:
+            return Response(
+                {'error': 'Las fechas deben tener el formato YYYY-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         ventas = Venta.objects.filter(
-            fecha__range=[fecha_inicio, fecha_fin],
+            fecha__gte=fecha_inicio,
+            fecha__lt=fecha_fin,
             cancelada=False
         )
         
@@ -40,7 +56,7 @@ class ReporteViewSet(viewsets.ViewSet):
             total_ventas=Count('id'),
             monto_total=Sum('total'),
             ticket_promedio=Avg('total'),
-            total_utilidad=Sum('detalles__utilidad')
+            total_utilidad=Sum('utilidad_total')
         )
         
         # Ventas por día
@@ -78,13 +94,16 @@ class ReporteViewSet(viewsets.ViewSet):
         })
     
     @action(detail=False, methods=['get'])
+    @cachear_reporte('ventas', 'inventario')
+    @presupuesto_consulta()
     def productos_mas_vendidos(self, request):
         """Productos más vendidos"""
         dias = int(request.query_params.get('dias', 30))
-        fecha_inicio = datetime.now() - timedelta(days=dias)
+        fecha_inicio, fecha_fin = ultimos_dias(dias)
         
         productos = DetalleVenta.objects.filter(
             venta__fecha__gte=fecha_inicio,
+            venta__fecha__lt=fecha_fin,
             venta__cancelada=False
         ).values(
             'producto__id',
@@ -101,6 +120,8 @@ class ReporteViewSet(viewsets.ViewSet):
         return Response(list(productos))
     
     @action(detail=False, methods=['get'])
+    @cachear_reporte('inventario')
+    @presupuesto_consulta()
     def inventario_actual(self, request):
         """Estado actual del inventario"""
         
@@ -143,36 +164,37 @@ class ReporteViewSet(viewsets.ViewSet):
         })
     
     @action(detail=False, methods=['get'])
+    @cachear_reporte('ventas', 'facturacion')
+    @presupuesto_consulta(max_dias=731)
     def analisis_financiero(self, request):
         """Análisis financiero del negocio"""
         meses = int(request.query_params.get('meses', 6))
-        fecha_inicio = datetime.now() - timedelta(days=meses*30)
+        fecha_inicio, fecha_fin = ultimos_meses(meses)
         
         # Ventas por mes
-        ventas_mensuales = Venta.objects.filter(
+        ventas_mensuales = list(Venta.objects.filter(
             fecha__gte=fecha_inicio,
+            fecha__lt=fecha_fin,
             cancelada=False
         ).annotate(
             mes=TruncMonth('fecha')
         ).values('mes').annotate(
             ingresos=Sum('total'),
             num_ventas=Count('id'),
-            ticket_promedio=Avg('total')
-        ).order_by('mes')
+            ticket_promedio=Avg('total'),
+            utilidad_total=Sum('utilidad_total')
+        ).order_by('mes'))
         
-        # Utilidades por mes
-        utilidades = DetalleVenta.objects.filter(
-            venta__fecha__gte=fecha_inicio,
-            venta__cancelada=False
-        ).annotate(
-            mes=TruncMonth('venta__fecha')
-        ).values('mes').annotate(
-            utilidad_total=Sum('utilidad')
-        ).order_by('mes')
+        # Utilidades por mes (de la misma consulta)
+        utilidades = [
+            {'mes': fila['mes'], 'utilidad_total': fila.pop('utilidad_total')}
+            for fila in ventas_mensuales
+        ]
         
         # Facturación
         facturas_stats = Factura.objects.filter(
             fecha_creacion__gte=fecha_inicio,
+            fecha_creacion__lt=fecha_fin,
             status='timbrada'
         ).aggregate(
             total_facturado=Sum('total'),
@@ -180,54 +202,42 @@ class ReporteViewSet(viewsets.ViewSet):
         )
         
         return Response({
-            'ventas_mensuales': list(ventas_mensuales),
-            'utilidades_mensuales': list(utilidades),
+            'ventas_mensuales': ventas_mensuales,
+            'utilidades_mensuales': utilidades,
             'facturacion': facturas_stats
         })
     
     @action(detail=False, methods=['get'])
+    @cachear_reporte('ventas', 'inventario')
+    @presupuesto_consulta()
     def rendimiento_categorias(self, request):
-        """Análisis de rendimiento por categoría"""
+        """Análisis de rendimiento por categoría (desde el resumen diario)"""
         dias = int(request.query_params.get('dias', 30))
-        fecha_inicio = datetime.now() - timedelta(days=dias)
+        desde = hoy() - timedelta(days=dias)
+        en_rango = Q(resumenes_diarios__fecha__gte=desde)
         
         categorias = Categoria.objects.annotate(
-            ventas_total=Sum(
-                'productos__detalleventa__subtotal',
-                filter=Q(
-                    productos__detalleventa__venta__fecha__gte=fecha_inicio,
-                    productos__detalleventa__venta__cancelada=False
-                )
-            ),
-            cantidad_vendida=Sum(
-                'productos__detalleventa__cantidad',
-                filter=Q(
-                    productos__detalleventa__venta__fecha__gte=fecha_inicio,
-                    productos__detalleventa__venta__cancelada=False
-                )
-            ),
-            utilidad_total=Sum(
-                'productos__detalleventa__utilidad',
-                filter=Q(
-                    productos__detalleventa__venta__fecha__gte=fecha_inicio,
-                    productos__detalleventa__venta__cancelada=False
-                )
-            )
+            ventas_total=Sum('resumenes_diarios__ventas_total', filter=en_rango),
+            cantidad_vendida=Sum('resumenes_diarios__cantidad_vendida', filter=en_rango),
+            utilidad_total=Sum('resumenes_diarios__utilidad_total', filter=en_rango)
         ).values(
             'nombre', 'ventas_total', 'cantidad_vendida', 'utilidad_total'
-        ).order_by('-ventas_total')
+        ).order_by(F('ventas_total').desc(nulls_last=True))
         
         return Response(list(categorias))
     
     @action(detail=False, methods=['get'])
+    @cachear_reporte('ventas', 'inventario')
+    @presupuesto_consulta()
     def dashboard_metricas(self, request):
         """Métricas para el dashboard principal"""
-        hoy = datetime.now().date()
-        inicio_mes = hoy.replace(day=1)
+        inicio_hoy, fin_hoy = rango_dia()
+        inicio_mes, fin_mes = rango_mes()
         
         # Ventas de hoy
         ventas_hoy = Venta.objects.filter(
-            fecha__date=hoy,
+            fecha__gte=inicio_hoy,
+            fecha__lt=fin_hoy,
             cancelada=False
         ).aggregate(
             total=Sum('total'),
@@ -236,12 +246,13 @@ class ReporteViewSet(viewsets.ViewSet):
         
         # Ventas del mes
         ventas_mes = Venta.objects.filter(
-            fecha__date__gte=inicio_mes,
+            fecha__gte=inicio_mes,
+            fecha__lt=fin_mes,
             cancelada=False
         ).aggregate(
             total=Sum('total'),
             cantidad=Count('id'),
-            utilidad=Sum('detalles__utilidad')
+            utilidad=Sum('utilidad_total')
         )
         
         # Productos con stock bajo
@@ -269,9 +280,160 @@ class ReporteViewSet(viewsets.ViewSet):
             }
         })
 
-class ReporteGeneradoViewSet(viewsets.ModelViewSet):
-    queryset = ReporteGenerado.objects.all()
+    @action(detail=False, methods=['get'])
+    @cachear_reporte('ventas')
+    @presupuesto_consulta()
+    def serie_temporal(self, request):
+        """Series de tiempo de ventas por hora, día, semana o mes, sin huecos"""
+        try:
+            desde, hasta = fechas_parametros(request.query_params)
+        except ValueError:
+            return Response(
+                {'error': 'Las fechas deben tener el formato YYYY-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        medidas = [m.strip() for m in request.query_params.get('medidas', 'total,num_ventas').split(',') if m.strip()]
+        
+        try:
+            datos = serie_temporal(
+                desde, hasta,
+                granularidad=request.query_params.get('granularidad', 'dia'),
+                medidas=medidas,
+                agrupar_por=request.query_params.get('agrupar_por') or None
+            )
+        except SerieInvalida as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(datos)
+    
+    @action(detail=False, methods=['get'])
+    @cachear_reporte('ventas')
+    @presupuesto_consulta()
+    def mapa_calor(self, request):
+        """Ventas por día de la semana y hora, con la variación contra el periodo anterior"""
+        try:
+            desde, hasta = fechas_parametros(request.query_params, dias=28)
+        except ValueError:
+            return Response(
+                {'error': 'Las fechas deben tener el formato YYYY-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        medida = request.query_params.get('medida', 'total')
+        if medida not in MEDIDAS_PERIODO or desde > hasta:
+            return Response(
+                {'error': f"Parámetros inválidos. Medidas: {', '.join(MEDIDAS_PERIODO)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response(mapa_calor(desde, hasta, medida))
+    
+    @action(detail=False, methods=['get'])
+    @cachear_reporte('ventas')
+    @presupuesto_consulta()
+    def comparativo_periodos(self, request):
+        """Totales del periodo contra el periodo anterior de la misma duración"""
+        try:
+            desde, hasta = fechas_parametros(request.query_params)
+        except ValueError:
+            return Response(
+                {'error': 'Las fechas deben tener el formato YYYY-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if desde > hasta:
+            return Response(
+                {'error': 'La fecha de inicio no puede ser posterior a la fecha de fin'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response(comparativo(desde, hasta))
+    
+    @action(detail=False, methods=['get'])
+    @cachear_reporte('ventas', 'inventario')
+    @presupuesto_consulta()
+    def clasificacion_abc(self, request):
+        """Clasificación ABC de todo el catálogo por ingresos, margen y unidades"""
+        dias = int(request.query_params.get('dias', 90))
+        criterio = request.query_params.get('criterio', 'ingresos')
+        
+        if criterio not in CRITERIOS_ABC:
+            return Response(
+                {'error': f"Criterio inválido. Opciones: {', '.join(CRITERIOS_ABC)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response(clasificacion_abc(dias, criterio))
+    
+    @action(detail=False, methods=['get'])
+    @presupuesto_consulta(max_dias=92)
+    def exportar_xlsx(self, request):
+        """Exporta las ventas del periodo a Excel (resumen, por día, por producto y detalle)"""
+        fecha_inicio = request.query_params.get('fecha_inicio')
+        fecha_fin = request.query_params.get('fecha_fin')
+        
+        if not fecha_inicio or not fecha_fin:
+            return Response(
+                {'error': 'Se requieren fecha_inicio y fecha_fin'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            inicio, fin = rango_dias(parsear_fecha(fecha_inicio), parsear_fecha(fecha_fin))
+        except ValueError:
+            return Response(
+                {'error': 'Las fechas deben tener el formato YYYY-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        incluir_detalle = request.query_params.get('detalle', 'true').lower() != 'false'
+        archivo = ExportadorVentasXLSX(inicio, fin, incluir_detalle=incluir_detalle).archivo_temporal()
+        
+        return FileResponse(
+            archivo,
+            as_attachment=True,
+            filename=f"ventas_{fecha_inicio}_{fecha_fin}.xlsx",
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
+    
+    @action(detail=False, methods=['get'])
+    def cache_metricas(self, request):
+        """Aciertos y fallos de la caché de reportes"""
+        return Response(metricas())
+
+class ReporteGeneradoViewSet(LecturaReplicaMixin, viewsets.ModelViewSet):
+    queryset = ReporteGenerado.objects.select_related('usuario').all()
     serializer_class = ReporteGeneradoSerializer
     
     def perform_create(self, serializer):
-        serializer.save(usuario=self.request.user)
\ No newline at end of file
+        reporte = serializer.save(usuario=self.request.user, estado='pendiente', progreso=0)
+        # Se encola al confirmar la transacción para que el worker encuentre el registro
+        transaction.on_commit(lambda: generar_reporte.delay(reporte.pk))
+    
+    @action(detail=True, methods=['get'])
+    def estado(self, request, pk=None):
+        """Estado y progreso de la generación, para consultar periódicamente"""
+        reporte = self.get_object()
+        return Response({
+            'id': reporte.id,
+            'estado': reporte.estado,
+            'progreso': reporte.progreso,
+            'mensaje_error': reporte.mensaje_error,
+            'archivo': request.build_absolute_uri(reporte.archivo.url) if reporte.archivo else None,
+        })
+    
+    @action(detail=True, methods=['post'])
+    def reintentar(self, request, pk=None):
+        """Vuelve a encolar un reporte que terminó con error"""
+        reporte = self.get_object()
+        
+        if reporte.estado != 'error':
+            return Response(
+                {'error': 'Solo se pueden reintentar reportes con error'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        reporte.actualizar_progreso(0, estado='pendiente')
+        transaction.on_commit(lambda: generar_reporte.delay(reporte.pk))
+        return Response({'status': 'Reporte encolado nuevamente'}, status=status.HTTP_202_ACCEPTED)
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import Usuario
+from .models import TokenRevocado, Usuario
 
 @admin.register(Usuario)
 class UsuarioAdmin(UserAdmin):
@@ -11,4 +11,10 @@ class UsuarioAdmin(UserAdmin):
     
     fieldsets = UserAdmin.fieldsets + (
         ('Información Adicional', {'fields': ('rol', 'telefono', 'foto', 'activo')}),
-    )
\ No newline at end of file
+    )
+
+@admin.register(TokenRevocado)
+class TokenRevocadoAdmin(admin.ModelAdmin):
+    list_display = ('jti', 'expira', 'fecha_revocacion')
+    search_fields = ('jti',)
+    date_hierarchy = 'fecha_revocacion'
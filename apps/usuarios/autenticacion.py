@@ -0,0 +1,146 @@
+"""
+Autenticación JWT sin consultar `usuarios` en cada petición.
+
+Los tokens llevan los claims id, username, rol y activo. Las lecturas (GET,
+HEAD, OPTIONS) se autentican con un UsuarioToken armado con el token firmado y
+el estado vigente del usuario, que se guarda en una caché por proceso durante
+USUARIOS_CACHE_SEGUNDOS; solo se consulta la base cuando esa caché no lo tiene
+o está vencida. Las escrituras cargan siempre el Usuario completo, porque lo
+asignan a ventas, facturas y movimientos.
+
+Guardar un Usuario (cambiar_estado, cambio de rol) invalida su entrada en el
+proceso que lo guardó; en los demás procesos el cambio se ve al vencer la caché.
+"""
+import threading
+from time import monotonic
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import Usuario
+
+CAMPOS_ESTADO = ('username', 'rol', 'activo', 'is_active', 'is_staff', 'is_superuser')
+
+_estados = {}
+_candado = threading.Lock()
+
+
+def claims_usuario(usuario):
+    """Claims que se agregan a los tokens de `usuario`"""
+    return {
+        'username': usuario.username,
+        'rol': usuario.rol,
+        'activo': usuario.activo,
+        'is_staff': usuario.is_staff,
+    }
+
+
+def guardar_estado(usuario_id, estado):
+    with _candado:
+        _estados[usuario_id] = (monotonic() + settings.USUARIOS_CACHE_SEGUNDOS, estado)
+
+
+def invalidar_usuario(usuario_id):
+    with _candado:
+        _estados.pop(usuario_id, None)
+
+
+def estado_usuario(usuario_id):
+    """Estado vigente del usuario (caché por proceso), o None si no existe"""
+    with _candado:
+        entrada = _estados.get(usuario_id)
+    if entrada is not None and entrada[0] > monotonic():
+        return entrada[1]
+
+    estado = Usuario.objects.filter(pk=usuario_id).values(*CAMPOS_ESTADO).first()
+    if estado is not None:
+        guardar_estado(usuario_id, estado)
+    return estado
+
+
+class UsuarioToken(TokenUser):
+    """
+    Usuario de solo lectura: id del token firmado; username, rol y permisos del
+    estado en caché, que refleja cambios hechos después de emitir el token.
+    """
+
+    def __init__(self, token, estado):
+        super().__init__(token)
+        self.estado = estado
+
+    def __str__(self):
+        return self.username
+
+    @property
+    def username(self):
+        return self.estado['username']
+
+    @property
+    def rol(self):
+        return self.estado['rol']
+
+    @property
+    def activo(self):
+        return self.estado['activo']
+
+    @property
+    def is_active(self):
+        return self.estado['is_active']
+
+    @property
+    def is_staff(self):
+        return self.estado['is_staff']
+
+    @property
+    def is_superuser(self):
+        return self.estado['is_superuser']
+
+
+class JWTClaimsAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication que solo carga el Usuario de la base para escrituras;
+    las lecturas usan UsuarioToken.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+
+        if request.method in SAFE_METHODS:
+            return self.get_token_user(validated_token), validated_token
+
+        usuario = self.get_user(validated_token)
+        self.verificar_activo(usuario)
+        guardar_estado(usuario.pk, {campo: getattr(usuario, campo) for campo in CAMPOS_ESTADO})
+        return usuario, validated_token
+
+    def get_token_user(self, validated_token):
+        try:
+            usuario_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        estado = estado_usuario(usuario_id)
+        if estado is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        usuario = UsuarioToken(validated_token, estado)
+        self.verificar_activo(usuario)
+        return usuario
+
+    def verificar_activo(self, usuario):
+        # `activo` es el campo que cambia cambiar_estado; is_active el de Django
+        if not usuario.is_active or not usuario.activo:
+            raise AuthenticationFailed('Usuario inactivo', code='user_inactive')
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.usuarios.revocacion import depurar_vencidos
+
+
+class Command(BaseCommand):
+    help = 'Borra los refresh tokens revocados que ya expiraron'
+
+    def handle(self, *args, **options):
+        borrados = depurar_vencidos()
+        self.stdout.write(self.style.SUCCESS(f'{borrados} tokens revocados vencidos borrados'))
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.3 on 2026-10-19 12:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenRevocado',
+            fields=[
+                ('jti', models.UUIDField(primary_key=True, serialize=False)),
+                ('expira', models.DateTimeField(db_index=True)),
+                ('fecha_revocacion', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Token revocado',
+                'verbose_name_plural': 'Tokens revocados',
+                'db_table': 'tokens_revocados',
+            },
+        ),
+    ]
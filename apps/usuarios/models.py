@@ -22,4 +22,22 @@ class Usuario(AbstractUser):
         ordering = ['-fecha_creacion']
     
     def __str__(self):
-        return f"{self.get_full_name()} ({self.rol})"
\ No newline at end of file
+        return f"{self.get_full_name()} ({self.rol})"
+
+
+class TokenRevocado(models.Model):
+    """
+    Refresh token revocado (rotación o cierre de sesión). Solo guarda el jti
+    y su expiración; las filas vencidas se borran con `depurar_tokens_revocados`.
+    """
+    jti = models.UUIDField(primary_key=True)
+    expira = models.DateTimeField(db_index=True)
+    fecha_revocacion = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        db_table = 'tokens_revocados'
+        verbose_name = 'Token revocado'
+        verbose_name_plural = 'Tokens revocados'
+    
+    def __str__(self):
+        return self.jti.hex
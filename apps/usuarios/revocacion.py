@@ -0,0 +1,152 @@
+"""
+Lista de refresh tokens revocados.
+
+Los jti revocados se guardan en `tokens_revocados`. Cada proceso mantiene un
+filtro de Bloom con los jti vigentes: si el filtro dice que un jti no está,
+no está, y el refresh no consulta la base. Solo los positivos (revocados o
+falsos positivos) se confirman con una consulta.
+
+Para ver las revocaciones de otros procesos, cada revocación incrementa una
+versión en la caché compartida; cuando cambia, el proceso agrega al filtro
+solo las filas revocadas desde su última sincronización.
+"""
+import hashlib
+import math
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import TokenRevocado
+
+VERSION_KEY = 'usuarios:revocados:version'
+
+CAPACIDAD_INICIAL = 10000
+ERROR_OBJETIVO = 0.001
+
+
+class FiltroBloom:
+    """Filtro de Bloom sobre un bytearray con doble hashing de blake2b"""
+
+    def __init__(self, capacidad, error=ERROR_OBJETIVO):
+        self.capacidad = capacidad
+        self.bits = max(8, math.ceil(-capacidad * math.log(error) / math.log(2) ** 2))
+        self.funciones = max(1, round(self.bits / capacidad * math.log(2)))
+        self.datos = bytearray((self.bits + 7) // 8)
+        self.elementos = 0
+
+    def _posiciones(self, valor):
+        digest = hashlib.blake2b(valor.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.bits for i in range(self.funciones))
+
+    def agregar(self, valor):
+        for posicion in self._posiciones(valor):
+            self.datos[posicion >> 3] |= 1 << (posicion & 7)
+        self.elementos += 1
+
+    def __contains__(self, valor):
+        return all(self.datos[posicion >> 3] & (1 << (posicion & 7)) for posicion in self._posiciones(valor))
+
+    @property
+    def lleno(self):
+        return self.elementos > self.capacidad
+
+
+def _normalizar(jti):
+    return uuid.UUID(str(jti)).hex
+
+
+class ListaRevocados:
+    """Filtro por proceso sincronizado con la tabla tokens_revocados"""
+
+    def __init__(self):
+        self._candado = threading.Lock()
+        self._filtro = None
+        self._version = None
+        self._sincronizado_hasta = None
+
+    def _cargar(self, desde=None):
+        ahora = timezone.now()
+        filas = TokenRevocado.objects.filter(expira__gt=ahora)
+        if desde is not None:
+            filas = filas.filter(fecha_revocacion__gte=desde)
+        for jti in filas.values_list('jti', flat=True).iterator(chunk_size=5000):
+            self._filtro.agregar(jti.hex)
+        self._sincronizado_hasta = ahora
+
+    def _reconstruir(self):
+        vigentes = TokenRevocado.objects.filter(expira__gt=timezone.now()).count()
+        self._filtro = FiltroBloom(max(CAPACIDAD_INICIAL, vigentes * 2))
+        self._cargar()
+
+    def sincronizar(self):
+        version = cache.get(VERSION_KEY)
+        with self._candado:
+            if self._filtro is None or self._filtro.lleno:
+                self._version = version
+                self._reconstruir()
+            elif version != self._version:
+                self._version = version
+                # Un margen de un segundo cubre revocaciones concurrentes con la sincronización
+                self._cargar(desde=self._sincronizado_hasta - timedelta(seconds=1))
+
+    def agregar(self, jti):
+        with self._candado:
+            if self._filtro is not None:
+                self._filtro.agregar(jti)
+
+    def contiene(self, jti):
+        self.sincronizar()
+        with self._candado:
+            return jti in self._filtro
+
+    def reiniciar(self):
+        with self._candado:
+            self._filtro = None
+            self._version = None
+            self._sincronizado_hasta = None
+
+
+lista_revocados = ListaRevocados()
+
+
+def _incrementar_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+
+
+def revocar(jti, exp):
+    """Revoca el refresh token con `jti`, que expira en el timestamp `exp`"""
+    jti = _normalizar(jti)
+    expira = datetime.fromtimestamp(exp, tz=dt_timezone.utc)
+    try:
+        with transaction.atomic():
+            TokenRevocado.objects.create(jti=jti, expira=expira)
+    except IntegrityError:
+        # Ya estaba revocado
+        return
+    lista_revocados.agregar(jti)
+    _incrementar_version()
+
+
+def esta_revocado(jti):
+    """True si el jti está revocado; solo consulta la base si el filtro da positivo"""
+    jti = _normalizar(jti)
+    if not lista_revocados.contiene(jti):
+        return False
+    return TokenRevocado.objects.filter(jti=jti).exists()
+
+
+def depurar_vencidos():
+    """Borra los tokens revocados que ya expiraron; regresa cuántos borró"""
+    # Los filtros de cada proceso los descartan al reconstruirse; mientras tanto
+    # un jti vencido solo puede dar un falso positivo, que la base desmiente
+    borrados, _ = TokenRevocado.objects.filter(expira__lte=timezone.now()).delete()
+    return borrados
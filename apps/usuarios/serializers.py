@@ -1,7 +1,10 @@
 from rest_framework import serializers
 from djoser.serializers import UserCreateSerializer as BaseUserCreateSerializer
 from djoser.serializers import UserSerializer as BaseUserSerializer
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from .autenticacion import claims_usuario
 from .models import Usuario
+from .tokens import RefreshTokenRevocable
 
 class UserCreateSerializer(BaseUserCreateSerializer):
     class Meta(BaseUserCreateSerializer.Meta):
@@ -22,4 +25,22 @@ class UsuarioListSerializer(serializers.ModelSerializer):
         fields = ('id', 'username', 'email', 'nombre_completo', 'rol', 'activo', 'fecha_creacion')
     
     def get_nombre_completo(self, obj):
-        return obj.get_full_name() or obj.username
\ No newline at end of file
+        return obj.get_full_name() or obj.username
+
+class TokenObtainPairConClaimsSerializer(TokenObtainPairSerializer):
+    """Agrega username, rol y activo a los tokens para autenticar sin consultar la base"""
+    token_class = RefreshTokenRevocable
+    
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        for claim, valor in claims_usuario(user).items():
+            token[claim] = valor
+        return token
+
+class TokenRefreshConRevocacionSerializer(TokenRefreshSerializer):
+    """Rechaza refresh tokens revocados y revoca el anterior al rotar"""
+    token_class = RefreshTokenRevocable
+
+class LogoutSerializer(serializers.Serializer):
+    refresh = serializers.CharField()
@@ -1,7 +1,9 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 
+from .autenticacion import invalidar_usuario
+
 Usuario = get_user_model()
 
 @receiver(post_save, sender=Usuario)
@@ -11,4 +13,12 @@ def usuario_creado(sender, instance, created, **kwargs):
     """
     if created:
         print(f"Nuevo usuario registrado: {instance.username}")
-        # Aquí puedes enviar email de bienvenida
\ No newline at end of file
+        # Aquí puedes enviar email de bienvenida
+
+@receiver([post_save, post_delete], sender=Usuario)
+def usuario_modificado(sender, instance, **kwargs):
+    """
+    Invalida el estado en caché usado por JWTClaimsAuthentication
+    (cambiar_estado, cambios de rol, bajas)
+    """
+    invalidar_usuario(instance.pk)
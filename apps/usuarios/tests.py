@@ -1,3 +1,143 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .autenticacion import invalidar_usuario
+from .models import TokenRevocado, Usuario
+from .revocacion import FiltroBloom, esta_revocado, lista_revocados
+
+
+class AutenticacionClaimsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = Usuario.objects.create_user(
+            username='admin', password='admin12345', rol='admin', is_staff=True
+        )
+        self.cajero = Usuario.objects.create_user(username='cajero', password='cajero12345')
+        invalidar_usuario(self.cajero.pk)
+        self.client = APIClient()
+
+    def autenticar(self, username, password):
+        respuesta = self.client.post('/api/auth/jwt/create/', {'username': username, 'password': password})
+        self.assertEqual(respuesta.status_code, 200)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {respuesta.data['access']}")
+        return AccessToken(respuesta.data['access'])
+
+    def test_token_con_claims(self):
+        token = self.autenticar('cajero', 'cajero12345')
+        self.assertEqual(token['username'], 'cajero')
+        self.assertEqual(token['rol'], 'vendedor')
+        self.assertTrue(token['activo'])
+
+    def test_lecturas_sin_consultar_usuario(self):
+        self.autenticar('cajero', 'cajero12345')
+        invalidar_usuario(self.cajero.pk)
+
+        with self.assertNumQueries(1):
+            self.client.get('/api/reportes/analisis/cache_metricas/')
+        with self.assertNumQueries(0):
+            respuesta = self.client.get('/api/reportes/analisis/cache_metricas/')
+        self.assertEqual(respuesta.status_code, 200)
+
+        respuesta = self.client.get('/api/usuarios/me/')
+        self.assertEqual(respuesta.data['username'], 'cajero')
+
+    def test_me_de_djoser_con_perfil_completo(self):
+        self.cajero.email = 'cajero@localito.com'
+        self.cajero.first_name = 'Juan'
+        self.cajero.save()
+        self.autenticar('cajero', 'cajero12345')
+
+        respuesta = self.client.get('/api/auth/users/me/')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data['username'], 'cajero')
+        self.assertEqual(respuesta.data['email'], 'cajero@localito.com')
+        self.assertEqual(respuesta.data['first_name'], 'Juan')
+        self.assertEqual(respuesta.data['last_name'], '')
+
+        respuesta = self.client.patch('/api/auth/users/me/', {'last_name': 'Pérez'})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data['last_name'], 'Pérez')
+
+    def test_cambiar_estado_invalida(self):
+        self.autenticar('cajero', 'cajero12345')
+        self.assertEqual(self.client.get('/api/reportes/analisis/cache_metricas/').status_code, 200)
+
+        admin = APIClient()
+        admin.force_authenticate(self.admin)
+        admin.post(f'/api/usuarios/{self.cajero.pk}/cambiar_estado/')
+
+        self.assertEqual(self.client.get('/api/reportes/analisis/cache_metricas/').status_code, 401)
+        self.assertEqual(self.client.post('/api/inventario/categorias/', {'nombre': 'Bebidas'}).status_code, 401)
+
+    def test_cambio_de_rol_se_refleja(self):
+        self.autenticar('cajero', 'cajero12345')
+        self.assertEqual(self.client.get('/api/usuarios/').status_code, 200)
+        self.assertEqual(self.client.delete(f'/api/usuarios/{self.admin.pk}/').status_code, 403)
+
+        self.cajero.is_staff = True
+        self.cajero.save()
+
+        respuesta = self.client.get('/api/usuarios/')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(self.client.delete(f'/api/usuarios/{self.admin.pk}/').status_code, 204)
+
+
+class RevocacionTokensTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        lista_revocados.reiniciar()
+        Usuario.objects.create_user(username='cajero', password='cajero12345')
+        self.client = APIClient()
+        respuesta = self.client.post(
+            '/api/auth/jwt/create/', {'username': 'cajero', 'password': 'cajero12345'}, format='json'
+        )
+        self.refresh = respuesta.data['refresh']
+        self.access = respuesta.data['access']
+
+    def refrescar(self, refresh):
+        return self.client.post('/api/auth/jwt/refresh/', {'refresh': refresh}, format='json')
+
+    def test_rotacion_revoca_el_anterior(self):
+        respuesta = self.refrescar(self.refresh)
+        self.assertEqual(respuesta.status_code, 200)
+        nuevo = respuesta.data['refresh']
+        self.assertEqual(TokenRevocado.objects.count(), 1)
+
+        self.assertEqual(self.refrescar(self.refresh).status_code, 401)
+        self.assertEqual(self.refrescar(nuevo).status_code, 200)
+
+    def test_no_revocado_no_consulta_la_base(self):
+        TokenRevocado.objects.create(jti='6f1c1c8e-0c2f-4c1a-9a55-0d8b6f0e8a11', expira=timezone.now() + timedelta(days=1))
+        lista_revocados.sincronizar()
+
+        with self.assertNumQueries(0):
+            self.assertFalse(esta_revocado('0b7a2f52-9d3e-4c67-8f1e-3c5a1d2b4e6f'))
+        self.assertTrue(esta_revocado('6f1c1c8e-0c2f-4c1a-9a55-0d8b6f0e8a11'))
+
+    def test_logout(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access}')
+        self.assertEqual(self.client.post('/api/usuarios/logout/', {'refresh': self.refresh}).status_code, 205)
+        self.assertEqual(self.refrescar(self.refresh).status_code, 401)
+        self.assertEqual(self.client.post('/api/usuarios/logout/', {'refresh': 'x'}).status_code, 400)
+
+    def test_depurar_vencidos(self):
+        TokenRevocado.objects.create(jti='6f1c1c8e-0c2f-4c1a-9a55-0d8b6f0e8a11', expira=timezone.now() - timedelta(days=1))
+        TokenRevocado.objects.create(jti='0b7a2f52-9d3e-4c67-8f1e-3c5a1d2b4e6f', expira=timezone.now() + timedelta(days=1))
+
+        call_command('depurar_tokens_revocados', stdout=StringIO())
+        self.assertEqual(TokenRevocado.objects.count(), 1)
 
-# Create your tests here.
+    def test_filtro_bloom(self):
+        filtro = FiltroBloom(1000)
+        for i in range(1000):
+            filtro.agregar(f'jti-{i}')
+        self.assertTrue(all(f'jti-{i}' in filtro for i in range(1000)))
+        falsos = sum(f'otro-{i}' in filtro for i in range(10000))
+        self.assertLess(falsos, 50)
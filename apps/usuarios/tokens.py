@@ -0,0 +1,20 @@
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .revocacion import esta_revocado, revocar
+
+
+class RefreshTokenRevocable(RefreshToken):
+    """
+    RefreshToken que se valida contra tokens_revocados. `blacklist()` lo usa
+    TokenRefreshSerializer con BLACKLIST_AFTER_ROTATION y el cierre de sesión.
+    """
+
+    def verify(self):
+        super().verify()
+        if esta_revocado(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError('El token fue revocado')
+
+    def blacklist(self):
+        revocar(self.payload[api_settings.JTI_CLAIM], self.payload['exp'])
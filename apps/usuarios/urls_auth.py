@@ -0,0 +1,11 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import UsuarioAuthViewSet
+
+# Mismas rutas que djoser.urls, con el UserViewSet propio
+router = DefaultRouter()
+router.register(r'users', UsuarioAuthViewSet)
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
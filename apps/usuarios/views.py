@@ -2,8 +2,21 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework_simplejwt.exceptions import TokenError
+from djoser.views import UserViewSet
 from .models import Usuario
-from .serializers import UserSerializer, UsuarioListSerializer
+from .serializers import UserSerializer, UsuarioListSerializer, LogoutSerializer
+from .tokens import RefreshTokenRevocable
+
+class UsuarioAuthViewSet(UserViewSet):
+    """UserViewSet de djoser (/api/auth/users/) cuyo `me` responde con el Usuario de la base"""
+
+    def get_instance(self):
+        # En lecturas request.user es un UsuarioToken, sin email ni nombre
+        if isinstance(self.request.user, Usuario):
+            return self.request.user
+        return Usuario.objects.get(pk=self.request.user.pk)
+
 
 class UsuarioViewSet(viewsets.ModelViewSet):
     queryset = Usuario.objects.all()
@@ -21,7 +34,8 @@ class UsuarioViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def me(self, request):
-        serializer = UserSerializer(request.user)
+        # request.user puede ser un UsuarioToken; el perfil completo sale de la base
+        serializer = UserSerializer(Usuario.objects.get(pk=request.user.pk))
         return Response(serializer.data)
     
     @action(detail=True, methods=['post'])
@@ -29,4 +43,17 @@ class UsuarioViewSet(viewsets.ModelViewSet):
         usuario = self.get_object()
         usuario.activo = not usuario.activo
         usuario.save()
-        return Response({'status': 'Estado actualizado', 'activo': usuario.activo})
\ No newline at end of file
+        return Response({'status': 'Estado actualizado', 'activo': usuario.activo})
+    
+    @action(detail=False, methods=['post'])
+    def logout(self, request):
+        """Revoca el refresh token para cerrar la sesión"""
+        serializer = LogoutSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        try:
+            RefreshTokenRevocable(serializer.validated_data['refresh']).blacklist()
+        except TokenError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(status=status.HTTP_205_RESET_CONTENT)
@@ -13,4 +13,4 @@ class VentaAdmin(admin.ModelAdmin):
     search_fields = ('folio', 'cliente_nombre')
     date_hierarchy = 'fecha'
     inlines = [DetalleVentaInline]
-    readonly_fields = ('folio', 'subtotal', 'iva', 'total')
\ No newline at end of file
+    readonly_fields = ('folio', 'subtotal', 'iva', 'total', 'costo_total', 'utilidad_total', 'num_items')
\ No newline at end of file
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, DecimalField, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from apps.ventas.models import Venta, DetalleVenta
+from apps.core.cache import invalidar_modelos
+
+
+class Command(BaseCommand):
+    help = 'Recalcula costo_total, utilidad_total y num_items de las ventas a partir de sus detalles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk', type=int, default=5000,
+                            help='Número de ventas actualizadas por sentencia')
+
+    def handle(self, *args, **options):
+        chunk = options['chunk']
+        detalles = DetalleVenta.objects.filter(venta=OuterRef('pk')).order_by().values('venta')
+
+        def agregado(expresion, output_field):
+            return Coalesce(
+                Subquery(detalles.annotate(valor=expresion).values('valor'), output_field=output_field),
+                0,
+                output_field=output_field
+            )
+
+        decimal = DecimalField(max_digits=10, decimal_places=2)
+        subtotal = agregado(Sum('subtotal'), decimal)
+        utilidad = agregado(Sum('utilidad'), decimal)
+
+        ids = Venta.objects.order_by('pk').values_list('pk', flat=True)
+        ultimo_id = 0
+        actualizadas = 0
+
+        while True:
+            lote = list(ids.filter(pk__gt=ultimo_id)[:chunk])
+            if not lote:
+                break
+            ultimo_id = lote[-1]
+
+            actualizadas += Venta.objects.filter(pk__gte=lote[0], pk__lte=ultimo_id).update(
+                utilidad_total=utilidad,
+                costo_total=subtotal - utilidad,
+                num_items=agregado(Count('id'), IntegerField()),
+            )
+            self.stdout.write(f'{actualizadas} ventas actualizadas...')
+
+        invalidar_modelos(Venta)
+        self.stdout.write(self.style.SUCCESS(f'Totales recalculados en {actualizadas} ventas'))
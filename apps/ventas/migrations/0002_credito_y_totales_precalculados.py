@@ -0,0 +1,63 @@
+# Generated by Django 5.1.3 on 2026-10-19 12:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ventas', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='venta',
+            name='costo_total',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='venta',
+            name='dias_credito',
+            field=models.IntegerField(blank=True, choices=[(15, '15 días'), (30, '30 días')], null=True),
+        ),
+        migrations.AddField(
+            model_name='venta',
+            name='estado_credito',
+            field=models.CharField(blank=True, choices=[('pendiente', 'Pendiente'), ('pagado', 'Pagado'), ('vencido', 'Vencido')], max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='venta',
+            name='fecha_pago',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='venta',
+            name='fecha_vencimiento',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='venta',
+            name='num_items',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='venta',
+            name='utilidad_total',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AlterField(
+            model_name='venta',
+            name='metodo_pago',
+            field=models.CharField(choices=[('efectivo', 'Efectivo'), ('tarjeta', 'Tarjeta'), ('transferencia', 'Transferencia'), ('credito', 'Crédito')], max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='venta',
+            index=models.Index(fields=['estado_credito'], name='ventas_estado__129b97_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='venta',
+            index=models.Index(fields=['fecha_vencimiento'], name='ventas_fecha_v_682dc7_idx'),
+        ),
+    ]
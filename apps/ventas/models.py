@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Count, Sum
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 from apps.inventario.models import Producto
@@ -37,6 +38,11 @@ class Venta(models.Model):
     iva = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     total = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     
+    # Agregados de los detalles, precalculados para que los reportes no unan detalles_venta
+    costo_total = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    utilidad_total = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    num_items = models.PositiveIntegerField(default=0)
+    
     # Pago
     metodo_pago = models.CharField(max_length=20, choices=METODOS_PAGO)
     
@@ -73,22 +79,30 @@ class Venta(models.Model):
         
         # Calcular fecha de vencimiento si es crédito y es una nueva venta
         if es_nuevo and self.metodo_pago == 'credito' and self.dias_credito and not self.fecha_vencimiento:
-            self.fecha_vencimiento = (self.fecha + timedelta(days=self.dias_credito)).date()
+            # Día local de la venta: después de las 18:00 la fecha en UTC ya es el día siguiente
+            self.fecha_vencimiento = timezone.localdate(self.fecha) + timedelta(days=self.dias_credito)
             self.estado_credito = 'pendiente'
             # Guardar de nuevo solo si se modificó algo
             super().save(update_fields=['fecha_vencimiento', 'estado_credito'])
     
     def calcular_totales(self):
-        detalles = self.detalles.all()
-        self.subtotal = sum(d.subtotal for d in detalles)
+        totales = self.detalles.aggregate(
+            subtotal=Sum('subtotal'),
+            utilidad=Sum('utilidad'),
+            num_items=Count('id')
+        )
+        self.subtotal = totales['subtotal'] or Decimal('0')
         self.iva = self.subtotal * Decimal('0.16')
         self.total = self.subtotal + self.iva
+        self.utilidad_total = totales['utilidad'] or Decimal('0')
+        self.costo_total = self.subtotal - self.utilidad_total
+        self.num_items = totales['num_items']
         self.save()
     
     def dias_para_vencimiento(self):
         """Calcula los días que faltan para el vencimiento"""
         if self.fecha_vencimiento and self.estado_credito == 'pendiente':
-            dias = (self.fecha_vencimiento - timezone.now().date()).days
+            dias = (self.fecha_vencimiento - timezone.localdate()).days
             return dias
         return None
     
@@ -97,12 +111,21 @@ class Venta(models.Model):
         dias = self.dias_para_vencimiento()
         return dias is not None and 0 <= dias <= 2
     
+    @classmethod
+    def marcar_creditos_vencidos(cls):
+        """Marca como vencidos, en una sola consulta, los créditos pendientes cuyo plazo ya pasó"""
+        return cls.objects.filter(
+            metodo_pago='credito',
+            estado_credito='pendiente',
+            fecha_vencimiento__lt=timezone.localdate()
+        ).update(estado_credito='vencido')
+    
     def actualizar_estado_credito(self):
         """Actualiza el estado del crédito automáticamente"""
         if self.metodo_pago == 'credito' and self.estado_credito == 'pendiente':
-            if timezone.now().date() > self.fecha_vencimiento:
+            if timezone.localdate() > self.fecha_vencimiento:
                 self.estado_credito = 'vencido'
-                self.save()
+                self.save(update_fields=['estado_credito'])
 
 class DetalleVenta(models.Model):
     venta = models.ForeignKey(Venta, on_delete=models.CASCADE, related_name='detalles')
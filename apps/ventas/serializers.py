@@ -1,6 +1,10 @@
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
 from .models import Venta, DetalleVenta
+from apps.core.listas_rapidas import ListaRapida, nombre_completo
 from apps.inventario.models import Producto
+from apps.monitoreo.metricas import STOCK_DESCONTADO
 
 class DetalleVentaSerializer(serializers.ModelSerializer):
     producto_nombre = serializers.CharField(source='producto.nombre', read_only=True)
@@ -30,7 +34,7 @@ class DetalleVentaCreateSerializer(serializers.ModelSerializer):
 class VentaSerializer(serializers.ModelSerializer):
     detalles = DetalleVentaSerializer(many=True, read_only=True)
     usuario_nombre = serializers.CharField(source='usuario.get_full_name', read_only=True)
-    total_items = serializers.IntegerField(source='detalles.count', read_only=True)
+    total_items = serializers.IntegerField(source='num_items', read_only=True)
     dias_para_vencimiento = serializers.SerializerMethodField()
     esta_por_vencer = serializers.SerializerMethodField()
     
@@ -38,7 +42,8 @@ class VentaSerializer(serializers.ModelSerializer):
         model = Venta
         fields = '__all__'
         read_only_fields = ('folio', 'subtotal', 'iva', 'total', 'usuario', 'fecha', 
-                          'fecha_vencimiento', 'estado_credito')
+                          'fecha_vencimiento', 'estado_credito', 'costo_total',
+                          'utilidad_total', 'num_items')
     
     def get_dias_para_vencimiento(self, obj):
         return obj.dias_para_vencimiento()
@@ -60,7 +65,7 @@ class VentaListSerializer(serializers.ModelSerializer):
                  'esta_por_vencer')
     
     def get_total_items(self, obj):
-        return obj.detalles.count()
+        return obj.num_items
     
     def get_dias_para_vencimiento(self, obj):
         return obj.dias_para_vencimiento()
@@ -68,6 +73,30 @@ class VentaListSerializer(serializers.ModelSerializer):
     def get_esta_por_vencer(self, obj):
         return obj.esta_por_vencer()
 
+class VentaListaRapida(ListaRapida):
+    serializer_class = VentaListSerializer
+    columnas_extra = ('usuario', 'usuario__first_name', 'usuario__last_name', 'num_items')
+    
+    def __init__(self, context=None):
+        super().__init__(context)
+        self.hoy = timezone.localdate()
+    
+    def get_usuario_nombre(self, fila):
+        return nombre_completo(fila)
+    
+    def get_total_items(self, fila):
+        return fila['num_items']
+    
+    def get_dias_para_vencimiento(self, fila):
+        # Venta.dias_para_vencimiento()
+        if fila['fecha_vencimiento'] and fila['estado_credito'] == 'pendiente':
+            return (fila['fecha_vencimiento'] - self.hoy).days
+        return None
+    
+    def get_esta_por_vencer(self, fila):
+        dias = self.get_dias_para_vencimiento(fila)
+        return dias is not None and 0 <= dias <= 2
+
 class VentaCreateSerializer(serializers.ModelSerializer):
     detalles = DetalleVentaCreateSerializer(many=True)
     
@@ -107,6 +136,7 @@ class VentaCreateSerializer(serializers.ModelSerializer):
         venta = Venta.objects.create(**validated_data)
         
         # Crear detalles y actualizar stock
+        unidades = 0
         for detalle_data in detalles_data:
             producto = detalle_data['producto']
             cantidad = detalle_data['cantidad']
@@ -128,10 +158,14 @@ class VentaCreateSerializer(serializers.ModelSerializer):
             # Actualizar stock
             producto.stock -= cantidad
             producto.save()
+            unidades += cantidad
         
         # Calcular totales
         venta.calcular_totales()
         
+        # Solo cuenta si la venta se confirma
+        transaction.on_commit(lambda: STOCK_DESCONTADO.labels('venta').inc(unidades))
+        
         return venta
 
 class MarcarPagadoSerializer(serializers.Serializer):
@@ -1,3 +1,131 @@
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.core.fechas import hoy, rango_dia
+from apps.inventario.models import Categoria, Producto
+from apps.usuarios.models import Usuario
+from .models import Venta
+
+
+class VentasTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.usuario = Usuario.objects.create_user(username='cajero', password='cajero123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+        categoria = Categoria.objects.create(nombre='Abarrotes')
+        self.arroz = Producto.objects.create(
+            codigo='P-001', nombre='Arroz', categoria=categoria, stock=100,
+            precio_costo=Decimal('20.00'), precio_venta=Decimal('30.00'),
+        )
+        self.frijol = Producto.objects.create(
+            codigo='P-002', nombre='Frijol', categoria=categoria, stock=100,
+            precio_costo=Decimal('15.00'), precio_venta=Decimal('25.00'),
+        )
+
+    def vender(self, *detalles, **extra):
+        datos = {
+            'metodo_pago': 'efectivo',
+            'detalles': [
+                {'producto': producto.pk, 'cantidad': cantidad, 'precio_unitario': str(precio)}
+                for producto, cantidad, precio in detalles
+            ],
+        }
+        datos.update(extra)
+        respuesta = self.client.post('/api/ventas/', datos, format='json')
+        self.assertEqual(respuesta.status_code, 201, respuesta.data)
+        return Venta.objects.latest('id')
+
+
+class TotalesPrecalculadosTests(VentasTestCase):
+    def test_checkout_calcula_totales(self):
+        venta = self.vender((self.arroz, 2, Decimal('30.00')), (self.frijol, 1, Decimal('25.00')))
+
+        self.assertEqual(venta.subtotal, Decimal('85.00'))
+        self.assertEqual(venta.utilidad_total, Decimal('30.00'))
+        self.assertEqual(venta.costo_total, Decimal('55.00'))
+        self.assertEqual(venta.num_items, 2)
+
+    def test_reporte_sin_inflar_por_detalles(self):
+        venta = self.vender((self.arroz, 2, Decimal('30.00')), (self.frijol, 1, Decimal('25.00')))
+
+        respuesta = self.client.get('/api/reportes/analisis/dashboard_metricas/')
+        self.assertEqual(respuesta.data['mes_actual']['num_ventas'], 1)
+        self.assertEqual(respuesta.data['mes_actual']['ventas'], venta.total)
+        self.assertEqual(respuesta.data['mes_actual']['utilidad'], Decimal('30.00'))
+
+    def test_backfill(self):
+        venta = self.vender((self.arroz, 3, Decimal('30.00')))
+        Venta.objects.filter(pk=venta.pk).update(costo_total=0, utilidad_total=0, num_items=0)
+
+        call_command('recalcular_totales_ventas', stdout=StringIO())
+
+        venta.refresh_from_db()
+        self.assertEqual(venta.utilidad_total, Decimal('30.00'))
+        self.assertEqual(venta.costo_total, Decimal('60.00'))
+        self.assertEqual(venta.num_items, 1)
+
+
+class RangosFechaTests(VentasTestCase):
+    def test_estadisticas_hoy_solo_cuenta_el_dia_local(self):
+        self.vender((self.arroz, 1, Decimal('30.00')))
+        ayer = self.vender((self.frijol, 1, Decimal('25.00')))
+        inicio_hoy, _ = rango_dia()
+        Venta.objects.filter(pk=ayer.pk).update(fecha=inicio_hoy - timedelta(minutes=1))
+
+        respuesta = self.client.get('/api/ventas/estadisticas_hoy/')
+        self.assertEqual(respuesta.data['total_ventas'], 1)
+        self.assertEqual(respuesta.data['ticket_promedio'], Decimal('34.80'))
+
+    def test_ventas_por_periodo_dentro_del_limite_de_tiempo(self):
+        consultas = []
+
+        @contextmanager
+        def limite_tiempo(milisegundos):
+            with CaptureQueriesContext(connection) as capturadas:
+                yield
+            consultas.extend(consulta['sql'] for consulta in capturadas)
+
+        with patch('apps.core.presupuesto.limite_tiempo', limite_tiempo):
+            respuesta = self.client.get('/api/ventas/ventas_por_periodo/')
+        self.assertEqual(respuesta.json(), [])
+        self.assertTrue(any('GROUP BY' in sql for sql in consultas))
+
+    def test_filtro_fecha_fin_incluye_todo_el_dia(self):
+        venta = self.vender((self.arroz, 1, Decimal('30.00')))
+        fecha = hoy().isoformat()
+
+        respuesta = self.client.get('/api/ventas/', {'fecha_inicio': fecha, 'fecha_fin': fecha})
+        self.assertEqual([v['id'] for v in respuesta.data['results']], [venta.pk])
+
+        respuesta = self.client.get('/api/ventas/', {'fecha_fin': '31-12-2024'})
+        self.assertEqual(respuesta.status_code, 400)
+
+    def test_vencimiento_de_venta_nocturna(self):
+        # 20:30 en la Ciudad de México ya es el día siguiente en UTC
+        noche = timezone.make_aware(datetime(2024, 3, 15, 20, 30)).astimezone(dt_timezone.utc)
+        with patch('django.utils.timezone.now', return_value=noche):
+            venta = self.vender((self.arroz, 1, Decimal('30.00')), metodo_pago='credito', dias_credito=15)
+
+        self.assertEqual(venta.fecha_vencimiento, date(2024, 3, 30))
+
+    def test_notificaciones_con_credito_vencido(self):
+        venta = self.vender((self.arroz, 1, Decimal('30.00')), metodo_pago='credito', dias_credito=15)
+        Venta.objects.filter(pk=venta.pk).update(
+            estado_credito='vencido', fecha_vencimiento=hoy() - timedelta(days=3)
+        )
 
-# Create your tests here.
+        respuesta = self.client.get('/api/ventas/notificaciones/')
+        vencidas = [n for n in respuesta.data['notificaciones'] if n['tipo'] == 'credito_vencido']
+        self.assertEqual(vencidas[0]['dias_vencido'], 3)
@@ -2,21 +2,27 @@ from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Sum, Count, F, Q
-from datetime import datetime, timedelta
+from django.db.models import Sum, Count, Avg, F, Q
+from datetime import timedelta
 from django.utils import timezone
+from apps.core.cache import invalidar_modelos, obtener
+from apps.core.fechas import filtrar_por_fechas, hoy, rango_dia, ultimos_dias
+from apps.core.listas_rapidas import ListaRapidaMixin
+from apps.core.presupuesto import presupuesto_consulta
+from apps.core.replicas import LecturaReplicaMixin
 from .models import Venta, DetalleVenta
 from .serializers import (
-    VentaSerializer, VentaListSerializer, VentaCreateSerializer,
+    VentaSerializer, VentaListSerializer, VentaListaRapida, VentaCreateSerializer,
     DetalleVentaSerializer, MarcarPagadoSerializer
 )
 
-class VentaViewSet(viewsets.ModelViewSet):
+class VentaViewSet(ListaRapidaMixin, LecturaReplicaMixin, viewsets.ModelViewSet):
     queryset = Venta.objects.select_related('usuario').prefetch_related('detalles').all()
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['metodo_pago', 'cancelada', 'estado_credito']
     search_fields = ['folio', 'cliente_nombre']
     ordering_fields = ['fecha', 'total']
+    lista_rapida = VentaListaRapida
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -30,20 +36,12 @@ class VentaViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         queryset = super().get_queryset()
         
-        # Actualizar estados de crédito vencidos
-        for venta in queryset.filter(metodo_pago='credito', estado_credito='pendiente'):
-            venta.actualizar_estado_credito()
+        # Actualizar estados de crédito vencidos (update no dispara post_save)
+        if Venta.marcar_creditos_vencidos():
+            invalidar_modelos(Venta)
         
-        # Filtrar por rango de fechas
-        fecha_inicio = self.request.query_params.get('fecha_inicio')
-        fecha_fin = self.request.query_params.get('fecha_fin')
-        
-        if fecha_inicio:
-            queryset = queryset.filter(fecha__gte=fecha_inicio)
-        if fecha_fin:
-            queryset = queryset.filter(fecha__lte=fecha_fin)
-        
-        return queryset
+        # Filtrar por rango de fechas (días locales inclusivos)
+        return filtrar_por_fechas(queryset, self.request.query_params)
     
     @action(detail=True, methods=['post'])
     def cancelar(self, request, pk=None):
@@ -63,13 +61,14 @@ class VentaViewSet(viewsets.ModelViewSet):
             )
         
         # Regresar stock
-        for detalle in venta.detalles.all():
+        for detalle in venta.detalles.select_related('producto'):
             producto = detalle.producto
             producto.stock += detalle.cantidad
             producto.save()
         
+        # Los totales precalculados se conservan; los reportes excluyen las canceladas
         venta.cancelada = True
-        venta.save()
+        venta.save(update_fields=['cancelada'])
         
         return Response({'status': 'Venta cancelada correctamente'})
     
@@ -92,7 +91,7 @@ class VentaViewSet(viewsets.ModelViewSet):
         
         venta.estado_credito = 'pagado'
         venta.fecha_pago = timezone.now()
-        venta.save()
+        venta.save(update_fields=['estado_credito', 'fecha_pago'])
         
         serializer = self.get_serializer(venta)
         return Response({
@@ -102,27 +101,36 @@ class VentaViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def estadisticas_hoy(self, request):
-        hoy = datetime.now().date()
-        ventas_hoy = self.queryset.filter(fecha__date=hoy, cancelada=False)
+        inicio, fin = rango_dia()
+        ventas_hoy = Venta.objects.filter(
+            fecha__gte=inicio, fecha__lt=fin, cancelada=False
+        ).aggregate(
+            total_ventas=Count('id'),
+            monto_total=Sum('total'),
+            ticket_promedio=Avg('total')
+        )
         
         return Response({
-            'total_ventas': ventas_hoy.count(),
-            'monto_total': ventas_hoy.aggregate(total=Sum('total'))['total'] or 0,
-            'ticket_promedio': ventas_hoy.aggregate(promedio=Sum('total'))['promedio'] or 0,
+            'total_ventas': ventas_hoy['total_ventas'],
+            'monto_total': ventas_hoy['monto_total'] or 0,
+            'ticket_promedio': ventas_hoy['ticket_promedio'] or 0,
         })
     
     @action(detail=False, methods=['get'])
+    @presupuesto_consulta()
     def ventas_por_periodo(self, request):
         dias = int(request.query_params.get('dias', 30))
-        fecha_inicio = datetime.now() - timedelta(days=dias)
+        fecha_inicio, fecha_fin = ultimos_dias(dias)
         
-        ventas = self.queryset.filter(
+        # Se evalúa aquí, dentro del límite de tiempo de presupuesto_consulta
+        ventas = list(Venta.objects.filter(
             fecha__gte=fecha_inicio,
+            fecha__lt=fecha_fin,
             cancelada=False
         ).values('fecha__date').annotate(
             total=Sum('total'),
             cantidad=Count('id')
-        ).order_by('fecha__date')
+        ).order_by('fecha__date'))
         
         return Response(ventas)
     
@@ -141,14 +149,14 @@ class VentaViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def creditos_por_vencer(self, request):
         """Obtener ventas a crédito que vencen en 2 días o menos"""
-        hoy = timezone.now().date()
-        fecha_limite = hoy + timedelta(days=2)
+        fecha_hoy = hoy()
+        fecha_limite = fecha_hoy + timedelta(days=2)
         
         creditos = self.queryset.filter(
             metodo_pago='credito',
             estado_credito='pendiente',
             fecha_vencimiento__lte=fecha_limite,
-            fecha_vencimiento__gte=hoy,
+            fecha_vencimiento__gte=fecha_hoy,
             cancelada=False
         ).select_related('usuario')
         
@@ -167,9 +175,8 @@ class VentaViewSet(viewsets.ModelViewSet):
         serializer = VentaListSerializer(creditos, many=True)
         return Response(serializer.data)
     
-    @action(detail=False, methods=['get'])
-    def notificaciones(self, request):
-        """Obtener todas las notificaciones (stock bajo + créditos por vencer)"""
+    def calcular_notificaciones(self, fecha_hoy):
+        """Notificaciones de stock bajo y de créditos por vencer o vencidos"""
         from apps.inventario.models import Producto
         
         # Productos con stock bajo
@@ -179,14 +186,13 @@ class VentaViewSet(viewsets.ModelViewSet):
         ).count()
         
         # Créditos por vencer (2 días o menos)
-        hoy = timezone.now().date()
-        fecha_limite = hoy + timedelta(days=2)
+        fecha_limite = fecha_hoy + timedelta(days=2)
         
         creditos_por_vencer = self.queryset.filter(
             metodo_pago='credito',
             estado_credito='pendiente',
             fecha_vencimiento__lte=fecha_limite,
-            fecha_vencimiento__gte=hoy,
+            fecha_vencimiento__gte=fecha_hoy,
             cancelada=False
         )
         
@@ -228,7 +234,8 @@ class VentaViewSet(viewsets.ModelViewSet):
         
         # Agregar notificaciones de créditos vencidos
         for venta in creditos_vencidos:
-            dias_vencido = abs(venta.dias_para_vencimiento())
+            # dias_para_vencimiento() solo aplica a créditos pendientes
+            dias_vencido = (fecha_hoy - venta.fecha_vencimiento).days
             notificaciones.append({
                 'tipo': 'credito_vencido',
                 'titulo': f'Crédito vencido - {venta.folio}',
@@ -242,6 +249,20 @@ class VentaViewSet(viewsets.ModelViewSet):
                 'icono': 'x-circle'
             })
         
+        return notificaciones
+    
+    @action(detail=False, methods=['get'])
+    def notificaciones(self, request):
+        """Obtener todas las notificaciones (stock bajo + créditos por vencer)"""
+        from apps.inventario.models import Producto
+        
+        # El frontend las consulta constantemente; solo cambian con productos, ventas o el día
+        fecha_hoy = hoy()
+        notificaciones = obtener(
+            'ventas.notificaciones', (fecha_hoy,), lambda: self.calcular_notificaciones(fecha_hoy),
+            modelos=(Producto, Venta)
+        )
+        
         return Response({
             'total': len(notificaciones),
             'notificaciones': notificaciones
@@ -0,0 +1,22 @@
+"""
+Configuración de gunicorn (se carga automáticamente desde el directorio de trabajo).
+
+Con PROMETHEUS_MULTIPROC_DIR cada worker escribe sus métricas en ese
+directorio; al arrancar se vacía y cuando un worker termina se marcan sus
+archivos para que el endpoint de métricas deje de sumar sus gauges.
+"""
+import os
+import shutil
+
+
+def on_starting(server):
+    directorio = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directorio:
+        shutil.rmtree(directorio, ignore_errors=True)
+        os.makedirs(directorio, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,14 @@
+"""
+Configuración de Celery para tareas en segundo plano.
+
+Sin CELERY_BROKER_URL las tareas se ejecutan en modo eager (en el mismo proceso).
+"""
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'localitodjango.settings')
+
+app = Celery('localitodjango')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
@@ -1,7 +1,8 @@
 from pathlib import Path
 from datetime import timedelta
 import os
-from decouple import config
+from decouple import Choices, config
+from django.core.exceptions import ImproperlyConfigured
 import dj_database_url
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -25,15 +26,20 @@ INSTALLED_APPS = [
     'drf_yasg',
     'djoser',
     
+    'apps.core',
     'apps.usuarios',
     'apps.inventario',
     'apps.ventas',
     'apps.facturacion',
     'apps.reportes',
+    'apps.monitoreo',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'apps.monitoreo.middleware.MetricasMiddleware',
+    'apps.monitoreo.middleware.InstrumentacionSQLMiddleware',
+    'apps.monitoreo.middleware.ConsultasLentasMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
 
@@ -43,6 +49,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'apps.core.middleware.ReplicaPegajosaMiddleware',
+    'apps.monitoreo.middleware.PerfiladorMiddleware',
 ]
 
 ROOT_URLCONF = 'localitodjango.urls'
@@ -73,6 +81,62 @@ DATABASES = {
     )
 }
 
+# Réplica de solo lectura para reportes, exportaciones y listados (opcional)
+DATABASE_REPLICA_URL = config('DATABASE_REPLICA_URL', default='')
+REPLICA_DATABASE_ALIAS = 'replica'
+# Segundos que un usuario lee de default después de escribir
+REPLICA_LECTURA_PEGAJOSA = config('REPLICA_LECTURA_PEGAJOSA', default=10, cast=int)
+
+if DATABASE_REPLICA_URL:
+    DATABASES[REPLICA_DATABASE_ALIAS] = dj_database_url.parse(DATABASE_REPLICA_URL, conn_max_age=600)
+    DATABASES[REPLICA_DATABASE_ALIAS]['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_ROUTERS = ['apps.core.replicas.ReplicaRouter']
+
+# Listados de productos, ventas, facturas y movimientos desde values() (apps.core.listas_rapidas)
+LISTAS_RAPIDAS = config('LISTAS_RAPIDAS', default=False, cast=bool)
+
+# Caché: LocMem en local, Redis compartido entre workers cuando REDIS_URL está definido
+REDIS_URL = config('REDIS_URL', default='')
+
+# locmem: por proceso; archivos: compartida entre workers de una máquina; redis: REDIS_URL (o compatible)
+CACHE_BACKEND = config(
+    'CACHE_BACKEND', default='redis' if REDIS_URL else 'locmem', cast=Choices(['locmem', 'archivos', 'redis'])
+)
+CACHE_DIRECTORIO = config('CACHE_DIRECTORIO', default=str(BASE_DIR / '.cache'))
+# Vigencia por defecto de apps.core.cache; los cambios la invalidan antes
+CACHE_COMPARTIDA_TIMEOUT = config('CACHE_COMPARTIDA_TIMEOUT', default=300, cast=int)
+
+if CACHE_BACKEND == 'redis':
+    if not REDIS_URL:
+        raise ImproperlyConfigured('CACHE_BACKEND=redis requiere REDIS_URL')
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'localito',
+        }
+    }
+elif CACHE_BACKEND == 'archivos':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': CACHE_DIRECTORIO,
+            'KEY_PREFIX': 'localito',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'localito',
+        }
+    }
+
+# La marca de lectura pegajosa de apps.core.replicas debe verse en todos los workers
+if DATABASE_REPLICA_URL and CACHE_BACKEND == 'locmem':
+    raise ImproperlyConfigured('DATABASE_REPLICA_URL requiere una caché compartida (CACHE_BACKEND=redis o archivos)')
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -124,7 +188,7 @@ CORS_ALLOW_METHODS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.usuarios.autenticacion.JWTClaimsAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -136,9 +200,14 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    # JSON con orjson; la API navegable solo en desarrollo
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
-        'rest_framework.renderers.BrowsableAPIRenderer',
+        'apps.core.json_rapido.JSONRapidoRenderer',
+    ] + (['rest_framework.renderers.BrowsableAPIRenderer'] if DEBUG else []),
+    'DEFAULT_PARSER_CLASSES': [
+        'apps.core.json_rapido.JSONRapidoParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
     'DATETIME_FORMAT': '%Y-%m-%d %H:%M:%S',
     'DATE_FORMAT': '%Y-%m-%d',
@@ -150,8 +219,13 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_OBTAIN_SERIALIZER': 'apps.usuarios.serializers.TokenObtainPairConClaimsSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'apps.usuarios.serializers.TokenRefreshConRevocacionSerializer',
 }
 
+# Segundos que cada proceso confía en el estado de un usuario autenticado por JWT
+USUARIOS_CACHE_SEGUNDOS = config('USUARIOS_CACHE_SEGUNDOS', default=30, cast=int)
+
 DJOSER = {
     'USER_CREATE_PASSWORD_RETYPE': True,
     'SEND_ACTIVATION_EMAIL': False,
@@ -165,4 +239,52 @@ DJOSER = {
 AUTH_USER_MODEL = 'usuarios.Usuario'
 
 FACTURAPI_SECRET_KEY = config('FACTURAPI_SECRET_KEY', default='')
-FACTURAPI_BASE_URL = config('FACTURAPI_BASE_URL', default='https://www.facturapi.io/v2')
\ No newline at end of file
+FACTURAPI_BASE_URL = config('FACTURAPI_BASE_URL', default='https://www.facturapi.io/v2')
+FACTURACION_ESTADISTICAS_CACHE_TIMEOUT = config('FACTURACION_ESTADISTICAS_CACHE_TIMEOUT', default=60, cast=int)
+
+REPORTES_CACHE_TIMEOUT = config('REPORTES_CACHE_TIMEOUT', default=300, cast=int)
+# Presupuesto de las consultas pesadas: días máximos por petición y tiempo por sentencia
+REPORTES_MAX_DIAS = config('REPORTES_MAX_DIAS', default=366, cast=int)
+REPORTES_TIMEOUT_MS = config('REPORTES_TIMEOUT_MS', default=15000, cast=int)
+# Mapa de calor y comparativos leen las tablas de resumen en lugar de ventas. La migración
+# reportes 0007 llena el historial; con False se consulta ventas directamente
+REPORTES_USAR_RESUMENES = config('REPORTES_USAR_RESUMENES', default=True, cast=bool)
+
+# Instrumentación SQL por petición: fracción de peticiones medidas y umbral de consultas repetidas (N+1)
+MONITOREO_SQL_MUESTREO = config('MONITOREO_SQL_MUESTREO', default=1.0 if DEBUG else 0.1, cast=float)
+MONITOREO_N_MAS_UNO_UMBRAL = config('MONITOREO_N_MAS_UNO_UMBRAL', default=5, cast=int)
+MONITOREO_N_MAS_UNO_INTERVALO = config('MONITOREO_N_MAS_UNO_INTERVALO', default=300, cast=int)
+
+# Consultas lentas: se guardan las que tardan al menos este umbral (0 desactiva), con su plan
+MONITOREO_CONSULTA_LENTA_MS = config('MONITOREO_CONSULTA_LENTA_MS', default=200, cast=float)
+
+# Métricas de Prometheus en /api/monitoreo/metricas/ (sin token, solo desde localhost)
+MONITOREO_METRICAS = config('MONITOREO_METRICAS', default=True, cast=bool)
+MONITOREO_METRICAS_TOKEN = config('MONITOREO_METRICAS_TOKEN', default='')
+# Con varios workers de gunicorn: directorio compartido para sumar las métricas de todos
+PROMETHEUS_MULTIPROC_DIR = config('PROMETHEUS_MULTIPROC_DIR', default='')
+if PROMETHEUS_MULTIPROC_DIR:
+    # prometheus_client lo lee del entorno al importarse
+    os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', PROMETHEUS_MULTIPROC_DIR)
+
+# Perfilador bajo demanda (X-Perfilar: 1 o ?perfilar=1, solo staff) y perfiles que se conservan
+MONITOREO_PERFILADOR = config('MONITOREO_PERFILADOR', default=True, cast=bool)
+MONITOREO_PERFILES_MAXIMO = config('MONITOREO_PERFILES_MAXIMO', default=100, cast=int)
+
+# Celery: sin broker las tareas se ejecutan en modo eager dentro del proceso web
+CELERY_BROKER_URL = config('CELERY_BROKER_URL', default=REDIS_URL)
+CELERY_RESULT_BACKEND = config('CELERY_RESULT_BACKEND', default=CELERY_BROKER_URL or None)
+CELERY_TASK_ALWAYS_EAGER = config('CELERY_TASK_ALWAYS_EAGER', default=not CELERY_BROKER_URL, cast=bool)
+CELERY_TASK_EAGER_PROPAGATES = False
+CELERY_TIMEZONE = TIME_ZONE
+CELERY_TASK_TRACK_STARTED = True
+CELERY_BEAT_SCHEDULE = {
+    'refrescar-resumenes-reportes': {
+        'task': 'apps.reportes.tasks.refrescar_resumenes_recientes',
+        'schedule': 60 * 60,
+    },
+    'clasificar-productos-abc': {
+        'task': 'apps.reportes.tasks.clasificar_productos_abc',
+        'schedule': 24 * 60 * 60,
+    },
+}
\ No newline at end of file
@@ -28,7 +28,7 @@ urlpatterns = [
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
     
     # Authentication
-    path('api/auth/', include('djoser.urls')),
+    path('api/auth/', include('apps.usuarios.urls_auth')),
     path('api/auth/', include('djoser.urls.jwt')),
     
     # Apps
@@ -37,6 +37,7 @@ urlpatterns = [
     path('api/ventas/', include('apps.ventas.urls')),
     path('api/facturacion/', include('apps.facturacion.urls')),
     path('api/reportes/', include('apps.reportes.urls')),
+    path('api/monitoreo/', include('apps.monitoreo.urls')),
 ]
 
 if settings.DEBUG: